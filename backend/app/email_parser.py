@@ -6,6 +6,22 @@ from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
+# Compiled once; clean_email_body runs these on every line of every email
+_NAME_ADDR_RE = re.compile(r'^([^<]+)<.*>$')
+_EMAIL_LOCAL_RE = re.compile(r'^([^@]+)@.*$')
+_WS_RE = re.compile(r'\s+')
+_SIGNATURE_RE = re.compile('|'.join([
+    'sent from my',
+    'get outlook for',
+    'on .* wrote:',
+    '^--$',
+    'best regards',
+    'sincerely',
+    'thank you',
+    'thanks',
+    r'^\s*$'  # Empty lines
+]))
+
 
 class EmailParseError(Exception):
     """Exception raised when email parsing fails"""
@@ -78,12 +94,12 @@ def extract_sender_name(from_field: Optional[str]) -> str:
     
     try:
         # Handle "Name <email@domain.com>" format
-        name_match = re.match(r'^([^<]+)<.*>$', from_field.strip())
+        name_match = _NAME_ADDR_RE.match(from_field.strip())
         if name_match:
             return name_match.group(1).strip()
         
         # Handle plain email addresses
-        email_match = re.match(r'^([^@]+)@.*$', from_field.strip())
+        email_match = _EMAIL_LOCAL_RE.match(from_field.strip())
         if email_match:
             return email_match.group(1)
         
@@ -125,7 +141,7 @@ def clean_email_body(body: Optional[str]) -> str:
         
         # Join and normalize whitespace
         clean_text = ' '.join(clean_lines)
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+        clean_text = _WS_RE.sub(' ', clean_text).strip()
         
         return clean_text
         
@@ -145,21 +161,4 @@ def _is_signature_line(line: str) -> bool:
     Returns:
         True if line appears to be part of signature
     """
-    signature_indicators = [
-        'sent from my',
-        'get outlook for',
-        'on .* wrote:',
-        '^--$',
-        'best regards',
-        'sincerely',
-        'thank you',
-        'thanks',
-        r'^\s*$'  # Empty lines
-    ]
-    
-    line_lower = line.lower()
-    for indicator in signature_indicators:
-        if re.search(indicator, line_lower):
-            return True
-    
-    return False
\ No newline at end of file
+    return _SIGNATURE_RE.search(line.lower()) is not None
@@ -0,0 +1,66 @@
+"""
+Shared HTTP client for outbound API calls.
+
+OpenAI (scripts and TTS) and storage downloads all go through one pooled
+httpx.AsyncClient, so kept-alive connections and TLS sessions are reused
+across the whole pipeline instead of each module opening its own.
+
+Pooled connections belong to the event loop that opened them, so the client
+is created lazily for each running loop. Scripts that call asyncio.run more
+than once get a fresh pool per run instead of connections from a closed loop.
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_openai_clients: Dict[asyncio.AbstractEventLoop, AsyncOpenAI] = {}
+
+
+def _forget_closed_loops() -> None:
+    """Drop clients whose event loop has finished"""
+    for loop in [loop for loop in _clients if loop.is_closed()]:
+        del _clients[loop]
+        _openai_clients.pop(loop, None)
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Pooled HTTP client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        _forget_closed_loops()
+        client = _clients[loop] = httpx.AsyncClient(
+            http2=True,
+            timeout=60,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+        )
+        _openai_clients.pop(loop, None)
+    return client
+
+
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    """OpenAI client on the running loop's shared pool, or None without OPENAI_API_KEY"""
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+
+    http_client = get_shared_client()
+    loop = asyncio.get_running_loop()
+    client = _openai_clients.get(loop)
+    if client is None:
+        client = _openai_clients[loop] = AsyncOpenAI(api_key=api_key, http_client=http_client)
+    return client
+
+
+async def close_shared_client() -> None:
+    """Close the running loop's pooled connections (called on application shutdown)"""
+    loop = asyncio.get_running_loop()
+    _openai_clients.pop(loop, None)
+    client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -9,6 +9,7 @@ from typing import Dict, Any, List
 from app.monitoring import setup_logging, setup_sentry, metrics, check_system_health, check_dependencies, log_request_metrics
 from app.video_generator import process_email, process_email_batch, health_check_pipeline
 from app.email_parser import parse_email
+from app.http import close_shared_client, get_shared_client
 import uuid
 
 
@@ -27,10 +28,14 @@ async def lifespan(app: FastAPI):
     # Initialize metrics
     metrics.increment('app_starts')
     
+    # Open the pooled HTTP client on the server's event loop
+    get_shared_client()
+    
     yield
     
     # Shutdown
     logger.info("application_shutting_down")
+    await close_shared_client()
 
 
 app = FastAPI(
@@ -1,8 +1,13 @@
+import datetime
+import json
 import logging
 import os
 import time
 from typing import Dict, Any
-from pythonjsonlogger import jsonlogger
+try:
+    import orjson
+except ImportError:
+    orjson = None
 try:
     import sentry_sdk
 except ImportError:
@@ -15,6 +20,35 @@ else:
     AsyncioIntegration = None
 
 
+def _json_default(obj: Any) -> str:
+    """Render values JSON can't encode: ISO 8601 for dates and times (as orjson does), str() otherwise"""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def json_dumps(obj: Any, default=None, cls=None, ensure_ascii: bool = True, **kwargs) -> str:
+    """
+    Serialize a log record (or any payload) to a JSON string.
+    
+    Uses orjson when installed, which encodes email/webhook payloads several
+    times faster than the stdlib; falls back to json.dumps otherwise, passing
+    through the encoder class and options the caller (e.g. JsonFormatter)
+    supplies. orjson always emits UTF-8, so callers wanting identical output
+    from both paths pass ensure_ascii=False. Non-serializable values are
+    rendered by _json_default unless the caller supplies its own encoder.
+    """
+    if orjson:
+        return orjson.dumps(
+            obj,
+            default=default or _json_default,
+            option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+    if default is None and cls is None:
+        default = _json_default
+    return json.dumps(obj, default=default, cls=cls, ensure_ascii=ensure_ascii, **kwargs)
+
+
 def setup_logging():
     """
     Configure structured logging with JSON format for production.
@@ -27,10 +61,14 @@ def setup_logging():
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
     
-    # Create JSON formatter
+    from pythonjsonlogger import jsonlogger
+    
+    # Create JSON formatter (UTF-8 output, as orjson always produces)
     formatter = jsonlogger.JsonFormatter(
         '%(asctime)s %(name)s %(levelname)s %(message)s',
-        timestamp=True
+        timestamp=True,
+        json_serializer=json_dumps,
+        json_ensure_ascii=False
     )
     
     # Console handler
@@ -1,29 +1,87 @@
 import asyncio
+import hashlib
 import logging
-import re
-from typing import Dict, Any
-from openai import AsyncOpenAI
+import random
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from openai import AsyncOpenAI, RateLimitError
 import os
 
+from app.http import get_openai_client
+
 logger = logging.getLogger(__name__)
 
 # Initialize OpenAI client (optional for testing)
+# Left unset, each event loop gets a client on the shared pooled HTTP/2
+# client (see app.http) instead of paying a TLS handshake per request.
+# Tests and scripts may assign an explicit client here.
 openai_client = None
-if os.getenv('OPENAI_API_KEY'):
-    openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+SCRIPT_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are a TikTok content creator. Create engaging, short scripts that sound natural when spoken. Keep it under 150 characters."
+
+# User prompt, stripped once at import; create_script_prompt only fills in
+# the email fields
+SCRIPT_PROMPT_TEMPLATE = """
+Transform this email into a funny, catchy TikTok-style script:
+
+From: {from_sender}
+Subject: {subject}
+Content: {body}
+
+Craft a snappy, hilarious script that:
+
+Sounds like your cool friend talking
+Stays under 150 characters
+Nails the email's vibe
+Drips with witty, conversational sass
+
+Example: "Your boss just yeeted an urgent Q4 meeting at you. Time to chug coffee and fake it, or actually prep?"😅"
+""".strip()
+
+# Generated scripts keyed by a hash of the model and full prompt, so duplicate
+# emails (newsletters, notifications, retries) skip the OpenAI call. Editing
+# the prompt changes the key, so stale entries are never served.
+SCRIPT_CACHE_SIZE = int(os.getenv('SCRIPT_CACHE_SIZE', '10000'))
+_script_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _script_cache_key(prompt: str) -> str:
+    """Cache key for a script prompt"""
+    return hashlib.sha256(f"{SCRIPT_MODEL}|{SYSTEM_PROMPT}|{prompt}".encode()).hexdigest()
+
+
+# Retry backoff: capped exponential plus jitter so batched retries spread out
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+# Ceiling on a server-sent Retry-After, so one large header can't stall the
+# webhook pipeline on every attempt
+RETRY_AFTER_MAX_DELAY = 5.0
 
 
 class ScriptGenerationError(Exception):
     """Exception raised when script generation fails"""
-    pass
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
-async def generate_script(email_data: Dict[str, Any]) -> str:
+def _retry_after(error: RateLimitError) -> Optional[float]:
+    """Seconds the server asked us to wait, from the Retry-After header"""
+    try:
+        return float(error.response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+async def generate_script(email_data: Dict[str, Any], client: Optional[AsyncOpenAI] = None) -> str:
     """
     Generate a TikTok-style script from email data.
     
     Args:
         email_data: Parsed email data
+        client: Optional OpenAI client (defaults to the shared module client)
         
     Returns:
         Generated script (max 150 characters)
@@ -42,17 +100,22 @@ async def generate_script(email_data: Dict[str, Any]) -> str:
         # Create prompt for OpenAI
         prompt = create_script_prompt(email_data)
         
+        cache_key = _script_cache_key(prompt)
+        cached = _script_cache.get(cache_key)
+        if cached is not None:
+            _script_cache.move_to_end(cache_key)
+            logger.info(f"Using cached script for email {email_data.get('id')}")
+            return cached
+        
         # Call OpenAI API
-        if not openai_client:
+        client = client or openai_client or get_openai_client()
+        if not client:
             raise ScriptGenerationError("OpenAI client not configured")
             
-        response = await openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await client.chat.completions.create(
+            model=SCRIPT_MODEL,
             messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a TikTok content creator. Create engaging, short scripts that sound natural when spoken. Keep it under 150 characters."
-                },
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=50,
@@ -67,25 +130,34 @@ async def generate_script(email_data: Dict[str, Any]) -> str:
         if not validate_script(script):
             raise ScriptGenerationError("Generated script failed validation")
         
+        _script_cache[cache_key] = script
+        if len(_script_cache) > SCRIPT_CACHE_SIZE:
+            _script_cache.popitem(last=False)
+        
         logger.info(f"Generated script for email {email_data.get('id')}: {len(script)} chars")
         return script
         
     except ScriptGenerationError:
         raise
+    except RateLimitError as e:
+        # Transient: let generate_script_with_retry back off and try again
+        raise ScriptGenerationError(f"OpenAI rate limited: {e}", retry_after=_retry_after(e)) from e
     except Exception as e:
         logger.warning(f"OpenAI script generation failed for {email_data.get('id')}: {e}")
         # Return fallback script
-        fallback = f"New email from {email_data.get('from', 'someone')}: {email_data.get('subject', '')}"
-        return fallback[:150]
+        return fallback_script(email_data)
 
 
-async def generate_script_with_retry(email_data: Dict[str, Any], max_retries: int = 3) -> str:
+async def generate_script_with_retry(email_data: Dict[str, Any], max_retries: int = 3,
+                                     client: Optional[AsyncOpenAI] = None) -> str:
     """
-    Generate script with exponential backoff retry.
+    Generate script with capped exponential backoff and jitter, honoring
+    Retry-After on rate limits.
     
     Args:
         email_data: Parsed email data
         max_retries: Maximum number of retry attempts
+        client: Optional OpenAI client (defaults to the shared module client)
         
     Returns:
         Generated script
@@ -94,22 +166,38 @@ async def generate_script_with_retry(email_data: Dict[str, Any], max_retries: in
     
     for attempt in range(max_retries):
         try:
-            script = await generate_script(email_data)
+            script = await generate_script(email_data, client=client)
             logger.info(f"Script generated successfully on attempt {attempt + 1}")
             return script
             
         except ScriptGenerationError as e:
             last_error = e
             if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # Exponential backoff
-                logger.warning(f"Script generation failed (attempt {attempt + 1}), retrying in {wait_time}s: {e}")
+                if e.retry_after is not None:
+                    wait_time = min(e.retry_after, RETRY_AFTER_MAX_DELAY)
+                else:
+                    wait_time = min(RETRY_BASE_DELAY * 2 ** attempt, RETRY_MAX_DELAY) + random.uniform(0, RETRY_BASE_DELAY)
+                logger.warning(f"Script generation failed (attempt {attempt + 1}), retrying in {wait_time:.2f}s: {e}")
                 await asyncio.sleep(wait_time)
             else:
                 logger.error(f"Script generation failed after {max_retries} attempts: {e}")
     
     # All retries failed, return fallback
-    fallback = f"New email from {email_data.get('from', 'someone')}: {email_data.get('subject', '')}"
     logger.info(f"Using fallback script after all retries failed for {email_data.get('id')}")
+    return fallback_script(email_data)
+
+
+def fallback_script(email_data: Dict[str, Any]) -> str:
+    """
+    Script used when OpenAI generation fails.
+    
+    Args:
+        email_data: Parsed email data
+        
+    Returns:
+        Fallback script (max 150 characters)
+    """
+    fallback = f"New email from {email_data.get('from', 'someone')}: {email_data.get('subject', '')}"
     return fallback[:150]
 
 
@@ -123,28 +211,11 @@ def create_script_prompt(email_data: Dict[str, Any]) -> str:
     Returns:
         Formatted prompt
     """
-    from_sender = email_data.get('from', 'Unknown')
-    subject = email_data.get('subject', 'No subject')
-    body = email_data.get('body', '')[:200]  # Limit body for prompt
-    
-    prompt = f"""
-Transform this email into a funny, catchy TikTok-style script:
-
-From: {from_sender}
-Subject: {subject}
-Content: {body}
-
-Craft a snappy, hilarious script that:
-
-Sounds like your cool friend talking
-Stays under 150 characters
-Nails the email's vibe
-Drips with witty, conversational sass
-
-Example: "Your boss just yeeted an urgent Q4 meeting at you. Time to chug coffee and fake it, or actually prep?"😅"
-"""
-    
-    return prompt.strip()
+    return SCRIPT_PROMPT_TEMPLATE.format(
+        from_sender=email_data.get('from', 'Unknown'),
+        subject=email_data.get('subject', 'No subject'),
+        body=email_data.get('body', '')[:200]  # Limit body for prompt
+    )
 
 
 def validate_script(script: str) -> bool:
@@ -157,16 +228,8 @@ def validate_script(script: str) -> bool:
     Returns:
         True if script is valid
     """
-    if not script:
-        return False
-    
-    if len(script) > 150:
-        return False
-    
-    if len(script.strip()) < 5:  # Too short
-        return False
-    
-    return True
+    # Present, at most 150 characters, and not too short once trimmed
+    return type(script) is str and len(script) <= 150 and len(script.strip()) >= 5
 
 
 def clean_script(script: str) -> str:
@@ -187,8 +250,8 @@ def clean_script(script: str) -> str:
     if script.startswith('"') and script.endswith('"'):
         script = script[1:-1]
     
-    # Normalize whitespace
-    script = re.sub(r'\s+', ' ', script).strip()
+    # Normalize whitespace (str.split collapses runs and trims the ends)
+    script = ' '.join(script.split())
     
     # Truncate if too long
     if len(script) > 150:
@@ -6,13 +6,20 @@ Supports both Supabase Storage and local file system fallback.
 import os
 import logging
 import shutil
-from typing import Optional
+from typing import Optional, Union
+
+import aiofiles
+
+from app.http import get_shared_client
 
 logger = logging.getLogger(__name__)
 
 # Base directory for assets
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "..", "assets")
 
+# Chunk size for streamed downloads
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 # Load environment variables from .env file
 from dotenv import load_dotenv
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
@@ -32,6 +39,85 @@ except Exception as e:
     logger.warning(f"Failed to initialize Supabase storage: {e}")
 
 
+def _upload_to_supabase(data: Union[bytes, str], destination: str) -> Optional[str]:
+    """
+    Upload raw data to the Supabase Storage videos bucket.
+    
+    Args:
+        data: File contents (bytes, or str encoded as UTF-8)
+        destination: Destination path within storage bucket
+        
+    Returns:
+        Public URL, or None if the upload failed
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    
+    # Upload to Supabase Storage (videos bucket)
+    result = supabase_storage.storage.from_('videos').upload(destination, data)
+    
+    if result:
+        # Get public URL
+        public_url = supabase_storage.storage.from_('videos').get_public_url(destination)
+        logger.info(f"Uploaded to Supabase Storage: {public_url}")
+        return public_url
+    
+    logger.warning("Supabase upload failed, falling back to local")
+    return None
+
+
+def _supabase_object_path(url: str) -> str:
+    """
+    Extract the object path within the videos bucket from a Supabase Storage URL.
+    
+    Args:
+        url: Supabase Storage public URL
+        
+    Returns:
+        Object path within the bucket
+    """
+    # Remove query parameters
+    url_path = url.split('?')[0]
+    # Extract the path after /storage/v1/object/public/videos/
+    if '/storage/v1/object/public/videos/' in url_path:
+        return url_path.split('/storage/v1/object/public/videos/')[1]
+    # Fallback: just get the filename
+    return url_path.split('/')[-1]
+
+
+async def upload_bytes_to_storage(data: Union[bytes, str], destination: str) -> str:
+    """
+    Upload in-memory data to Supabase Storage or fallback to local storage.
+    
+    Args:
+        data: File contents
+        destination: Destination path within storage bucket
+        
+    Returns:
+        URL/path to the uploaded file
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    
+    try:
+        if supabase_storage:
+            public_url = _upload_to_supabase(data, destination)
+            if public_url:
+                return public_url
+    except Exception as e:
+        logger.error(f"Failed to upload bytes to {destination}: {e}")
+    
+    # Fallback to local storage
+    dest_path = os.path.join(ASSETS_DIR, destination)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    
+    with open(dest_path, 'wb') as f:
+        f.write(data)
+    
+    logger.info(f"Uploaded locally: {dest_path}")
+    return dest_path
+
+
 async def upload_to_storage(file_path: str, destination: str) -> str:
     """
     Upload file to Supabase Storage or fallback to local storage.
@@ -49,16 +135,9 @@ async def upload_to_storage(file_path: str, destination: str) -> str:
             with open(file_path, 'rb') as f:
                 file_data = f.read()
             
-            # Upload to Supabase Storage (videos bucket)
-            result = supabase_storage.storage.from_('videos').upload(destination, file_data)
-            
-            if result:
-                # Get public URL
-                public_url = supabase_storage.storage.from_('videos').get_public_url(destination)
-                logger.info(f"Uploaded to Supabase Storage: {public_url}")
+            public_url = _upload_to_supabase(file_data, destination)
+            if public_url:
                 return public_url
-            else:
-                logger.warning("Supabase upload failed, falling back to local")
         
         # Fallback to local storage
         dest_dir = os.path.dirname(os.path.join(ASSETS_DIR, destination))
@@ -79,6 +158,21 @@ async def upload_to_storage(file_path: str, destination: str) -> str:
         return dest_path
 
 
+async def _stream_to_file(url: str, dest_path: str) -> None:
+    """
+    Stream a URL to a local file without buffering the whole body in memory.
+    
+    Args:
+        url: HTTP(S) URL to download
+        dest_path: Local file path to write
+    """
+    async with get_shared_client().stream('GET', url) as response:
+        response.raise_for_status()
+        async with aiofiles.open(dest_path, 'wb') as f:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+
+
 async def download_from_storage(url_or_path: str) -> str:
     """
     Download file from Supabase Storage or return local path.
@@ -97,22 +191,19 @@ async def download_from_storage(url_or_path: str) -> str:
         # If it's a Supabase Storage URL, download it
         if url_or_path.startswith("http") and "supabase" in url_or_path and supabase_storage:
             try:
-                # Extract file path from URL, removing query parameters
-                url_path = url_or_path.split('?')[0]  # Remove query parameters
-                # Extract the path after /storage/v1/object/public/videos/
-                if '/storage/v1/object/public/videos/' in url_path:
-                    file_path = url_path.split('/storage/v1/object/public/videos/')[1]
-                else:
-                    # Fallback: just get the filename
-                    file_path = url_path.split('/')[-1]
+                file_path = _supabase_object_path(url_or_path)
                 
                 temp_path = f"/tmp/{file_path.replace('/', '_')}"
                 
-                # Download file from Supabase Storage
-                file_data = supabase_storage.storage.from_('videos').download(file_path)
-                
-                with open(temp_path, 'wb') as f:
-                    f.write(file_data)
+                if '/storage/v1/object/public/' in url_or_path:
+                    # Public object: stream straight to disk in chunks
+                    await _stream_to_file(url_or_path, temp_path)
+                else:
+                    # Download file from Supabase Storage
+                    file_data = supabase_storage.storage.from_('videos').download(file_path)
+                    
+                    async with aiofiles.open(temp_path, 'wb') as f:
+                        await f.write(file_data)
                 
                 logger.info(f"Downloaded from Supabase: {temp_path}")
                 return temp_path
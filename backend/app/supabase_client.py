@@ -1,8 +1,10 @@
 """
 Supabase configuration and database operations for BuzzBrief
 """
+import asyncio
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 from supabase import create_client, Client
 from datetime import datetime
@@ -12,10 +14,29 @@ logger = logging.getLogger(__name__)
 # Initialize Supabase client
 supabase: Optional[Client] = None
 
-def initialize_supabase():
-    """Initialize Supabase client with environment variables"""
+# supabase-py is synchronous; run its HTTP calls on a dedicated pool so they
+# don't block the event loop (the GIL is released while waiting on sockets)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="supabase")
+
+# Columns of the email_videos view that get_recent_videos actually returns
+RECENT_VIDEO_COLUMNS = (
+    'email_uuid, email_id, from_sender, subject, body, '
+    'video_uuid, video_id, script, tts_voice, background_video, '
+    'video_url, thumbnail_url, status, video_created_at'
+)
+
+def initialize_supabase(force: bool = False):
+    """
+    Initialize Supabase client with environment variables
+    
+    The client is a process-wide singleton: repeated calls reuse the existing
+    connection pool unless force=True.
+    """
     global supabase
     
+    if supabase is not None and not force:
+        return True
+    
     try:
         supabase_url = os.getenv('SUPABASE_URL')
         supabase_key = os.getenv('SUPABASE_ANON_KEY')
@@ -37,6 +58,43 @@ def is_supabase_available() -> bool:
     """Check if Supabase is properly configured and available"""
     return supabase is not None
 
+async def _execute(query):
+    """Run a supabase-py query builder's blocking execute() off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, query.execute)
+
+def _build_email_record(email_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map parsed email data onto the emails table columns"""
+    return {
+        'email_id': email_data.get('id', ''),
+        'from_sender': email_data.get('from', ''),
+        'subject': email_data.get('subject', ''),
+        'body': email_data.get('body', ''),
+        'raw_email_text': email_data.get('raw_text', ''),
+        'parsed_at': datetime.utcnow().isoformat()
+    }
+
+def _build_video_record(video_data: Dict[str, Any], email_uuid: Optional[str] = None) -> Dict[str, Any]:
+    """Map video data onto the videos table columns"""
+    return {
+        'video_id': video_data.get('video_id', ''),
+        'email_id': email_uuid,
+        'email_email_id': video_data.get('email_id', ''),
+        'script': video_data.get('script', ''),
+        'tts_voice': video_data.get('tts_voice', ''),
+        'background_video': video_data.get('background_video', ''),
+        'video_url': video_data.get('video_url', ''),
+        'thumbnail_url': video_data.get('thumbnail_url', ''),
+        'audio_url': video_data.get('audio_url', ''),
+        'subtitle_url': video_data.get('subtitle_url', ''),
+        'duration_seconds': video_data.get('duration_seconds'),
+        'file_size_bytes': video_data.get('file_size_bytes'),
+        'width': video_data.get('width', 1080),
+        'height': video_data.get('height', 1920),
+        'status': video_data.get('status', 'completed'),
+        'processing_completed_at': datetime.utcnow().isoformat()
+    }
+
 # Email operations
 async def save_email(email_data: Dict[str, Any]) -> Optional[str]:
     """
@@ -53,16 +111,9 @@ async def save_email(email_data: Dict[str, Any]) -> Optional[str]:
         return None
         
     try:
-        email_record = {
-            'email_id': email_data.get('id', ''),
-            'from_sender': email_data.get('from', ''),
-            'subject': email_data.get('subject', ''),
-            'body': email_data.get('body', ''),
-            'raw_email_text': email_data.get('raw_text', ''),
-            'parsed_at': datetime.utcnow().isoformat()
-        }
+        email_record = _build_email_record(email_data)
         
-        result = supabase.table('emails').insert(email_record).execute()
+        result = await _execute(supabase.table('emails').insert(email_record))
         
         if result.data:
             email_uuid = result.data[0]['id']
@@ -76,6 +127,42 @@ async def save_email(email_data: Dict[str, Any]) -> Optional[str]:
         logger.error(f"Error saving email to Supabase: {e}")
         return None
 
+async def save_email_with_videos(email_data: Dict[str, Any], videos: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Save an email and its videos in a single round-trip
+    
+    Calls the create_email_with_videos RPC (see SUPABASE_SETUP.md),
+    which inserts the email and all videos in one transaction.
+    
+    Args:
+        email_data: Dictionary containing email information
+        videos: List of video data dictionaries for this email
+        
+    Returns:
+        UUID of the saved email record, or None if failed
+    """
+    if not is_supabase_available():
+        logger.warning("Supabase not available, skipping email and video save")
+        return None
+        
+    try:
+        result = await _execute(supabase.rpc('create_email_with_videos', {
+            'p_email': _build_email_record(email_data),
+            'p_videos': [_build_video_record(video) for video in videos]
+        }))
+        
+        if result.data:
+            email_uuid = result.data
+            logger.info(f"Email saved to Supabase with {len(videos)} videos: {email_uuid}")
+            return email_uuid
+        else:
+            logger.error("Failed to save email with videos to Supabase")
+            return None
+            
+    except Exception as e:
+        logger.error(f"Error saving email with videos to Supabase: {e}")
+        return None
+
 async def get_email_by_id(email_id: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve email by email_id
@@ -90,7 +177,7 @@ async def get_email_by_id(email_id: str) -> Optional[Dict[str, Any]]:
         return None
         
     try:
-        result = supabase.table('emails').select('*').eq('email_id', email_id).execute()
+        result = await _execute(supabase.table('emails').select('*').eq('email_id', email_id))
         
         if result.data:
             return result.data[0]
@@ -117,26 +204,9 @@ async def save_video(video_data: Dict[str, Any], email_uuid: Optional[str] = Non
         return None
         
     try:
-        video_record = {
-            'video_id': video_data.get('video_id', ''),
-            'email_id': email_uuid,
-            'email_email_id': video_data.get('email_id', ''),
-            'script': video_data.get('script', ''),
-            'tts_voice': video_data.get('tts_voice', ''),
-            'background_video': video_data.get('background_video', ''),
-            'video_url': video_data.get('video_url', ''),
-            'thumbnail_url': video_data.get('thumbnail_url', ''),
-            'audio_url': video_data.get('audio_url', ''),
-            'subtitle_url': video_data.get('subtitle_url', ''),
-            'duration_seconds': video_data.get('duration_seconds'),
-            'file_size_bytes': video_data.get('file_size_bytes'),
-            'width': video_data.get('width', 1080),
-            'height': video_data.get('height', 1920),
-            'status': video_data.get('status', 'completed'),
-            'processing_completed_at': datetime.utcnow().isoformat()
-        }
+        video_record = _build_video_record(video_data, email_uuid)
         
-        result = supabase.table('videos').insert(video_record).execute()
+        result = await _execute(supabase.table('videos').insert(video_record))
         
         if result.data:
             video_uuid = result.data[0]['id']
@@ -173,7 +243,7 @@ async def update_video_status(video_id: str, status: str, error_message: Optiona
         elif status == 'failed' and error_message:
             update_data['error_message'] = error_message
             
-        supabase.table('videos').update(update_data).eq('video_id', video_id).execute()
+        await _execute(supabase.table('videos').update(update_data).eq('video_id', video_id))
         logger.info(f"Updated video {video_id} status to {status}")
         
     except Exception as e:
@@ -193,7 +263,7 @@ async def get_video_by_id(video_id: str) -> Optional[Dict[str, Any]]:
         return None
         
     try:
-        result = supabase.table('videos').select('*').eq('video_id', video_id).execute()
+        result = await _execute(supabase.table('videos').select('*').eq('video_id', video_id))
         
         if result.data:
             return result.data[0]
@@ -217,7 +287,7 @@ async def get_email_with_videos(email_id: str) -> Optional[Dict[str, Any]]:
         return None
         
     try:
-        result = supabase.table('email_videos').select('*').eq('email_id', email_id).execute()
+        result = await _execute(supabase.table('email_videos').select('*').eq('email_id', email_id))
         
         if result.data:
             # Group videos by email
@@ -277,31 +347,37 @@ async def get_recent_videos(limit: int = 10) -> List[Dict[str, Any]]:
         return []
         
     try:
-        result = supabase.table('email_videos').select('*').order('video_created_at', desc=True).limit(limit).execute()
+        # Filter out emails without videos server-side so the limit counts videos
+        result = await _execute(
+            supabase.table('email_videos')
+            .select(RECENT_VIDEO_COLUMNS)
+            .not_.is_('video_uuid', 'null')
+            .order('video_created_at', desc=True)
+            .limit(limit)
+        )
         
         videos = []
         for row in result.data:
-            if row['video_uuid']:  # Only include rows that have video data
-                videos.append({
-                    'email': {
-                        'id': row['email_uuid'],
-                        'email_id': row['email_id'],
-                        'from_sender': row['from_sender'],
-                        'subject': row['subject'],
-                        'body': row['body']
-                    },
-                    'video': {
-                        'id': row['video_uuid'],
-                        'video_id': row['video_id'],
-                        'script': row['script'],
-                        'tts_voice': row['tts_voice'],
-                        'background_video': row['background_video'],
-                        'video_url': row['video_url'],
-                        'thumbnail_url': row['thumbnail_url'],
-                        'status': row['status'],
-                        'created_at': row['video_created_at']
-                    }
-                })
+            videos.append({
+                'email': {
+                    'id': row['email_uuid'],
+                    'email_id': row['email_id'],
+                    'from_sender': row['from_sender'],
+                    'subject': row['subject'],
+                    'body': row['body']
+                },
+                'video': {
+                    'id': row['video_uuid'],
+                    'video_id': row['video_id'],
+                    'script': row['script'],
+                    'tts_voice': row['tts_voice'],
+                    'background_video': row['background_video'],
+                    'video_url': row['video_url'],
+                    'thumbnail_url': row['thumbnail_url'],
+                    'status': row['status'],
+                    'created_at': row['video_created_at']
+                }
+            })
         
         return videos
         
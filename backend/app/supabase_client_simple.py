@@ -1,8 +1,10 @@
 """
 Simplified Supabase client for BuzzBrief
 """
+import asyncio
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 from supabase import create_client, Client
 from datetime import datetime
@@ -21,10 +23,22 @@ else:
 # Initialize Supabase client
 supabase: Optional[Client] = None
 
-def initialize_supabase():
-    """Initialize Supabase client with environment variables"""
+# supabase-py is synchronous; run its HTTP calls on a dedicated pool so they
+# don't block the event loop (the GIL is released while waiting on sockets)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="supabase")
+
+def initialize_supabase(force: bool = False):
+    """
+    Initialize Supabase client with environment variables
+    
+    The client is a process-wide singleton: repeated calls reuse the existing
+    connection pool unless force=True.
+    """
     global supabase
     
+    if supabase is not None and not force:
+        return True
+    
     try:
         supabase_url = os.getenv('SUPABASE_URL')
         supabase_key = os.getenv('SUPABASE_ANON_KEY')
@@ -46,6 +60,27 @@ def is_supabase_available() -> bool:
     """Check if Supabase is properly configured and available"""
     return supabase is not None
 
+async def _execute(query):
+    """Run a supabase-py query builder's blocking execute() off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, query.execute)
+
+def _build_email_record(email_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map parsed email data onto the emails table columns"""
+    return {
+        'email_id': email_data.get('id', ''),
+        'subject': email_data.get('subject', ''),
+        'body': email_data.get('body', '')
+    }
+
+def _build_video_record(video_data: Dict[str, Any], email_uuid: Optional[str] = None) -> Dict[str, Any]:
+    """Map video data onto the videos table columns"""
+    return {
+        'video_id': video_data.get('video_id', ''),
+        'email_id': email_uuid,
+        'video_url': video_data.get('video_url', '')
+    }
+
 # Email operations
 async def save_email(email_data: Dict[str, Any]) -> Optional[str]:
     """
@@ -62,13 +97,9 @@ async def save_email(email_data: Dict[str, Any]) -> Optional[str]:
         return None
         
     try:
-        email_record = {
-            'email_id': email_data.get('id', ''),
-            'subject': email_data.get('subject', ''),
-            'body': email_data.get('body', '')
-        }
+        email_record = _build_email_record(email_data)
         
-        result = supabase.table('emails').insert(email_record).execute()
+        result = await _execute(supabase.table('emails').insert(email_record))
         
         if result.data:
             email_uuid = result.data[0]['id']
@@ -82,6 +113,42 @@ async def save_email(email_data: Dict[str, Any]) -> Optional[str]:
         logger.error(f"Error saving email to Supabase: {e}")
         return None
 
+async def save_email_with_videos(email_data: Dict[str, Any], videos: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Save an email and its videos in a single round-trip
+    
+    Calls the create_email_with_videos RPC (see supabase_schema_simple.sql),
+    which inserts the email and all videos in one transaction.
+    
+    Args:
+        email_data: Dictionary containing email information
+        videos: List of video data dictionaries for this email
+        
+    Returns:
+        UUID of the saved email record, or None if failed
+    """
+    if not is_supabase_available():
+        logger.warning("Supabase not available, skipping email and video save")
+        return None
+        
+    try:
+        result = await _execute(supabase.rpc('create_email_with_videos', {
+            'p_email': _build_email_record(email_data),
+            'p_videos': [_build_video_record(video) for video in videos]
+        }))
+        
+        if result.data:
+            email_uuid = result.data
+            logger.info(f"Email saved to Supabase with {len(videos)} videos: {email_uuid}")
+            return email_uuid
+        else:
+            logger.error("Failed to save email with videos to Supabase")
+            return None
+            
+    except Exception as e:
+        logger.error(f"Error saving email with videos to Supabase: {e}")
+        return None
+
 async def get_email_by_id(email_id: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve email by email_id
@@ -96,7 +163,7 @@ async def get_email_by_id(email_id: str) -> Optional[Dict[str, Any]]:
         return None
         
     try:
-        result = supabase.table('emails').select('*').eq('email_id', email_id).execute()
+        result = await _execute(supabase.table('emails').select('*').eq('email_id', email_id))
         
         if result.data:
             return result.data[0]
@@ -123,13 +190,9 @@ async def save_video(video_data: Dict[str, Any], email_uuid: Optional[str] = Non
         return None
         
     try:
-        video_record = {
-            'video_id': video_data.get('video_id', ''),
-            'email_id': email_uuid,
-            'video_url': video_data.get('video_url', '')
-        }
+        video_record = _build_video_record(video_data, email_uuid)
         
-        result = supabase.table('videos').insert(video_record).execute()
+        result = await _execute(supabase.table('videos').insert(video_record))
         
         if result.data:
             video_uuid = result.data[0]['id']
@@ -143,6 +206,41 @@ async def save_video(video_data: Dict[str, Any], email_uuid: Optional[str] = Non
         logger.error(f"Error saving video to Supabase: {e}")
         return None
 
+async def save_videos_bulk(videos: List[Dict[str, Any]], email_uuid: Optional[str] = None) -> List[str]:
+    """
+    Save multiple videos to Supabase videos table in a single request
+    
+    Args:
+        videos: List of video data dictionaries
+        email_uuid: UUID of the associated email record
+        
+    Returns:
+        UUIDs of the saved video records (empty list if failed)
+    """
+    if not is_supabase_available():
+        logger.warning("Supabase not available, skipping bulk video save")
+        return []
+    
+    if not videos:
+        return []
+        
+    try:
+        video_records = [_build_video_record(video, email_uuid) for video in videos]
+        
+        result = await _execute(supabase.table('videos').insert(video_records))
+        
+        if result.data:
+            video_uuids = [row['id'] for row in result.data]
+            logger.info(f"Saved {len(video_uuids)} videos to Supabase in one request")
+            return video_uuids
+        else:
+            logger.error("Failed to bulk save videos to Supabase")
+            return []
+            
+    except Exception as e:
+        logger.error(f"Error bulk saving videos to Supabase: {e}")
+        return []
+
 async def get_video_by_id(video_id: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve video by video_id
@@ -157,7 +255,7 @@ async def get_video_by_id(video_id: str) -> Optional[Dict[str, Any]]:
         return None
         
     try:
-        result = supabase.table('videos').select('*').eq('video_id', video_id).execute()
+        result = await _execute(supabase.table('videos').select('*').eq('video_id', video_id))
         
         if result.data:
             return result.data[0]
@@ -182,7 +280,7 @@ async def get_email_with_videos(email_id: str) -> Optional[Dict[str, Any]]:
         
     try:
         # Get email
-        email_result = supabase.table('emails').select('*').eq('email_id', email_id).execute()
+        email_result = await _execute(supabase.table('emails').select('*').eq('email_id', email_id))
         
         if not email_result.data:
             return None
@@ -190,7 +288,7 @@ async def get_email_with_videos(email_id: str) -> Optional[Dict[str, Any]]:
         email_data = email_result.data[0]
         
         # Get videos for this email
-        videos_result = supabase.table('videos').select('*').eq('email_id', email_data['id']).execute()
+        videos_result = await _execute(supabase.table('videos').select('*').eq('email_id', email_data['id']))
         
         videos = videos_result.data if videos_result.data else []
         
@@ -215,23 +313,27 @@ async def get_recent_videos(limit: int = 10) -> List[Dict[str, Any]]:
         return []
         
     try:
-        # Get recent videos with email data
-        result = supabase.table('videos').select('*, emails(*)').order('created_at', desc=True).limit(limit).execute()
-        
-        videos = []
-        for row in result.data:
-            if row['emails']:  # Only include videos that have email data
-                videos.append({
-                    'email': row['emails'],
-                    'video': {
-                        'id': row['id'],
-                        'video_id': row['video_id'],
-                        'video_url': row['video_url'],
-                        'created_at': row['created_at']
-                    }
-                })
-        
-        return videos
+        # One joined query: the inner embed drops videos without an email
+        # server-side and only the listed columns come back
+        result = await _execute(
+            supabase.table('videos')
+            .select('id, video_id, video_url, created_at, emails!inner(id, email_id, subject, created_at)')
+            .order('created_at', desc=True)
+            .limit(limit)
+        )
+        
+        return [
+            {
+                'email': row['emails'],
+                'video': {
+                    'id': row['id'],
+                    'video_id': row['video_id'],
+                    'video_url': row['video_url'],
+                    'created_at': row['created_at']
+                }
+            }
+            for row in result.data
+        ]
         
     except Exception as e:
         logger.error(f"Error retrieving recent videos: {e}")
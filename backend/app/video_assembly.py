@@ -1,4 +1,6 @@
 import asyncio
+import functools
+import io
 import logging
 import os
 import random
@@ -6,19 +8,34 @@ import tempfile
 import time
 import uuid
 import re
-from typing import Dict, Any, List, Tuple
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
 import ffmpeg
 from openai import AsyncOpenAI
+try:
+    import av
+except ImportError:
+    av = None
+
+from app.http import get_openai_client
 
 logger = logging.getLogger(__name__)
 
 # Initialize OpenAI client (optional for testing)
+# Left unset, TTS calls use the running loop's client on the shared pooled
+# HTTP/2 client (see app.http), so back-to-back generate_audio calls reuse
+# kept-alive connections. Tests and scripts may assign an explicit client here.
 openai_client = None
-if os.getenv('OPENAI_API_KEY'):
-    openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+
+def _get_openai_client() -> Optional[AsyncOpenAI]:
+    """The explicitly assigned OpenAI client, or the running loop's shared one"""
+    return openai_client or get_openai_client()
 
 # Import storage functions
-from app.storage import upload_to_storage, download_from_storage
+from app.storage import upload_to_storage, upload_bytes_to_storage, download_from_storage
 from app.video_config import (
     get_background_video as config_get_background_video,
     get_background_music,
@@ -26,6 +43,64 @@ from app.video_config import (
     get_background_music_config
 )
 
+# ffmpeg.run blocks until the encoder exits; run encodes on a bounded pool so
+# they don't stall the event loop. libx264 already spreads one encode across
+# cores, so by default only half as many encodes run at once as there are CPUs.
+FFMPEG_MAX_WORKERS = int(os.getenv('FFMPEG_MAX_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+_ffmpeg_executor = ThreadPoolExecutor(max_workers=FFMPEG_MAX_WORKERS, thread_name_prefix="ffmpeg")
+
+
+async def _run_ffmpeg(run, *args, **kwargs):
+    """Call a blocking ffmpeg run function on the ffmpeg pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_ffmpeg_executor, functools.partial(run, *args, **kwargs))
+
+
+# H.264 encoders in order of preference: fixed-function hardware encoders are
+# several times faster than libx264 at a similar bitrate.
+H264_ENCODERS: Dict[str, Dict[str, Any]] = {
+    'h264_nvenc': {'preset': 'p4'},
+    'h264_qsv': {'preset': 'faster'},
+    'h264_videotoolbox': {'allow_sw': 1},
+    'libx264': {},
+}
+
+
+def _detect_encoder() -> str:
+    """
+    Pick the first H.264 encoder that can actually encode on this host.
+    
+    ffmpeg lists hardware encoders it was built with even when the GPU or
+    driver is missing, so each candidate encodes a single test frame with the
+    same options the real encode will use.
+    """
+    for encoder, options in list(H264_ENCODERS.items())[:-1]:
+        option_args = [arg for name, value in options.items() for arg in (f'-{name}', str(value))]
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-loglevel', 'error',
+                 '-f', 'lavfi', '-i', 'color=size=256x256', '-frames:v', '1',
+                 '-c:v', encoder, *option_args, '-f', 'null', '-'],
+                capture_output=True, timeout=10
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            break
+        if result.returncode == 0:
+            return encoder
+    return 'libx264'
+
+
+@functools.lru_cache(maxsize=None)
+def get_video_encoder() -> str:
+    """
+    H.264 encoder for video assembly, detected on first use and then cached.
+    
+    Set FFMPEG_VCODEC to skip detection.
+    """
+    encoder = os.getenv('FFMPEG_VCODEC') or _detect_encoder()
+    logger.info(f"Using H.264 encoder: {encoder}")
+    return encoder
+
 
 class VideoAssemblyError(Exception):
     """Exception raised when video assembly fails"""
@@ -149,58 +224,172 @@ def format_srt_time(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
 
 
-async def generate_audio(script: str) -> str:
+# How long the TTS batcher waits to collect concurrent requests (milliseconds)
+TTS_BATCH_WINDOW_MS = float(os.getenv('TTS_BATCH_WINDOW_MS', '20'))
+
+
+class TTSBatcher:
+    """
+    Collects TTS requests arriving within a short window and sends them
+    concurrently on the shared OpenAI client.
+
+    Callers await submit(); the first request in a window schedules a flush,
+    later requests in the same window join it.
+    """
+
+    def __init__(self, window_ms: float = TTS_BATCH_WINDOW_MS):
+        self.window = window_ms / 1000
+        self._pending: List[Tuple[str, str, bool, asyncio.Future]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # The loop only keeps weak references to tasks; hold flushes until done
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, text: str, voice: str, upload: bool = True) -> str:
+        """
+        Queue a TTS request and wait for its audio URL.
+
+        Args:
+            text: Text to convert to audio
+            voice: TTS voice
+            upload: Upload the audio to storage (see generate_audio)
+
+        Returns:
+            URL of generated audio file, or its local path if not uploaded
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Requests queued on a previous (closed) loop can never complete
+            self._loop = loop
+            self._pending = []
+            self._flush_tasks = set()
+
+        future = loop.create_future()
+        self._pending.append((text, voice, upload, future))
+        if len(self._pending) == 1:
+            task = loop.create_task(self._flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_done)
+        return await future
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        """Release a finished flush and log it if it failed."""
+        self._flush_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("TTS batch flush failed", exc_info=task.exception())
+
+    async def _flush(self) -> None:
+        """Wait for the batch window, then synthesize everything queued."""
+        await asyncio.sleep(self.window)
+        batch, self._pending = self._pending, []
+        logger.debug(f"Flushing TTS batch of {len(batch)} requests")
+
+        results = await asyncio.gather(
+            *[_synthesize_audio(text, voice, upload) for text, voice, upload, _ in batch],
+            return_exceptions=True
+        )
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+_tts_batcher = TTSBatcher()
+
+
+def _save_audio(content: bytes, suffix: str) -> Tuple[str, int]:
+    """
+    Write audio bytes to a new temporary file with a single unbuffered write.
+    
+    Args:
+        content: Audio data
+        suffix: File suffix (e.g. ".mp3")
+        
+    Returns:
+        (path, size) of the written file
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        os.write(fd, content)
+    finally:
+        os.close(fd)
+    return path, len(content)
+
+
+# Narration used when TTS is unavailable
+DEFAULT_AUDIO_PATH = "assets/default_audio.mp3"
+
+
+async def _synthesize_audio(script: str, voice: str, upload: bool = True) -> str:
+    """Run one TTS request and upload the resulting audio (or return its local path)."""
+    response = await _get_openai_client().audio.speech.create(
+        model="tts-1",
+        voice=voice,
+        input=script
+    )
+    
+    if not upload:
+        # Save audio to a temporary file for assembly (off the event loop;
+        # other TTS requests in the same batch are still in flight)
+        audio_path, _ = await asyncio.to_thread(_save_audio, response.content, ".mp3")
+        logger.info(f"Generated audio: {len(script)} chars -> {audio_path}")
+        return audio_path
+    
+    # Upload the in-memory audio directly, no temp file needed
+    audio_id = str(uuid.uuid4())
+    audio_url = await upload_bytes_to_storage(response.content, f"audio/{audio_id}.mp3")
+    
+    logger.info(f"Generated audio: {len(script)} chars -> {audio_url}")
+    return audio_url
+
+
+async def generate_audio(script: str, voice: Optional[str] = None, upload: bool = True) -> str:
     """
     Generate audio from script using OpenAI TTS.
     
+    Concurrent calls are micro-batched (see TTSBatcher).
+    
     Args:
         script: Text script to convert to audio
+        voice: Optional TTS voice (random voice if not given)
+        upload: Upload the audio to storage. Pass False when the audio is only
+            an input to assemble_video in the same process; the temp file path
+            is returned instead and assemble_video cleans it up.
         
     Returns:
-        URL of generated audio file
+        URL of generated audio file, or its local path if not uploaded
     """
     try:
         if not script or len(script.strip()) < 5:
             logger.warning("Empty or too short script, using fallback audio")
-            return "assets/default_audio.mp3"
+            return DEFAULT_AUDIO_PATH
         
         # Generate audio using OpenAI TTS
-        if not openai_client:
+        if not _get_openai_client():
             logger.warning("OpenAI client not configured, using fallback audio")
-            return "assets/default_audio.mp3"
+            return DEFAULT_AUDIO_PATH
         
         # Select random voice for variety
         available_voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
-        selected_voice = random.choice(available_voices)
+        selected_voice = voice or random.choice(available_voices)
         logger.info(f"Selected TTS voice: {selected_voice}")
         
         # Store the selected voice for later retrieval
         generate_audio.last_voice = selected_voice
-            
-        response = await openai_client.audio.speech.create(
-            model="tts-1",
-            voice=selected_voice,
-            input=script
-        )
         
-        # Save audio to temporary file
-        temp_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-        temp_file.write(response.content)
-        temp_file.close()
-        
-        # Upload to storage
-        audio_id = str(uuid.uuid4())
-        audio_url = await upload_to_storage(temp_file.name, f"audio/{audio_id}.mp3")
-        
-        # Cleanup temp file
-        os.unlink(temp_file.name)
-        
-        logger.info(f"Generated audio: {len(script)} chars -> {audio_url}")
-        return audio_url
+        return await _tts_batcher.submit(script, selected_voice, upload)
         
     except Exception as e:
         logger.error(f"Audio generation failed: {e}")
-        return "assets/default_audio.mp3"
+        return DEFAULT_AUDIO_PATH
+
+
+# The color background is identical for every video, so it is encoded once
+# and shared read-only by every later assembly instead of per email
+COLOR_BACKGROUND_PATH = os.path.join(tempfile.gettempdir(), "buzzbrief_color_background.mp4")
+_color_background_lock = threading.Lock()
 
 
 def create_color_background() -> str:
@@ -210,26 +399,58 @@ def create_color_background() -> str:
     Returns:
         Path to generated color background video
     """
-    try:
-        # Create a simple color background
-        temp_file = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
-        temp_file.close()
-        
-        # Generate a simple color background using FFmpeg
-        (
-            ffmpeg
-            .input('color=c=blue:size=1080x1920:duration=30', f='lavfi')
-            .output(temp_file.name, vcodec='libx264', pix_fmt='yuv420p', r=30, t=30)
-            .run(overwrite_output=True, quiet=True)
-        )
+    with _color_background_lock:
+        if os.path.exists(COLOR_BACKGROUND_PATH):
+            logger.debug(f"Reusing color background: {COLOR_BACKGROUND_PATH}")
+            return COLOR_BACKGROUND_PATH
         
-        logger.info(f"Created color background: {temp_file.name}")
-        return temp_file.name
-        
-    except Exception as e:
-        logger.error(f"Failed to create color background: {e}")
-        # Return a fallback path
-        return "assets/default_video.mp4"
+        try:
+            # Encode to a temp file and move it into place, so a failed encode
+            # never leaves a partial video behind for later calls to reuse
+            temp_file = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+            temp_file.close()
+            
+            # Generate a simple color background using FFmpeg
+            (
+                ffmpeg
+                .input('color=c=blue:size=1080x1920:duration=30', f='lavfi')
+                .output(temp_file.name, vcodec='libx264', pix_fmt='yuv420p', r=30, t=30)
+                .run(overwrite_output=True, quiet=True)
+            )
+            os.replace(temp_file.name, COLOR_BACKGROUND_PATH)
+            
+            logger.info(f"Created color background: {COLOR_BACKGROUND_PATH}")
+            return COLOR_BACKGROUND_PATH
+            
+        except Exception as e:
+            logger.error(f"Failed to create color background: {e}")
+            # Return a fallback path
+            return "assets/default_video.mp4"
+
+
+# Background videos by category, built once at import
+BACKGROUND_VIDEOS: Dict[str, Tuple[str, ...]] = {
+    "subway_surfers": (
+        #"gaming1.mp4",
+        #"gaming2.mp4",
+        #"gaming3.mp4",
+        #"gaming4.mp4",
+        "gaming5.mp4",
+    ),
+    #"minecraft": (
+    #    "minecraft_parkour_01.mp4",
+    #    "minecraft_building_01.mp4",
+    #    "minecraft_mining_01.mp4",
+    #),
+    #"satisfying": (
+    #    "slime_cutting_01.mp4",
+    #    "kinetic_sand_01.mp4",
+    #    "soap_cutting_01.mp4",
+    #),
+}
+ALL_BACKGROUND_VIDEOS: Tuple[str, ...] = tuple(
+    video for videos in BACKGROUND_VIDEOS.values() for video in videos
+)
 
 
 def get_background_video(category: str = None) -> str:
@@ -242,45 +463,35 @@ def get_background_video(category: str = None) -> str:
     Returns:
         Path to background video
     """
-    background_videos = {
-        
-        "subway_surfers": [
-            #"gaming1.mp4",
-            #"gaming2.mp4",
-            #"gaming3.mp4",
-            #"gaming4.mp4",
-            "gaming5.mp4"
-           
-        ]
-        
-    }
-    '''
-    
-    "minecraft": [
-        "minecraft_parkour_01.mp4",
-        "minecraft_building_01.mp4",
-        "minecraft_mining_01.mp4"
-    ],
-    "satisfying": [
-        "slime_cutting_01.mp4",
-        "kinetic_sand_01.mp4",
-        "soap_cutting_01.mp4"
-    ]'''
-    #}'''
-    
-    if category and category in background_videos:
-        video_list = background_videos[category]
-    else:
-        # Random category
-        all_videos = []
-        for videos in background_videos.values():
-            all_videos.extend(videos)
-        video_list = all_videos
+    video_list = BACKGROUND_VIDEOS.get(category) or ALL_BACKGROUND_VIDEOS
     
     selected_video = random.choice(video_list)
     return f"assets/backgrounds/{selected_video}"
 
 
+def select_background_video(email_content: str) -> Tuple[str, str]:
+    """
+    Pick the background video for an email, creating a color background
+    if the configured video is missing.
+    
+    Args:
+        email_content: Email subject and body for content-based selection
+        
+    Returns:
+        (configured video filename, path to the video to use)
+    """
+    background_path = config_get_background_video(email_content=email_content)
+    background_filename = os.path.basename(background_path)
+    
+    # Check if background video exists
+    if not os.path.exists(background_path):
+        logger.warning(f"Background video not found: {background_path}")
+        # Use a simple color background instead
+        background_path = create_color_background()
+    
+    return background_filename, background_path
+
+
 async def assemble_video(audio_url: str, email_data: Dict[str, Any], script: str = "") -> str:
     """
     Assemble final video with audio, background, text overlay, and subtitles.
@@ -299,28 +510,27 @@ async def assemble_video(audio_url: str, email_data: Dict[str, Any], script: str
     start_time = time.time()
     temp_files = []
     
+    # Local audio (TTS output that was never uploaded) is removed with the
+    # other temp files even if a later step fails; the bundled default is kept
+    if audio_url != DEFAULT_AUDIO_PATH and os.path.exists(audio_url):
+        temp_files.append(audio_url)
+    
     try:
         if not validate_video_inputs(audio_url, email_data):
             raise VideoAssemblyError("Invalid video inputs")
         
-        # Download audio file
-        audio_path = await download_from_storage(audio_url)
-        temp_files.append(audio_path)
-        
-        # Get background video using new configuration system
+        # Download audio and pick the background video concurrently
         email_content = f"{email_data.get('subject', '')} {email_data.get('body', '')}"
-        background_path = config_get_background_video(email_content=email_content)
+        audio_path, (background_filename, background_path) = await asyncio.gather(
+            download_from_storage(audio_url),
+            asyncio.to_thread(select_background_video, email_content)
+        )
+        if audio_path != audio_url:
+            temp_files.append(audio_path)
         
         # Store the background video filename for later retrieval
-        background_filename = os.path.basename(background_path)
         assemble_video.last_background_video = background_filename
         
-        # Check if background video exists
-        if not os.path.exists(background_path):
-            logger.warning(f"Background video not found: {background_path}")
-            # Use a simple color background instead
-            background_path = create_color_background()
-        
         # Create unique output path with timestamp
         email_id = email_data.get('id', str(uuid.uuid4()))
         timestamp = int(time.time() * 1000)  # Milliseconds for uniqueness
@@ -345,6 +555,10 @@ async def assemble_video(audio_url: str, email_data: Dict[str, Any], script: str
             if background_music_path:
                 logger.info(f"Using background music: {background_music_path}")
         
+        # Probe for a hardware encoder off the event loop (only the first
+        # video pays for it; the result is cached)
+        await _run_ffmpeg(get_video_encoder)
+        
         # Create FFmpeg command with subtitles and background music
         command = create_ffmpeg_command(
             audio_path=audio_path,
@@ -359,19 +573,20 @@ async def assemble_video(audio_url: str, email_data: Dict[str, Any], script: str
         # Run FFmpeg
         logger.info(f"Starting video assembly for {video_id}")
         try:
-            ffmpeg.run(command, overwrite_output=True, quiet=True, capture_stdout=True, capture_stderr=True)
+            await _run_ffmpeg(ffmpeg.run, command, overwrite_output=True, quiet=True, capture_stdout=True, capture_stderr=True)
         except ffmpeg.Error as e:
             logger.error(f"FFmpeg error: {e}")
             logger.error(f"FFmpeg stderr: {e.stderr.decode()}")
             raise VideoAssemblyError(f"FFmpeg failed: {e.stderr.decode()}")
         
-        # Upload final video with unique filename
+        # Generate thumbnail and upload final video concurrently; the thumbnail
+        # goes first so its frame extraction is already running in a thread
+        # while the upload proceeds
         final_video_filename = f"video_{video_id}.mp4"
-        video_url = await upload_to_storage(output_path, f"videos/{final_video_filename}")
-        
-        # Generate thumbnail with unique filename
-        thumbnail_filename = f"thumb_{video_id}.jpg"
-        thumbnail_url = await generate_thumbnail(output_path, video_id)
+        thumbnail_url, video_url = await asyncio.gather(
+            generate_thumbnail(output_path, video_id),
+            upload_to_storage(output_path, f"videos/{final_video_filename}")
+        )
         
         duration_ms = (time.time() - start_time) * 1000
         logger.info(f"Video assembled in {duration_ms:.0f}ms: {video_url}")
@@ -386,8 +601,8 @@ async def assemble_video(audio_url: str, email_data: Dict[str, Any], script: str
         raise VideoAssemblyError(f"Failed to assemble video: {e}")
     
     finally:
-        # Cleanup temp files
-        cleanup_temp_files(temp_files)
+        # Cleanup temp files off the event loop
+        await asyncio.to_thread(cleanup_temp_files, temp_files)
 
 
 def create_ffmpeg_command(audio_path: str, background_path: str, output_path: str, 
@@ -465,13 +680,15 @@ def create_ffmpeg_command(audio_path: str, background_path: str, output_path: st
         )
     
     # Combine video and mixed audio
+    video_encoder = get_video_encoder()
     output = ffmpeg.output(
         video, audio,
         output_path,
-        vcodec='libx264',
+        vcodec=video_encoder,
         acodec='aac',
         r=specs['fps'],
-        t=duration
+        t=duration,
+        **H264_ENCODERS.get(video_encoder, {})
     )
     
     return output
@@ -496,6 +713,9 @@ def calculate_video_duration_from_audio(audio_path: str) -> float:
         return 30  # Default duration
 
 
+SECONDS_PER_WORD = 60 / 150
+
+
 def calculate_video_duration(script: str) -> float:
     """
     Calculate video duration based on script length.
@@ -508,10 +728,41 @@ def calculate_video_duration(script: str) -> float:
     """
     # Average reading speed: ~150 words per minute
     words = len(script.split())
-    duration = (words / 150) * 60
+    duration = words * SECONDS_PER_WORD
     return max(5, min(duration, 60))  # Between 5-60 seconds
 
 
+THUMBNAIL_TIME = 2.0  # Seconds into the video
+THUMBNAIL_JPEG_QUALITY = 85
+
+
+def _extract_thumbnail_jpeg(video_path: str, at_seconds: float = THUMBNAIL_TIME) -> bytes:
+    """
+    Decode one frame in-process with PyAV and encode it as JPEG.
+    
+    Args:
+        video_path: Path to video file
+        at_seconds: Time of the frame to grab (the last frame if the video is shorter)
+        
+    Returns:
+        JPEG bytes
+    """
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        container.seek(int(at_seconds * av.time_base))
+        
+        frame = None
+        for frame in container.decode(stream):
+            if frame.time is not None and frame.time >= at_seconds:
+                break
+        if frame is None:
+            raise VideoAssemblyError(f"No video frames in {video_path}")
+        
+        buffer = io.BytesIO()
+        frame.to_image().save(buffer, 'JPEG', quality=THUMBNAIL_JPEG_QUALITY)
+        return buffer.getvalue()
+
+
 async def generate_thumbnail(video_path: str, video_id: str) -> str:
     """
     Generate thumbnail from video.
@@ -524,14 +775,20 @@ async def generate_thumbnail(video_path: str, video_id: str) -> str:
         URL of generated thumbnail
     """
     try:
+        if av is not None:
+            # Decode in-process, skipping an ffmpeg process start per thumbnail
+            jpeg = await _run_ffmpeg(_extract_thumbnail_jpeg, video_path)
+            return await upload_bytes_to_storage(jpeg, f"thumbnails/{video_id}.jpg")
+        
         thumbnail_path = f"/tmp/thumb_{video_id}.jpg"
         
-        # Extract frame at 2 seconds
-        (
+        # Extract frame at 2 seconds (off the event loop)
+        await _run_ffmpeg(
             ffmpeg
-            .input(video_path, ss=2)
+            .input(video_path, ss=THUMBNAIL_TIME)
             .output(thumbnail_path, vframes=1, format='image2')
-            .run(overwrite_output=True, quiet=True)
+            .run,
+            overwrite_output=True, quiet=True
         )
         
         # Upload thumbnail
@@ -583,6 +840,23 @@ def get_video_specs() -> Dict[str, Any]:
     }
 
 
+# Below this many files the unlinks run inline; a thread pool only pays off
+# once there are enough syscalls to overlap
+CLEANUP_PARALLEL_THRESHOLD = 32
+CLEANUP_MAX_WORKERS = 8
+
+
+def _safe_unlink(file_path: str) -> None:
+    """Delete a file, ignoring files that are already gone"""
+    try:
+        os.unlink(file_path)
+        logger.debug(f"Cleaned up temp file: {file_path}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to cleanup {file_path}: {e}")
+
+
 def cleanup_temp_files(file_paths: List[str]) -> None:
     """
     Clean up temporary files.
@@ -590,10 +864,10 @@ def cleanup_temp_files(file_paths: List[str]) -> None:
     Args:
         file_paths: List of file paths to delete
     """
-    for file_path in file_paths:
-        try:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-                logger.debug(f"Cleaned up temp file: {file_path}")
-        except Exception as e:
-            logger.warning(f"Failed to cleanup {file_path}: {e}")
\ No newline at end of file
+    if len(file_paths) < CLEANUP_PARALLEL_THRESHOLD:
+        for file_path in file_paths:
+            _safe_unlink(file_path)
+        return
+    
+    with ThreadPoolExecutor(max_workers=CLEANUP_MAX_WORKERS) as executor:
+        list(executor.map(_safe_unlink, file_paths))
@@ -15,6 +15,13 @@ logger = logging.getLogger(__name__)
 ASSETS_DIR = Path(__file__).parent.parent / "assets"
 BACKGROUNDS_DIR = ASSETS_DIR / "backgrounds"
 
+# Email keyword -> background category, in priority order (gaming, work, relaxing)
+CONTENT_KEYWORD_CATEGORIES = {
+    **dict.fromkeys(['game', 'gaming', 'play', 'fun', 'entertainment'], 'gaming'),
+    **dict.fromkeys(['meeting', 'work', 'project', 'deadline', 'urgent'], 'subway_surfers'),
+    **dict.fromkeys(['relax', 'calm', 'peaceful', 'satisfying'], 'satisfying'),
+}
+
 
 class VideoConfig:
     """Configuration class for video selection and management."""
@@ -69,6 +76,13 @@ class VideoConfig:
         """Get videos for a specific category."""
         return self.categories.get(category, [])
     
+    def match_content_categories(self, email_content: str) -> List[str]:
+        """Categories whose keywords appear in the email content, in priority order."""
+        content_lower = email_content.lower()
+        return list(dict.fromkeys(
+            cat for keyword, cat in CONTENT_KEYWORD_CATEGORIES.items() if keyword in content_lower
+        ))
+    
     def select_video(self, category: Optional[str] = None, email_content: Optional[str] = None) -> str:
         """
         Select a background video based on configuration.
@@ -119,25 +133,10 @@ class VideoConfig:
         
         # Smart selection based on email content
         if email_content:
-            content_lower = email_content.lower()
-            
-            # Gaming-related keywords
-            if any(word in content_lower for word in ['game', 'gaming', 'play', 'fun', 'entertainment']):
-                gaming_videos = [v for v in available_videos if any(gv in v for gv in self.categories.get('gaming', []))]
-                if gaming_videos:
-                    return random.choice(gaming_videos)
-            
-            # Work-related keywords
-            if any(word in content_lower for word in ['meeting', 'work', 'project', 'deadline', 'urgent']):
-                subway_videos = [v for v in available_videos if any(sv in v for sv in self.categories.get('subway_surfers', []))]
-                if subway_videos:
-                    return random.choice(subway_videos)
-            
-            # Relaxing/satisfying keywords
-            if any(word in content_lower for word in ['relax', 'calm', 'peaceful', 'satisfying']):
-                satisfying_videos = [v for v in available_videos if any(sv in v for sv in self.categories.get('satisfying', []))]
-                if satisfying_videos:
-                    return random.choice(satisfying_videos)
+            for content_category in self.match_content_categories(email_content):
+                content_videos = [v for v in available_videos if any(cv in v for cv in self.categories.get(content_category, []))]
+                if content_videos:
+                    return random.choice(content_videos)
         
         # Fallback to preferred categories
         for pref_category in self.preferred_categories:
@@ -1,15 +1,55 @@
 import asyncio
+import hashlib
 import logging
+import os
 import time
 import traceback
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
 from app.email_parser import parse_email, EmailParseError
-from app.script_generator import generate_script_with_retry, ScriptGenerationError
-from app.video_assembly import assemble_video, generate_audio, VideoAssemblyError
+from app.script_generator import generate_script_with_retry, fallback_script, ScriptGenerationError
+from app.video_assembly import assemble_video, generate_audio, DEFAULT_AUDIO_PATH, VideoAssemblyError
 from app.supabase_client_simple import save_email, save_video, is_supabase_available
 
 logger = logging.getLogger(__name__)
 
+# Max emails a batch processes at once (bounds concurrent OpenAI/TTS calls)
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '10'))
+
+# Finished video URLs keyed by a hash of the email, so retries, replays and
+# duplicate webhooks skip the whole pipeline. Entries expire after
+# VIDEO_CACHE_TTL seconds; the oldest are evicted past VIDEO_CACHE_SIZE.
+VIDEO_CACHE_SIZE = int(os.getenv('VIDEO_CACHE_SIZE', '10000'))
+VIDEO_CACHE_TTL = float(os.getenv('VIDEO_CACHE_TTL', '86400'))
+_video_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+
+def _video_cache_key(email_data: Dict[str, Any]) -> str:
+    """Cache key for an email's video"""
+    content = "|".join(str(email_data.get(field, '')) for field in ('id', 'from', 'subject', 'body'))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _get_cached_video(key: str) -> Optional[str]:
+    """Cached video URL for a key, or None if missing or expired"""
+    entry = _video_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, video_url = entry
+    if expires_at < time.monotonic():
+        del _video_cache[key]
+        return None
+    _video_cache.move_to_end(key)
+    return video_url
+
+
+def _cache_video(key: str, video_url: str) -> None:
+    """Remember a finished video URL"""
+    _video_cache[key] = (time.monotonic() + VIDEO_CACHE_TTL, video_url)
+    _video_cache.move_to_end(key)
+    if len(_video_cache) > VIDEO_CACHE_SIZE:
+        _video_cache.popitem(last=False)
+
 
 class VideoGenerationError(Exception):
     """Exception raised when video generation fails completely"""
@@ -39,6 +79,15 @@ async def process_email(email_data: Dict[str, Any]) -> Optional[str]:
     
     start_time = time.time()
     
+    cache_key = _video_cache_key(email_data)
+    cached_url = _get_cached_video(cache_key)
+    if cached_url is not None:
+        logger.info("email_processing_cached", extra={
+            "email_id": email_id,
+            "video_url": cached_url
+        })
+        return cached_url
+    
     try:
         # Step 1: Parse email (with fallback)
         try:
@@ -58,9 +107,14 @@ async def process_email(email_data: Dict[str, Any]) -> Optional[str]:
             # Use fallback video instead of failing
             return await get_fallback_video(email_data)
         
+        # Set when a step fell back to default content; degraded videos are
+        # not cached so a retry or replay can produce the real one
+        degraded = False
+        
         # Step 2: Generate script (with retry)
         try:
             script = await generate_script_with_retry(parsed_email, max_retries=3)
+            degraded = script == fallback_script(parsed_email)
             logger.info("script_generated", extra={
                 "email_id": parsed_email['id'],
                 "script_length": len(script)
@@ -73,10 +127,13 @@ async def process_email(email_data: Dict[str, Any]) -> Optional[str]:
             })
             # Use fallback script
             script = f"New email from {parsed_email.get('from', 'someone')}"
+            degraded = True
         
-        # Step 3: Generate audio (with fallback)
+        # Step 3: Generate audio (with fallback). The audio only feeds video
+        # assembly, so keep it local instead of uploading and re-downloading it
         try:
-            audio_url = await generate_audio(script)
+            audio_url = await generate_audio(script, upload=False)
+            degraded = degraded or audio_url == DEFAULT_AUDIO_PATH
             logger.info("audio_generated", extra={
                 "email_id": parsed_email['id'],
                 "audio_url": audio_url
@@ -87,7 +144,8 @@ async def process_email(email_data: Dict[str, Any]) -> Optional[str]:
                 "error": str(e),
                 "fallback": "using_default_audio"
             })
-            audio_url = "assets/default_audio.mp3"
+            audio_url = DEFAULT_AUDIO_PATH
+            degraded = True
         
         # Step 4: Assemble video (critical step)
         try:
@@ -128,6 +186,8 @@ async def process_email(email_data: Dict[str, Any]) -> Optional[str]:
             # metrics.increment('video_generation_success')
             # metrics.record('video_generation_duration', duration)
             
+            if not degraded:
+                _cache_video(cache_key, video_url)
             return video_url
             
         except VideoAssemblyError as e:
@@ -186,7 +246,7 @@ async def get_fallback_video(email_data: Dict[str, Any]) -> str:
         fallback_script = f"New email from {from_sender}"
         
         # Use default audio
-        audio_url = "assets/default_audio.mp3"
+        audio_url = DEFAULT_AUDIO_PATH
         
         # Minimal email data for video assembly
         minimal_email = {
@@ -209,40 +269,46 @@ async def get_fallback_video(email_data: Dict[str, Any]) -> str:
         return "assets/fallback_video.mp4"
 
 
-async def process_email_batch(email_list: list) -> Dict[str, Any]:
+async def process_email_batch(email_list: list, max_concurrency: int = BATCH_MAX_CONCURRENCY) -> Dict[str, Any]:
     """
     Process multiple emails concurrently.
     
     Args:
         email_list: List of email data dictionaries
+        max_concurrency: Max emails in the pipeline at once
         
     Returns:
         Results summary with success/failure counts
     """
     logger.info(f"processing_email_batch: {len(email_list)} emails")
     
-    # Process emails concurrently
-    tasks = [process_email(email_data) for email_data in email_list]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def process_limited(email_data: Dict[str, Any]) -> Optional[str]:
+        async with semaphore:
+            return await process_email(email_data)
+    
+    # Process emails concurrently, at most max_concurrency at a time
+    tasks = [asyncio.create_task(process_limited(email_data)) for email_data in email_list]
     results = await asyncio.gather(*tasks, return_exceptions=True)
     
-    # Analyze results
-    successful = 0
-    failed = 0
+    # Classify, count and log each result in one pass: successes are the
+    # non-empty URLs
     video_urls = []
-    
     for i, result in enumerate(results):
         email_id = email_list[i].get('id', f'email_{i}')
         
-        if isinstance(result, Exception):
-            logger.error(f"batch_email_failed: {email_id}: {result}")
-            failed += 1
+        # BaseException so cancelled emails are reported too
+        if isinstance(result, BaseException):
+            logger.error("batch_email_failed: %s: %r", email_id, result)
         elif result:
-            logger.info(f"batch_email_success: {email_id}: {result}")
-            successful += 1
             video_urls.append(result)
+            logger.info("batch_email_success: %s: %s", email_id, result)
         else:
-            logger.warning(f"batch_email_no_result: {email_id}")
-            failed += 1
+            logger.warning("batch_email_no_result: %s", email_id)
+    
+    successful = len(video_urls)
+    failed = len(results) - successful
     
     summary = {
         "total": len(email_list),
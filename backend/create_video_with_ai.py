@@ -8,6 +8,13 @@ import os
 import sys
 from pathlib import Path
 
+# Faster event loop when available (uvloop does not support Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 # Add parent directory to path to access .env
 parent_dir = Path(__file__).parent.parent
 sys.path.append(str(parent_dir))
@@ -9,6 +9,13 @@ import sys
 import getpass
 from app.video_generator import process_email
 
+# Faster event loop when available (uvloop does not support Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
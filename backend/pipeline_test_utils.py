@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the standalone pipeline test scripts.
+
+test_complete_pipeline.py and test_pipeline_simple.py both time their tests
+and report results through this module.
+"""
+
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class PipelineTestResult:
+    """Outcome and wall-clock duration of a single pipeline test."""
+    name: str
+    ok: bool
+    duration: float
+
+
+def run_timed(name, test_fn) -> PipelineTestResult:
+    """Run a test function and record its result with a perf_counter timing."""
+    start = time.perf_counter()
+    ok = test_fn()
+    return PipelineTestResult(name, bool(ok), time.perf_counter() - start)
@@ -26,3 +26,22 @@ CREATE TABLE IF NOT EXISTS videos (
 CREATE INDEX IF NOT EXISTS idx_emails_email_id ON emails(email_id);
 CREATE INDEX IF NOT EXISTS idx_videos_video_id ON videos(video_id);
 CREATE INDEX IF NOT EXISTS idx_videos_email_id ON videos(email_id);
+CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos(created_at DESC);
+
+-- Insert an email and its videos in a single transaction / round-trip
+CREATE OR REPLACE FUNCTION create_email_with_videos(p_email JSONB, p_videos JSONB DEFAULT '[]'::JSONB)
+RETURNS UUID AS $$
+DECLARE
+    v_email_uuid UUID;
+BEGIN
+    INSERT INTO emails (email_id, subject, body)
+    VALUES (p_email->>'email_id', p_email->>'subject', p_email->>'body')
+    RETURNING id INTO v_email_uuid;
+
+    INSERT INTO videos (video_id, email_id, video_url)
+    SELECT v->>'video_id', v_email_uuid, v->>'video_url'
+    FROM jsonb_array_elements(p_videos) AS v;
+
+    RETURN v_email_uuid;
+END;
+$$ LANGUAGE plpgsql;
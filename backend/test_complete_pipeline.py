@@ -6,14 +6,11 @@ This tests the entire flow from email text to final video output.
 
 import asyncio
 import os
-import sys
 import logging
 import requests
-import time
 from pathlib import Path
 
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+from pipeline_test_utils import run_timed
 
 # Set up logging
 logging.basicConfig(
@@ -22,13 +19,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Mute per-request connection logs from the HTTP clients
+logging.getLogger("urllib3").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 
 def load_env_file():
     """Load environment variables from .env file in parent directory."""
     env_path = Path(__file__).parent.parent / '.env'
     
     if env_path.exists():
-        logger.info(f"Loading .env file from: {env_path}")
+        logger.info("Loading .env file from: %s", env_path)
         with open(env_path, 'r') as f:
             for line in f:
                 line = line.strip()
@@ -37,7 +38,7 @@ def load_env_file():
                     os.environ[key] = value
         return True
     else:
-        logger.error(f".env file not found at: {env_path}")
+        logger.error(".env file not found at: %s", env_path)
         return False
 
 
@@ -49,14 +50,14 @@ def test_server_health(base_url="http://localhost:8000"):
             logger.info("✅ Server is running and healthy")
             return True
         else:
-            logger.error(f"❌ Server health check failed: {response.status_code}")
+            logger.error("❌ Server health check failed: %s", response.status_code)
             return False
     except requests.exceptions.ConnectionError:
         logger.error("❌ Server is not running")
         logger.info("Start the server with: python -m app.main")
         return False
     except Exception as e:
-        logger.error(f"❌ Health check error: {e}")
+        logger.error("❌ Health check error: %s", e)
         return False
 
 
@@ -80,7 +81,7 @@ Sarah
 """
     
     logger.info("🧪 Testing email to video conversion...")
-    logger.info(f"Email text: {email_text.strip()[:100]}...")
+    logger.info("Email text: %s...", email_text.strip()[:100])
     
     try:
         # Send request to convert email to video
@@ -91,39 +92,39 @@ Sarah
             timeout=120  # 2 minutes timeout for video generation
         )
         
-        logger.info(f"Response status: {response.status_code}")
+        logger.info("Response status: %s", response.status_code)
         
         if response.status_code == 200:
             result = response.json()
             logger.info("✅ Email to video conversion successful!")
-            logger.info(f"Result: {result}")
+            logger.info("Result: %s", result)
             
             # Check if video URL was generated
             video_url = result.get('video_url')
             if video_url and video_url != "assets/default_video.mp4":
-                logger.info(f"🎬 Generated video: {video_url}")
+                logger.info("🎬 Generated video: %s", video_url)
                 
                 # Check if video file exists locally
                 if os.path.exists(video_url):
                     file_size = os.path.getsize(video_url)
-                    logger.info(f"📊 Video file size: {file_size:,} bytes")
-                    logger.info(f"💡 You can play the video with: open '{video_url}'")
+                    logger.info("📊 Video file size: %d bytes", file_size)
+                    logger.info("💡 You can play the video with: open '%s'", video_url)
                 else:
-                    logger.warning(f"⚠️  Video file not found at: {video_url}")
+                    logger.warning("⚠️  Video file not found at: %s", video_url)
                 
                 return True
             else:
                 logger.warning("⚠️  No video URL generated or using fallback")
                 return False
         else:
-            logger.error(f"❌ Conversion failed: {response.text}")
+            logger.error("❌ Conversion failed: %s", response.text)
             return False
             
     except requests.exceptions.Timeout:
         logger.error("❌ Request timed out - video generation took too long")
         return False
     except Exception as e:
-        logger.error(f"❌ Conversion error: {e}")
+        logger.error("❌ Conversion error: %s", e)
         return False
 
 
@@ -147,19 +148,19 @@ def test_process_email_endpoint(base_url="http://localhost:8000"):
             timeout=120
         )
         
-        logger.info(f"Response status: {response.status_code}")
+        logger.info("Response status: %s", response.status_code)
         
         if response.status_code == 200:
             result = response.json()
             logger.info("✅ Structured email processing successful!")
-            logger.info(f"Result: {result}")
+            logger.info("Result: %s", result)
             return True
         else:
-            logger.error(f"❌ Processing failed: {response.text}")
+            logger.error("❌ Processing failed: %s", response.text)
             return False
             
     except Exception as e:
-        logger.error(f"❌ Processing error: {e}")
+        logger.error("❌ Processing error: %s", e)
         return False
 
 
@@ -173,28 +174,28 @@ def test_pipeline_health(base_url="http://localhost:8000"):
         response = requests.get(f"{base_url}/health/system", timeout=10)
         if response.status_code == 200:
             health_data = response.json()
-            logger.info(f"✅ System health: {health_data.get('status', 'unknown')}")
+            logger.info("✅ System health: %s", health_data.get('status', 'unknown'))
         else:
-            logger.warning(f"⚠️  System health check failed: {response.status_code}")
+            logger.warning("⚠️  System health check failed: %s", response.status_code)
         
         # Test pipeline health
         response = requests.get(f"{base_url}/health/pipeline", timeout=10)
         if response.status_code == 200:
             pipeline_data = response.json()
             healthy = pipeline_data.get('healthy', False)
-            logger.info(f"✅ Pipeline health: {'healthy' if healthy else 'unhealthy'}")
+            logger.info("✅ Pipeline health: %s", 'healthy' if healthy else 'unhealthy')
             
             if 'checks' in pipeline_data:
                 for check, status in pipeline_data['checks'].items():
                     status_icon = "✅" if status else "❌"
-                    logger.info(f"   {status_icon} {check}")
+                    logger.info("   %s %s", status_icon, check)
         else:
-            logger.warning(f"⚠️  Pipeline health check failed: {response.status_code}")
+            logger.warning("⚠️  Pipeline health check failed: %s", response.status_code)
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ Health check error: {e}")
+        logger.error("❌ Health check error: %s", e)
         return False
 
 
@@ -215,29 +216,29 @@ async def test_direct_pipeline():
             "body": "This is a test of the direct pipeline processing. We're testing the complete flow from email to video generation."
         }
         
-        logger.info(f"Processing email: {email_data['subject']}")
+        logger.info("Processing email: %s", email_data['subject'])
         
         # Process email directly
         video_url = await process_email(email_data)
         
         if video_url:
-            logger.info(f"✅ Direct pipeline successful!")
-            logger.info(f"Generated video: {video_url}")
+            logger.info("✅ Direct pipeline successful!")
+            logger.info("Generated video: %s", video_url)
             
             # Check if video file exists
             if os.path.exists(video_url):
                 file_size = os.path.getsize(video_url)
-                logger.info(f"📊 Video file size: {file_size:,} bytes")
+                logger.info("📊 Video file size: %d bytes", file_size)
                 return True
             else:
-                logger.warning(f"⚠️  Video file not found at: {video_url}")
+                logger.warning("⚠️  Video file not found at: %s", video_url)
                 return False
         else:
             logger.error("❌ Direct pipeline failed - no video URL returned")
             return False
             
     except Exception as e:
-        logger.error(f"❌ Direct pipeline error: {e}")
+        logger.error("❌ Direct pipeline error: %s", e)
         return False
 
 
@@ -261,52 +262,49 @@ def main():
     # Test 1: Server health
     logger.info("\n" + "="*60)
     logger.info("1. Testing Server Health")
-    server_healthy = test_server_health()
-    test_results.append(("Server Health", server_healthy))
+    server_result = run_timed("Server Health", test_server_health)
+    test_results.append(server_result)
     
-    if not server_healthy:
+    if not server_result.ok:
         logger.error("❌ Server is not running. Start it with: python -m app.main")
         logger.info("Skipping HTTP-based tests...")
     else:
         # Test 2: Pipeline health
         logger.info("\n2. Testing Pipeline Health")
-        health_ok = test_pipeline_health()
-        test_results.append(("Pipeline Health", health_ok))
+        test_results.append(run_timed("Pipeline Health", test_pipeline_health))
         
         # Test 3: Email to video conversion
         logger.info("\n3. Testing Email to Video Conversion")
-        conversion_ok = test_email_to_video_conversion()
-        test_results.append(("Email to Video Conversion", conversion_ok))
+        test_results.append(run_timed("Email to Video Conversion", test_email_to_video_conversion))
         
         # Test 4: Structured email processing
         logger.info("\n4. Testing Structured Email Processing")
-        processing_ok = test_process_email_endpoint()
-        test_results.append(("Structured Email Processing", processing_ok))
+        test_results.append(run_timed("Structured Email Processing", test_process_email_endpoint))
     
     # Test 5: Direct pipeline (always test this)
     logger.info("\n5. Testing Direct Pipeline")
-    direct_ok = asyncio.run(test_direct_pipeline())
-    test_results.append(("Direct Pipeline", direct_ok))
+    test_results.append(run_timed("Direct Pipeline", lambda: asyncio.run(test_direct_pipeline())))
     
     # Summary
     logger.info("\n" + "="*60)
     logger.info("🎯 PIPELINE TEST RESULTS")
     logger.info("="*60)
     
-    passed = sum(1 for _, success in test_results if success)
+    passed = 0
     total = len(test_results)
     
-    for test_name, success in test_results:
-        status = "✅ PASSED" if success else "❌ FAILED"
-        logger.info(f"{test_name}: {status}")
+    for result in test_results:
+        passed += result.ok
+        status = "✅ PASSED" if result.ok else "❌ FAILED"
+        logger.info("%s: %s (%.2fs)", result.name, status, result.duration)
     
-    logger.info(f"\nOverall: {passed}/{total} tests passed")
+    logger.info("\nOverall: %s/%s tests passed", passed, total)
     
     if passed == total:
         logger.info("🎉 All pipeline tests passed successfully!")
         logger.info("\n💡 Your email-to-video pipeline is working correctly!")
     else:
-        logger.warning(f"⚠️  {total - passed} tests failed")
+        logger.warning("⚠️  %s tests failed", total - passed)
         logger.info("\n🔧 Check the errors above and fix any issues")
     
     # Instructions
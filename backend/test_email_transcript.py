@@ -10,9 +10,6 @@ import sys
 import logging
 from typing import Dict, Any
 
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
-
 from app.email_parser import parse_email
 from app.script_generator import generate_script, generate_script_with_retry
 
@@ -23,6 +20,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Mute per-request connection logs from the HTTP clients
+logging.getLogger("urllib3").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 
 def create_test_emails() -> list[Dict[str, Any]]:
     """Create a variety of test emails to test different scenarios."""
@@ -96,14 +97,14 @@ async def test_email_parsing():
     test_emails = create_test_emails()
     
     for email in test_emails:
-        logger.info(f"\nTesting email: {email['id']}")
-        logger.info(f"Original: From={email['from']}, Subject={email['subject']}")
+        logger.info("\nTesting email: %s", email['id'])
+        logger.info("Original: From=%s, Subject=%s", email['from'], email['subject'])
         
         try:
             parsed = parse_email(email)
-            logger.info(f"Parsed: From={parsed['from']}, Subject={parsed['subject']}")
-            logger.info(f"Body length: {len(parsed['body'])} characters")
-            logger.info(f"Body preview: {parsed['body'][:100]}...")
+            logger.info("Parsed: From=%s, Subject=%s", parsed['from'], parsed['subject'])
+            logger.info("Body length: %s characters", len(parsed['body']))
+            logger.info("Body preview: %s...", parsed['body'][:100])
             
             # Validate parsing
             assert parsed['id'] == email['id']
@@ -115,7 +116,7 @@ async def test_email_parsing():
             logger.info("✅ Email parsing successful")
             
         except Exception as e:
-            logger.error(f"❌ Email parsing failed: {e}")
+            logger.error("❌ Email parsing failed: %s", e)
             raise
 
 
@@ -134,17 +135,17 @@ async def test_script_generation():
     test_emails = create_test_emails()
     
     for email in test_emails:
-        logger.info(f"\nTesting script generation for: {email['id']}")
+        logger.info("\nTesting script generation for: %s", email['id'])
         
         try:
             # Parse email first
             parsed_email = parse_email(email)
-            logger.info(f"Parsed email: {parsed_email['subject']}")
+            logger.info("Parsed email: %s", parsed_email['subject'])
             
             # Generate script
             script = await generate_script(parsed_email)
             
-            logger.info(f"Generated script ({len(script)} chars): {script}")
+            logger.info("Generated script (%s chars): %s", len(script), script)
             
             # Validate script
             assert len(script) > 0, "Script should not be empty"
@@ -154,7 +155,7 @@ async def test_script_generation():
             logger.info("✅ Script generation successful")
             
         except Exception as e:
-            logger.error(f"❌ Script generation failed: {e}")
+            logger.error("❌ Script generation failed: %s", e)
             raise
 
 
@@ -165,7 +166,7 @@ async def test_script_generation_fallback():
     test_emails = create_test_emails()
     
     for email in test_emails:
-        logger.info(f"\nTesting fallback for: {email['id']}")
+        logger.info("\nTesting fallback for: %s", email['id'])
         
         try:
             parsed_email = parse_email(email)
@@ -174,12 +175,12 @@ async def test_script_generation_fallback():
             if not parsed_email.get('body') and parsed_email.get('subject') == 'No subject':
                 # This should trigger the fallback in generate_script
                 script = f"New email from {parsed_email.get('from', 'Unknown')}"
-                logger.info(f"Fallback script for empty email ({len(script)} chars): {script}")
+                logger.info("Fallback script for empty email (%s chars): %s", len(script), script)
             else:
                 # For non-empty emails, test the fallback logic manually
                 fallback = f"New email from {parsed_email.get('from', 'someone')}: {parsed_email.get('subject', '')}"
                 script = fallback[:150]
-                logger.info(f"Manual fallback script ({len(script)} chars): {script}")
+                logger.info("Manual fallback script (%s chars): %s", len(script), script)
             
             # Validate fallback
             assert len(script) > 0, "Fallback script should not be empty"
@@ -188,7 +189,7 @@ async def test_script_generation_fallback():
             logger.info("✅ Fallback script generation successful")
             
         except Exception as e:
-            logger.error(f"❌ Fallback script generation failed: {e}")
+            logger.error("❌ Fallback script generation failed: %s", e)
             raise
 
 
@@ -211,7 +212,7 @@ async def test_script_generation_with_retry():
         parsed_email = parse_email(test_email)
         script = await generate_script_with_retry(parsed_email, max_retries=3)
         
-        logger.info(f"Retry script ({len(script)} chars): {script}")
+        logger.info("Retry script (%s chars): %s", len(script), script)
         
         assert len(script) > 0, "Retry script should not be empty"
         assert len(script) <= 150, f"Retry script too long: {len(script)} chars"
@@ -219,7 +220,7 @@ async def test_script_generation_with_retry():
         logger.info("✅ Retry mechanism successful")
         
     except Exception as e:
-        logger.error(f"❌ Retry mechanism failed: {e}")
+        logger.error("❌ Retry mechanism failed: %s", e)
         raise
 
 
@@ -248,7 +249,7 @@ async def test_complete_pipeline():
     try:
         logger.info("Step 1: Parsing email...")
         parsed_email = parse_email(test_email)
-        logger.info(f"✅ Parsed: {parsed_email['subject']}")
+        logger.info("✅ Parsed: %s", parsed_email['subject'])
         
         logger.info("Step 2: Generating script...")
         if os.getenv('OPENAI_API_KEY'):
@@ -257,7 +258,7 @@ async def test_complete_pipeline():
             # Use fallback when no API key
             script = f"New email from {parsed_email.get('from', 'someone')}: {parsed_email.get('subject', '')}"
             script = script[:150]
-        logger.info(f"✅ Generated script: {script}")
+        logger.info("✅ Generated script: %s", script)
         
         logger.info("Step 3: Validating output...")
         assert len(script) > 0, "Script should not be empty"
@@ -269,26 +270,26 @@ async def test_complete_pipeline():
         # Display final result
         logger.info("\n" + "="*50)
         logger.info("FINAL RESULT:")
-        logger.info(f"Original Email: {test_email['subject']}")
-        logger.info(f"Generated Transcript: {script}")
+        logger.info("Original Email: %s", test_email['subject'])
+        logger.info("Generated Transcript: %s", script)
         logger.info("="*50)
         
     except Exception as e:
-        logger.error(f"❌ Complete pipeline test failed: {e}")
+        logger.error("❌ Complete pipeline test failed: %s", e)
         raise
 
 
 def print_environment_info():
     """Print environment information for debugging."""
     logger.info("=== Environment Information ===")
-    logger.info(f"Python version: {sys.version}")
-    logger.info(f"Working directory: {os.getcwd()}")
-    logger.info(f"OpenAI API Key available: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
+    logger.info("Python version: %s", sys.version)
+    logger.info("Working directory: %s", os.getcwd())
+    logger.info("OpenAI API Key available: %s", 'Yes' if os.getenv('OPENAI_API_KEY') else 'No')
     
     # Check if required packages are available
     try:
         import openai
-        logger.info(f"OpenAI package version: {openai.__version__}")
+        logger.info("OpenAI package version: %s", openai.__version__)
     except ImportError:
         logger.warning("OpenAI package not available")
     
@@ -315,7 +316,7 @@ async def main():
         logger.info("\n🎉 All tests passed successfully!")
         
     except Exception as e:
-        logger.error(f"\n💥 Test suite failed: {e}")
+        logger.error("\n💥 Test suite failed: %s", e)
         sys.exit(1)
 
 
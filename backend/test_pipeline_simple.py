@@ -5,12 +5,10 @@ Simple test script for the email to video pipeline without HTTP server.
 
 import asyncio
 import os
-import sys
 import logging
 from pathlib import Path
 
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+from pipeline_test_utils import run_timed
 
 # Set up logging
 logging.basicConfig(
@@ -19,13 +17,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Mute per-request connection logs from the HTTP clients
+logging.getLogger("urllib3").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 
 def load_env_file():
     """Load environment variables from .env file in parent directory."""
     env_path = Path(__file__).parent.parent / '.env'
     
     if env_path.exists():
-        logger.info(f"Loading .env file from: {env_path}")
+        logger.info("Loading .env file from: %s", env_path)
         with open(env_path, 'r') as f:
             for line in f:
                 line = line.strip()
@@ -34,7 +36,7 @@ def load_env_file():
                     os.environ[key] = value
         return True
     else:
-        logger.error(f".env file not found at: {env_path}")
+        logger.error(".env file not found at: %s", env_path)
         return False
 
 
@@ -64,7 +66,7 @@ async def test_email_to_video_pipeline():
         """
     }
     
-    logger.info(f"📧 Testing with email: {email_data['subject']}")
+    logger.info("📧 Testing with email: %s", email_data['subject'])
     
     try:
         # Process email through the complete pipeline
@@ -72,23 +74,23 @@ async def test_email_to_video_pipeline():
         
         if video_url:
             logger.info("✅ Pipeline completed successfully!")
-            logger.info(f"🎬 Generated video: {video_url}")
+            logger.info("🎬 Generated video: %s", video_url)
             
             # Check if video file exists
             if os.path.exists(video_url):
                 file_size = os.path.getsize(video_url)
-                logger.info(f"📊 Video file size: {file_size:,} bytes")
-                logger.info(f"💡 You can play the video with: open '{video_url}'")
+                logger.info("📊 Video file size: %d bytes", file_size)
+                logger.info("💡 You can play the video with: open '%s'", video_url)
                 return True
             else:
-                logger.warning(f"⚠️  Video file not found at: {video_url}")
+                logger.warning("⚠️  Video file not found at: %s", video_url)
                 return False
         else:
             logger.error("❌ Pipeline failed - no video URL returned")
             return False
             
     except Exception as e:
-        logger.error(f"❌ Pipeline failed with error: {e}")
+        logger.error("❌ Pipeline failed with error: %s", e)
         return False
 
 
@@ -153,7 +155,7 @@ Alex
         'body': body
     }
     
-    logger.info(f"📧 Parsed email: {subject} from {from_sender}")
+    logger.info("📧 Parsed email: %s from %s", subject, from_sender)
     
     try:
         # Process email
@@ -161,14 +163,14 @@ Alex
         
         if video_url:
             logger.info("✅ Email text conversion successful!")
-            logger.info(f"🎬 Generated video: {video_url}")
+            logger.info("🎬 Generated video: %s", video_url)
             return True
         else:
             logger.error("❌ Email text conversion failed")
             return False
             
     except Exception as e:
-        logger.error(f"❌ Email text conversion error: {e}")
+        logger.error("❌ Email text conversion error: %s", e)
         return False
 
 
@@ -191,32 +193,31 @@ def main():
     
     # Test 1: Complete pipeline
     logger.info("\n" + "="*60)
-    pipeline_success = asyncio.run(test_email_to_video_pipeline())
-    test_results.append(("Complete Pipeline", pipeline_success))
+    test_results.append(run_timed("Complete Pipeline", lambda: asyncio.run(test_email_to_video_pipeline())))
     
     # Test 2: Email text conversion
-    text_success = asyncio.run(test_email_text_conversion())
-    test_results.append(("Email Text Conversion", text_success))
+    test_results.append(run_timed("Email Text Conversion", lambda: asyncio.run(test_email_text_conversion())))
     
     # Summary
     logger.info("\n" + "="*60)
     logger.info("🎯 PIPELINE TEST RESULTS")
     logger.info("="*60)
     
-    passed = sum(1 for _, success in test_results if success)
+    passed = 0
     total = len(test_results)
     
-    for test_name, success in test_results:
-        status = "✅ PASSED" if success else "❌ FAILED"
-        logger.info(f"{test_name}: {status}")
+    for result in test_results:
+        passed += result.ok
+        status = "✅ PASSED" if result.ok else "❌ FAILED"
+        logger.info("%s: %s (%.2fs)", result.name, status, result.duration)
     
-    logger.info(f"\nOverall: {passed}/{total} tests passed")
+    logger.info("\nOverall: %s/%s tests passed", passed, total)
     
     if passed == total:
         logger.info("🎉 All pipeline tests passed successfully!")
         logger.info("\n💡 Your email-to-video pipeline is working correctly!")
     else:
-        logger.warning(f"⚠️  {total - passed} tests failed")
+        logger.warning("⚠️  %s tests failed", total - passed)
         logger.info("\n🔧 Check the errors above and fix any issues")
     
     # Instructions for next steps
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Supabase integration tests for BuzzBrief.
+
+Runs the same checks against both the full client (app.supabase_client) and
+the simplified client (app.supabase_client_simple). Skipped when Supabase
+credentials are not configured.
+
+Usage:
+    pytest test_supabase_integration.py -v
+"""
+import importlib
+import logging
+import uuid
+
+import pytest
+from dotenv import load_dotenv
+
+# Load environment once at import time (before the Supabase clients initialize)
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+pytestmark = pytest.mark.asyncio
+
+CLIENT_MODULES = ["app.supabase_client", "app.supabase_client_simple"]
+
+# Superset payloads: the simplified client ignores the extra fields
+TEST_EMAIL = {
+    'id': 'test_email_123',
+    'from': 'test@example.com',
+    'subject': 'Test Email Subject',
+    'body': 'This is a test email body for Supabase testing.',
+    'raw_text': 'From: test@example.com\nSubject: Test Email Subject\n\nThis is a test email body.'
+}
+
+TEST_VIDEO = {
+    'video_id': 'test_video_123',
+    'email_id': 'test_email_123',
+    'script': 'This is a test script for video generation.',
+    'tts_voice': 'nova',
+    'background_video': 'gaming1.mp4',
+    'video_url': '/path/to/test_video.mp4',
+    'thumbnail_url': '/path/to/test_thumbnail.jpg',
+    'audio_url': '/path/to/test_audio.mp3',
+    'duration_seconds': 10.5,
+    'file_size_bytes': 1024000,
+    'status': 'completed'
+}
+
+
+@pytest.fixture(params=CLIENT_MODULES)
+def client(request):
+    """Supabase client module under test, skipped if Supabase is not configured"""
+    module = importlib.import_module(request.param)
+    if not module.initialize_supabase():
+        pytest.skip("Supabase not configured (set SUPABASE_URL and SUPABASE_ANON_KEY)")
+    return module
+
+
+def _suffixed(client, value: str) -> str:
+    """Make test IDs distinct per client module"""
+    return f"{value}_{client.__name__.rsplit('.', 1)[-1]}"
+
+
+async def _ensure_test_email(client) -> str:
+    """Save the test email and video once, returning the email UUID"""
+    email_id = _suffixed(client, TEST_EMAIL['id'])
+    existing = await client.get_email_by_id(email_id)
+    if existing:
+        return existing['id']
+
+    email = {**TEST_EMAIL, 'id': email_id}
+    video = {**TEST_VIDEO, 'video_id': _suffixed(client, TEST_VIDEO['video_id']), 'email_id': email_id}
+    return await client.save_email_with_videos(email, [video])
+
+
+async def test_supabase_connection(client):
+    """Test basic Supabase connection"""
+    assert client.is_supabase_available()
+
+
+async def test_email_operations(client):
+    """Test batched email + video save and retrieval"""
+    email_uuid = await _ensure_test_email(client)
+    assert email_uuid, "Failed to save email - check your database schema"
+
+    retrieved_email = await client.get_email_by_id(_suffixed(client, TEST_EMAIL['id']))
+    assert retrieved_email
+    assert retrieved_email['subject'] == TEST_EMAIL['subject']
+
+    retrieved_video = await client.get_video_by_id(_suffixed(client, TEST_VIDEO['video_id']))
+    assert retrieved_video
+    assert retrieved_video['email_id'] == email_uuid
+
+
+async def test_bulk_video_operations(client):
+    """Test saving several videos in a single request"""
+    if not hasattr(client, 'save_videos_bulk'):
+        pytest.skip(f"{client.__name__} has no bulk video save")
+
+    email_uuid = await _ensure_test_email(client)
+    run_id = uuid.uuid4().hex[:8]
+    test_videos = [
+        {
+            'video_id': f'test_video_bulk_{run_id}_{i}',
+            'video_url': f'/path/to/test_video_bulk_{i}.mp4'
+        }
+        for i in range(5)
+    ]
+
+    video_uuids = await client.save_videos_bulk(test_videos, email_uuid)
+    assert len(video_uuids) == len(test_videos)
+
+    recent_videos = await client.get_recent_videos(limit=5)
+    assert len(recent_videos) >= 5
+
+
+async def test_combined_operations(client):
+    """Test combined email and video operations"""
+    await _ensure_test_email(client)
+
+    email_with_videos = await client.get_email_with_videos(_suffixed(client, TEST_EMAIL['id']))
+    assert email_with_videos
+    assert len(email_with_videos['videos']) >= 1
+    logger.info("Email with %s videos retrieved", len(email_with_videos['videos']))
+
+    recent_videos = await client.get_recent_videos(limit=5)
+    assert isinstance(recent_videos, list)
+    for video_data in recent_videos:
+        assert 'email' in video_data and 'video' in video_data
@@ -2,12 +2,19 @@
 """
 Test Supabase Storage functionality for BuzzBrief
 """
-import os
 import asyncio
+import hashlib
 import logging
-import tempfile
+import aiofiles
 from dotenv import load_dotenv
-from app.storage import upload_to_storage, download_from_storage
+from app.storage import upload_bytes_to_storage, download_from_storage, DOWNLOAD_CHUNK_SIZE
+
+# Faster event loop when available (uvloop does not support Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,35 +29,33 @@ async def test_supabase_storage():
     logger.info("🧪 Testing Supabase Storage Integration")
     logger.info("=" * 50)
     
-    # Create a test file
+    # Test content (kept in memory, never written to a temp file)
     test_content = b"This is a test video file for BuzzBrief storage testing."
     test_filename = "test_video.mp4"
     
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-        temp_file.write(test_content)
-        temp_file_path = temp_file.name
-    
     try:
         # Test upload
         logger.info("📤 Testing file upload...")
         upload_path = f"test/{test_filename}"
-        uploaded_url = await upload_to_storage(temp_file_path, upload_path)
+        uploaded_url = await upload_bytes_to_storage(test_content, upload_path)
         
-        logger.info(f"✅ Upload successful!")
-        logger.info(f"📁 Uploaded to: {uploaded_url}")
+        logger.info("✅ Upload successful!")
+        logger.info("📁 Uploaded to: %s", uploaded_url)
         
-        # Test download
+        # Test download (streamed to disk)
         logger.info("📥 Testing file download...")
         downloaded_path = await download_from_storage(uploaded_url)
         
-        logger.info(f"✅ Download successful!")
-        logger.info(f"📁 Downloaded to: {downloaded_path}")
+        logger.info("✅ Download successful!")
+        logger.info("📁 Downloaded to: %s", downloaded_path)
         
-        # Verify content
-        with open(downloaded_path, 'rb') as f:
-            downloaded_content = f.read()
+        # Verify content by hashing the file in chunks
+        downloaded_hash = hashlib.sha256()
+        async with aiofiles.open(downloaded_path, 'rb') as f:
+            while chunk := await f.read(DOWNLOAD_CHUNK_SIZE):
+                downloaded_hash.update(chunk)
         
-        if downloaded_content == test_content:
+        if downloaded_hash.digest() == hashlib.sha256(test_content).digest():
             logger.info("✅ Content verification passed!")
         else:
             logger.error("❌ Content verification failed!")
@@ -59,16 +64,11 @@ async def test_supabase_storage():
         logger.info("🎬 Your video pipeline is ready to use Supabase Storage!")
         
     except Exception as e:
-        logger.error(f"❌ Storage test failed: {e}")
+        logger.error("❌ Storage test failed: %s", e)
         logger.error("💡 Make sure you have:")
         logger.error("   1. Created the 'videos' bucket in Supabase Dashboard")
         logger.error("   2. Set proper RLS policies for the bucket")
         logger.error("   3. Configured SUPABASE_URL and SUPABASE_ANON_KEY")
-        
-    finally:
-        # Cleanup
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
 
 if __name__ == "__main__":
     asyncio.run(test_supabase_storage())
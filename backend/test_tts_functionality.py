@@ -8,15 +8,30 @@ import asyncio
 import os
 import sys
 import logging
-import tempfile
-from typing import Dict, Any, List
+import time
+import uuid
+from typing import Dict, List
 
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+import openai
+from dotenv import load_dotenv
 
-from app.video_assembly import generate_audio
+# Faster event loop when available (uvloop does not support Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+# Load environment once at import time (before app modules read it)
+load_dotenv()
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+OPENAI_VERSION = getattr(openai, '__version__', 'unknown')
+
+from app.video_assembly import generate_audio as _generate_audio, DEFAULT_AUDIO_PATH as FALLBACK_AUDIO
 from app.script_generator import generate_script_with_retry
 from app.email_parser import parse_email
+from app.supabase_client_simple import save_email, is_supabase_available
+from tts_test_utils import gather_bounded, memoize_audio_urls
 
 # Set up logging
 logging.basicConfig(
@@ -25,6 +40,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Serve repeated (voice, text) requests from the shared TTS cache instead of OpenAI
+generate_audio = memoize_audio_urls(_generate_audio, fallback=FALLBACK_AUDIO)
+
 
 def create_test_transcripts() -> List[Dict[str, str]]:
     """Create various test transcripts for TTS testing."""
@@ -62,7 +80,7 @@ async def test_basic_tts_functionality():
     logger.info("=== Testing Basic TTS Functionality ===")
     
     # Check if OpenAI API key is available
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.error("❌ OPENAI_API_KEY not found!")
         logger.info("Please set your OpenAI API key:")
         logger.info("export OPENAI_API_KEY='your-api-key-here'")
@@ -74,13 +92,13 @@ async def test_basic_tts_functionality():
     test_script = "Hello world, this is a test of OpenAI's text-to-speech functionality."
     
     try:
-        logger.info(f"Testing TTS with script: '{test_script}'")
+        logger.info("Testing TTS with script: '%s'", test_script)
         logger.info("Calling OpenAI TTS API...")
         
         audio_url = await generate_audio(test_script)
         
-        logger.info(f"✅ TTS generation successful!")
-        logger.info(f"Audio URL: {audio_url}")
+        logger.info("✅ TTS generation successful!")
+        logger.info("Audio URL: %s", audio_url)
         
         # Validate response
         if audio_url and audio_url != "assets/default_audio.mp3":
@@ -91,7 +109,7 @@ async def test_basic_tts_functionality():
             return False
             
     except Exception as e:
-        logger.error(f"❌ TTS generation failed: {e}")
+        logger.error("❌ TTS generation failed: %s", e)
         return False
 
 
@@ -99,7 +117,7 @@ async def test_multiple_voice_options():
     """Test TTS with different voice options."""
     logger.info("\n=== Testing Multiple Voice Options ===")
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.warning("⚠️  OpenAI API key not found, skipping voice tests")
         return False
     
@@ -109,35 +127,31 @@ async def test_multiple_voice_options():
     # Available OpenAI TTS voices
     voices = ["nova", "alloy", "echo", "fable", "onyx", "shimmer"]
     
-    logger.info(f"Testing {len(voices)} different voices...")
+    logger.info("Testing %s different voices...", len(voices))
+    
+    # Request all voices concurrently
+    audio_urls = await gather_bounded(generate_audio(test_script, voice=voice) for voice in voices)
     
     results = {}
     
-    for voice in voices:
-        try:
-            logger.info(f"\n🎙️ Testing voice: {voice}")
-            
-            # We need to modify the generate_audio function to accept voice parameter
-            # For now, we'll test with the default voice and show how to extend
-            audio_url = await generate_audio(test_script)
-            
+    for voice, audio_url in zip(voices, audio_urls):
+        if isinstance(audio_url, Exception):
+            logger.error("❌ Voice '%s' failed: %s", voice, audio_url)
+            results[voice] = {
+                'success': False,
+                'error': str(audio_url)
+            }
+        else:
             results[voice] = {
                 'success': True,
                 'audio_url': audio_url
             }
             
-            logger.info(f"✅ Voice '{voice}' generated audio: {audio_url}")
-            
-        except Exception as e:
-            logger.error(f"❌ Voice '{voice}' failed: {e}")
-            results[voice] = {
-                'success': False,
-                'error': str(e)
-            }
+            logger.info("✅ Voice '%s' generated audio: %s", voice, audio_url)
     
     # Summary
     successful_voices = [voice for voice, result in results.items() if result['success']]
-    logger.info(f"\n📊 Voice Test Results: {len(successful_voices)}/{len(voices)} voices successful")
+    logger.info("\n📊 Voice Test Results: %s/%s voices successful", len(successful_voices), len(voices))
     
     return len(successful_voices) > 0
 
@@ -146,43 +160,46 @@ async def test_different_script_lengths():
     """Test TTS with scripts of different lengths."""
     logger.info("\n=== Testing Different Script Lengths ===")
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.warning("⚠️  OpenAI API key not found, skipping length tests")
         return False
     
     test_transcripts = create_test_transcripts()
     
-    logger.info(f"Testing {len(test_transcripts)} different script lengths...")
+    logger.info("Testing %s different script lengths...", len(test_transcripts))
+    
+    # Preview loop only logs, so skip the slicing entirely when INFO is filtered
+    if logger.isEnabledFor(logging.INFO):
+        for transcript in test_transcripts:
+            logger.info("\n📝 Testing: %s", transcript['description'])
+            logger.info("Length: %s characters", len(transcript['text']))
+            logger.info("Script: '%s...'", transcript['text'][:50])
+    
+    # Request all scripts concurrently
+    audio_urls = await gather_bounded(generate_audio(transcript['text']) for transcript in test_transcripts)
     
     results = {}
     
-    for transcript in test_transcripts:
-        try:
-            logger.info(f"\n📝 Testing: {transcript['description']}")
-            logger.info(f"Length: {len(transcript['text'])} characters")
-            logger.info(f"Script: '{transcript['text'][:50]}...'")
-            
-            audio_url = await generate_audio(transcript['text'])
-            
+    for transcript, audio_url in zip(test_transcripts, audio_urls):
+        if isinstance(audio_url, Exception):
+            logger.error("❌ Failed for %s: %s", transcript['id'], audio_url)
             results[transcript['id']] = {
-                'success': True,
-                'audio_url': audio_url,
+                'success': False,
+                'error': str(audio_url),
                 'length': len(transcript['text'])
             }
-            
-            logger.info(f"✅ Generated audio: {audio_url}")
-            
-        except Exception as e:
-            logger.error(f"❌ Failed for {transcript['id']}: {e}")
+        else:
             results[transcript['id']] = {
-                'success': False,
-                'error': str(e),
+                'success': True,
+                'audio_url': audio_url,
                 'length': len(transcript['text'])
             }
+            
+            logger.info("✅ Generated audio for %s: %s", transcript['id'], audio_url)
     
     # Summary
     successful_tests = [result for result in results.values() if result['success']]
-    logger.info(f"\n📊 Length Test Results: {len(successful_tests)}/{len(test_transcripts)} scripts successful")
+    logger.info("\n📊 Length Test Results: %s/%s scripts successful", len(successful_tests), len(test_transcripts))
     
     return len(successful_tests) > 0
 
@@ -200,7 +217,7 @@ async def test_tts_error_handling():
         else:
             logger.warning("⚠️  Empty script didn't return fallback audio")
     except Exception as e:
-        logger.error(f"❌ Empty script test failed: {e}")
+        logger.error("❌ Empty script test failed: %s", e)
     
     # Test 2: Very short script
     logger.info("\n2. Testing very short script...")
@@ -209,27 +226,27 @@ async def test_tts_error_handling():
         if audio_url == "assets/default_audio.mp3":
             logger.info("✅ Short script correctly returned fallback audio")
         else:
-            logger.info(f"✅ Short script generated audio: {audio_url}")
+            logger.info("✅ Short script generated audio: %s", audio_url)
     except Exception as e:
-        logger.error(f"❌ Short script test failed: {e}")
+        logger.error("❌ Short script test failed: %s", e)
     
     # Test 3: Script with special characters
     logger.info("\n3. Testing script with special characters...")
     try:
         special_script = "Hello! 🚀 This is a test with emojis and special characters: @#$%^&*()"
         audio_url = await generate_audio(special_script)
-        logger.info(f"✅ Special characters handled: {audio_url}")
+        logger.info("✅ Special characters handled: %s", audio_url)
     except Exception as e:
-        logger.error(f"❌ Special characters test failed: {e}")
+        logger.error("❌ Special characters test failed: %s", e)
     
     # Test 4: Very long script
     logger.info("\n4. Testing very long script...")
     try:
         long_script = "This is a very long script. " * 50  # ~1500 characters
         audio_url = await generate_audio(long_script)
-        logger.info(f"✅ Long script handled: {audio_url}")
+        logger.info("✅ Long script handled: %s", audio_url)
     except Exception as e:
-        logger.error(f"❌ Long script test failed: {e}")
+        logger.error("❌ Long script test failed: %s", e)
     
     logger.info("\n✅ Error handling tests completed")
 
@@ -238,12 +255,13 @@ async def test_complete_email_to_tts_pipeline():
     """Test the complete pipeline from email to TTS audio."""
     logger.info("\n=== Testing Complete Email to TTS Pipeline ===")
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.warning("⚠️  OpenAI API key not found, testing with fallback pipeline")
     
-    # Sample email
+    # Sample email, with an ID unique to this run so re-runs don't collide
+    # with rows saved by earlier ones
     test_email = {
-        'id': 'pipeline_test',
+        'id': f"pipeline_test_{uuid.uuid4().hex[:12]}",
         'from': 'manager@techcorp.com',
         'subject': 'Urgent: Project Update Meeting Tomorrow',
         'body': '''
@@ -262,102 +280,107 @@ async def test_complete_email_to_tts_pipeline():
     try:
         logger.info("Step 1: Parsing email...")
         parsed_email = parse_email(test_email)
-        logger.info(f"✅ Parsed email: {parsed_email['subject']}")
+        logger.info("✅ Parsed email: %s", parsed_email['subject'])
         
         logger.info("Step 2: Generating script...")
-        if os.getenv('OPENAI_API_KEY'):
+        if OPENAI_API_KEY:
             script = await generate_script_with_retry(parsed_email)
         else:
             # Fallback script
             script = f"New email from {parsed_email.get('from', 'someone')}: {parsed_email.get('subject', '')}"
             script = script[:150]
-        logger.info(f"✅ Generated script: '{script}'")
+        logger.info("✅ Generated script: '%s'", script)
+        
+        logger.info("Step 3: Generating TTS audio and saving email concurrently...")
+        
+        async def timed(coro):
+            start_time = time.perf_counter()
+            result = await coro
+            return result, time.perf_counter() - start_time
         
-        logger.info("Step 3: Generating TTS audio...")
-        audio_url = await generate_audio(script)
-        logger.info(f"✅ Generated audio: {audio_url}")
+        stage_start = time.perf_counter()
+        (email_uuid, save_time), (audio_url, tts_time) = await asyncio.gather(
+            timed(save_email(parsed_email)),
+            timed(generate_audio(script))
+        )
+        overlap_time = time.perf_counter() - stage_start
+        logger.info("✅ Generated audio: %s", audio_url)
+        logger.info("⏱️  TTS %.2fs, email save %.2fs, combined %.2fs", tts_time, save_time, overlap_time)
+        
+        # save_email logs and returns None on failure instead of raising
+        if is_supabase_available():
+            assert email_uuid, f"Failed to save email {parsed_email['id']} to Supabase"
+            logger.info("✅ Saved email: %s", email_uuid)
+        else:
+            logger.warning("⚠️  Supabase not available, email was not saved")
         
         # Display final result
         logger.info("\n" + "="*60)
         logger.info("🎉 COMPLETE PIPELINE TEST SUCCESSFUL!")
-        logger.info(f"📧 Original Email: {test_email['subject']}")
-        logger.info(f"📝 Generated Script: '{script}'")
-        logger.info(f"🎙️ Generated Audio: {audio_url}")
+        logger.info("📧 Original Email: %s", test_email['subject'])
+        logger.info("📝 Generated Script: '%s'", script)
+        logger.info("🎙️ Generated Audio: %s", audio_url)
         logger.info("="*60)
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ Complete pipeline test failed: {e}")
+        logger.error("❌ Complete pipeline test failed: %s", e)
         return False
 
 
 async def test_tts_performance():
-    """Test TTS performance with timing."""
+    """Test TTS throughput with cold and warm concurrent bursts."""
     logger.info("\n=== Testing TTS Performance ===")
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.warning("⚠️  OpenAI API key not found, skipping performance tests")
         return False
     
     test_script = "This is a performance test for text-to-speech generation with OpenAI's API."
     
-    # Test multiple requests to measure performance
+    # Fire a concurrent burst and measure wall-clock throughput. The first
+    # burst pays connection setup (cold); the second reuses the warm pool.
+    # The uncached generate_audio is used so the disk cache can't skew timing.
     num_tests = 3
-    times = []
     
-    for i in range(num_tests):
-        try:
-            import time
-            start_time = time.time()
-            
-            logger.info(f"Performance test {i+1}/{num_tests}...")
-            audio_url = await generate_audio(test_script)
-            
-            end_time = time.time()
-            duration = end_time - start_time
-            times.append(duration)
-            
-            logger.info(f"✅ Test {i+1} completed in {duration:.2f} seconds")
-            
-        except Exception as e:
-            logger.error(f"❌ Performance test {i+1} failed: {e}")
-    
-    if times:
-        avg_time = sum(times) / len(times)
-        min_time = min(times)
-        max_time = max(times)
+    async def measure_burst(label: str) -> int:
+        start_time = time.monotonic()
+        outcomes = await asyncio.gather(
+            *[_generate_audio(test_script) for _ in range(num_tests)],
+            return_exceptions=True
+        )
+        wall = time.monotonic() - start_time
         
-        logger.info(f"\n📊 Performance Results:")
-        logger.info(f"   Average time: {avg_time:.2f} seconds")
-        logger.info(f"   Min time: {min_time:.2f} seconds")
-        logger.info(f"   Max time: {max_time:.2f} seconds")
-        logger.info(f"   Successful tests: {len(times)}/{num_tests}")
+        successes = 0
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                logger.error("❌ %s request %s failed: %s", label, i+1, outcome)
+            elif outcome == FALLBACK_AUDIO:
+                logger.error("❌ %s request %s returned fallback audio", label, i+1)
+            else:
+                successes += 1
         
-        return True
+        logger.info("   %s: %s/%s in %.2fs -> throughput: %.2f req/s",
+                    label, successes, num_tests, wall, num_tests / wall)
+        return successes
+    
+    logger.info("\n📊 Performance Results (%s concurrent requests):", num_tests)
+    cold_successes = await measure_burst("Cold")
+    await asyncio.sleep(0.1)
+    warm_successes = await measure_burst("Warm")
     
-    return False
+    return cold_successes + warm_successes > 0
 
 
 def print_environment_info():
     """Print environment information for debugging."""
     logger.info("=== TTS Testing Environment Information ===")
-    logger.info(f"Python version: {sys.version}")
-    logger.info(f"Working directory: {os.getcwd()}")
-    logger.info(f"OpenAI API Key available: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
+    logger.info("Python version: %s", sys.version)
+    logger.info("Working directory: %s", os.getcwd())
+    logger.info("OpenAI API Key available: %s", 'Yes' if OPENAI_API_KEY else 'No')
     
-    # Check if required packages are available
-    try:
-        import openai
-        logger.info(f"OpenAI package version: {openai.__version__}")
-    except ImportError:
-        logger.warning("OpenAI package not available")
-    
-    try:
-        import tempfile
-        logger.info("Tempfile module available")
-    except ImportError:
-        logger.warning("Tempfile module not available")
+    logger.info("OpenAI package version: %s", OPENAI_VERSION)
 
 
 async def main():
@@ -366,22 +389,34 @@ async def main():
     
     print_environment_info()
     
-    test_results = {}
-    
     try:
-        # Run all tests
+        # Run all tests concurrently - they share no state, so the suite
+        # takes as long as the slowest test rather than the sum
         logger.info("\n" + "="*60)
-        test_results['basic_tts'] = await test_basic_tts_functionality()
-        
-        test_results['voice_options'] = await test_multiple_voice_options()
-        
-        test_results['script_lengths'] = await test_different_script_lengths()
-        
-        test_results['error_handling'] = await test_tts_error_handling()
-        
-        test_results['complete_pipeline'] = await test_complete_email_to_tts_pipeline()
+        names = [
+            'basic_tts',
+            'voice_options',
+            'script_lengths',
+            'error_handling',
+            'complete_pipeline',
+            'performance'
+        ]
+        results = await asyncio.gather(
+            test_basic_tts_functionality(),
+            test_multiple_voice_options(),
+            test_different_script_lengths(),
+            test_tts_error_handling(),
+            test_complete_email_to_tts_pipeline(),
+            test_tts_performance(),
+            return_exceptions=True
+        )
         
-        test_results['performance'] = await test_tts_performance()
+        test_results = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error("❌ %s raised: %s", name, result)
+                result = False
+            test_results[name] = result
         
         # Summary
         logger.info("\n" + "="*60)
@@ -393,17 +428,17 @@ async def main():
         
         for test_name, result in test_results.items():
             status = "✅ PASSED" if result else "❌ FAILED"
-            logger.info(f"{test_name}: {status}")
+            logger.info("%s: %s", test_name, status)
         
-        logger.info(f"\nOverall: {passed_tests}/{total_tests} tests passed")
+        logger.info("\nOverall: %s/%s tests passed", passed_tests, total_tests)
         
         if passed_tests == total_tests:
             logger.info("🎉 All TTS tests passed successfully!")
         else:
-            logger.warning(f"⚠️  {total_tests - passed_tests} tests failed")
+            logger.warning("⚠️  %s tests failed", total_tests - passed_tests)
         
     except Exception as e:
-        logger.error(f"\n💥 Test suite failed with error: {e}")
+        logger.error("\n💥 Test suite failed with error: %s", e)
         sys.exit(1)
 
 
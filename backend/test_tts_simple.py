@@ -4,13 +4,30 @@ Simple test script for OpenAI TTS functionality.
 Set your OPENAI_API_KEY environment variable to test with real TTS API calls.
 """
 
+import argparse
 import asyncio
 import os
 import sys
 import logging
-import tempfile
+import time
+from typing import Optional
+
+import httpx
 from openai import AsyncOpenAI
 
+from tts_test_utils import (
+    TTS_CACHE_DIR,
+    cleanup_temp_files,
+    create_openai_client,
+    fast_script,
+    synthesize,
+    tts_cache_get,
+)
+
+from app.email_parser import parse_email
+from app.script_generator import generate_script_with_retry
+from app.video_assembly import generate_audio
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -18,12 +35,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Banner separator, built once
+_SEP = "=" * 60
+
+# Read once; every test checks it
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+
+async def play_streamed(client: AsyncOpenAI, model: str, voice: str, script: str) -> Optional[float]:
+    """
+    Stream TTS audio straight into ffplay so playback starts on the first chunk.
+    
+    openai==1.3.5 buffers the whole speech response, so this posts to the
+    speech endpoint with a streaming httpx request instead.
+    
+    Returns:
+        Seconds until the first audio chunk arrived, or None if nothing played
+    """
+    try:
+        player = await asyncio.create_subprocess_exec(
+            "ffplay", "-autoexit", "-nodisp", "-loglevel", "quiet", "-i", "pipe:0",
+            stdin=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        logger.warning("⚠️  ffplay not found, skipping streamed playback")
+        return None
+    
+    start_time = time.perf_counter()
+    first_chunk_latency = None
+    try:
+        async with httpx.AsyncClient(timeout=60) as http:
+            async with http.stream(
+                "POST",
+                client.base_url.join("audio/speech"),
+                headers={"Authorization": f"Bearer {client.api_key}"},
+                json={"model": model, "voice": voice, "input": script, "response_format": "opus"}
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(4096):
+                    if first_chunk_latency is None:
+                        first_chunk_latency = time.perf_counter() - start_time
+                        logger.info("🔊 First audio chunk after %.3fs", first_chunk_latency)
+                    player.stdin.write(chunk)
+                    await player.stdin.drain()
+    finally:
+        player.stdin.close()
+        await player.wait()
+    
+    return first_chunk_latency
+
 
-async def test_tts_with_openai():
+async def test_tts_with_openai(client: AsyncOpenAI, play: bool = False):
     """Test TTS with OpenAI API directly."""
     
     # Check for API key
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.error("❌ OPENAI_API_KEY environment variable not set!")
         logger.info("Please set your OpenAI API key:")
         logger.info("export OPENAI_API_KEY='your-api-key-here'")
@@ -31,164 +97,138 @@ async def test_tts_with_openai():
     
     logger.info("✅ OpenAI API key found")
     
-    # Initialize OpenAI client
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Test script
-    test_script = "Hello! This is a test of OpenAI's text-to-speech functionality. Your email has been converted into engaging audio content!"
+    test_script = fast_script("Hello! This is a test of OpenAI's text-to-speech functionality. Your email has been converted into engaging audio content!")
     
-    logger.info(f"🎙️ Testing TTS with script: '{test_script}'")
+    logger.info("🎙️ Testing TTS with script: '%s'", test_script)
     
     try:
         logger.info("Calling OpenAI TTS API...")
         
-        # Call TTS API
-        response = await client.audio.speech.create(
-            model="tts-1",
-            voice="nova",  # Female voice, good for content
-            input=test_script
-        )
-        
-        # Save audio to temporary file
-        temp_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-        temp_file.write(response.content)
-        temp_file.close()
-        
-        # Get file info
-        file_size = os.path.getsize(temp_file.name)
+        # Call TTS API (nova: female voice, good for content)
+        audio_path, file_size = await synthesize(client, "tts-1", "nova", test_script)
         
-        logger.info("\n" + "="*60)
-        logger.info("🎉 TTS GENERATION SUCCESSFUL!")
-        logger.info(f"📝 Script: '{test_script}'")
-        logger.info(f"🎙️ Audio file: {temp_file.name}")
-        logger.info(f"📊 File size: {file_size} bytes")
-        logger.info("="*60)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _SEP)
+            logger.info("🎉 TTS GENERATION SUCCESSFUL!")
+            logger.info("📝 Script: '%s'", test_script)
+            logger.info("🎙️ Audio file: %s", audio_path)
+            logger.info("📊 File size: %s bytes", file_size)
+            logger.info(_SEP)
+            
+            logger.info("\n💡 You can play the audio file:")
+            logger.info("   open %s", audio_path)
+            logger.info("   or")
+            logger.info("   afplay %s  # on macOS", audio_path)
         
-        logger.info(f"\n💡 You can play the audio file:")
-        logger.info(f"   open {temp_file.name}")
-        logger.info(f"   or")
-        logger.info(f"   afplay {temp_file.name}  # on macOS")
+        if play:
+            logger.info("▶️  Streaming the same script to ffplay...")
+            await play_streamed(client, "tts-1", "nova", test_script)
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ TTS generation failed: {e}")
+        logger.error("❌ TTS generation failed: %s", e)
         return False
 
 
-async def test_multiple_voices():
+async def test_multiple_voices(client: AsyncOpenAI):
     """Test TTS with different voices."""
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.error("❌ OPENAI_API_KEY not set")
         return False
     
     logger.info("\n=== Testing Different Voices ===")
     
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Test script
-    test_script = "This is a test of different voice options for text-to-speech generation."
+    test_script = fast_script("This is a test of different voice options for text-to-speech generation.")
     
     # Test different voices
     voices = ["nova", "alloy", "onyx"]
     
-    logger.info(f"Testing {len(voices)} different voices...")
+    logger.info("Testing %s different voices...", len(voices))
     
-    generated_files = []
+    async def synth(voice):
+        logger.info("🎙️ Requesting voice: %s", voice)
+        return await synthesize(client, "tts-1", voice, test_script)
     
-    for voice in voices:
-        try:
-            logger.info(f"\n🎙️ Testing voice: {voice}")
-            
-            response = await client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=test_script
-            )
-            
-            # Save with voice name
-            temp_file = tempfile.NamedTemporaryFile(suffix=f"_{voice}.mp3", delete=False)
-            temp_file.write(response.content)
-            temp_file.close()
-            
-            file_size = os.path.getsize(temp_file.name)
-            generated_files.append((voice, temp_file.name, file_size))
-            
-            logger.info(f"✅ Generated: {temp_file.name} ({file_size} bytes)")
-            
-        except Exception as e:
-            logger.error(f"❌ Voice '{voice}' failed: {e}")
+    # Request all voices concurrently
+    results = await asyncio.gather(*[synth(voice) for voice in voices], return_exceptions=True)
+    
+    generated_files = []
+    for voice, result in zip(voices, results):
+        if isinstance(result, Exception):
+            logger.error("❌ Voice '%s' failed: %s", voice, result)
+            continue
+        
+        file_path, file_size = result
+        generated_files.append((voice, file_path, file_size))
+        logger.info("✅ Generated: %s (%s bytes)", file_path, file_size)
     
     # Summary
     if generated_files:
-        logger.info(f"\n🎵 Generated {len(generated_files)} audio files:")
+        logger.info("\n🎵 Generated %s audio files:", len(generated_files))
         for voice, file_path, file_size in generated_files:
-            logger.info(f"   {voice}: {file_path}")
+            logger.info("   %s: %s", voice, file_path)
         
         logger.info("\n💡 You can compare the voices by playing these files:")
         for voice, file_path, file_size in generated_files:
-            logger.info(f"   open {file_path}  # {voice} voice")
+            logger.info("   open %s  # %s voice", file_path, voice)
     
     return len(generated_files) > 0
 
 
-async def test_tts_models():
+async def test_tts_models(client: AsyncOpenAI):
     """Test different TTS models."""
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.error("❌ OPENAI_API_KEY not set")
         return False
     
     logger.info("\n=== Testing Different TTS Models ===")
     
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Test script
-    test_script = "This is a comparison between OpenAI's standard and high-definition text-to-speech models."
+    test_script = fast_script("This is a comparison between OpenAI's standard and high-definition text-to-speech models.")
     
     # Test models
     models = ["tts-1", "tts-1-hd"]
     
-    logger.info(f"Testing {len(models)} different models...")
+    logger.info("Testing %s different models...", len(models))
     
-    generated_files = []
+    async def synth(model):
+        logger.info("🎛️ Requesting model: %s", model)
+        
+        # Cache hits take no request time, so they get no duration
+        cached = tts_cache_get(model, "nova", test_script) is not None
+        
+        # Time the request
+        start_time = time.perf_counter()
+        
+        file_path, file_size = await synthesize(client, model, "nova", test_script)
+        
+        duration = None if cached else time.perf_counter() - start_time
+        return file_path, file_size, duration
     
-    for model in models:
-        try:
-            logger.info(f"\n🎛️ Testing model: {model}")
-            
-            # Time the request
-            import time
-            start_time = time.time()
-            
-            response = await client.audio.speech.create(
-                model=model,
-                voice="nova",
-                input=test_script
-            )
-            
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            # Save with model name
-            temp_file = tempfile.NamedTemporaryFile(suffix=f"_{model}.mp3", delete=False)
-            temp_file.write(response.content)
-            temp_file.close()
-            
-            file_size = os.path.getsize(temp_file.name)
-            generated_files.append((model, temp_file.name, file_size, duration))
-            
-            logger.info(f"✅ Generated in {duration:.2f}s: {temp_file.name} ({file_size} bytes)")
-            
-        except Exception as e:
-            logger.error(f"❌ Model '{model}' failed: {e}")
+    # Request both models concurrently
+    results = await asyncio.gather(*[synth(model) for model in models], return_exceptions=True)
+    
+    generated_files = []
+    for model, result in zip(models, results):
+        if isinstance(result, Exception):
+            logger.error("❌ Model '%s' failed: %s", model, result)
+            continue
+        
+        file_path, file_size, duration = result
+        timing = "cached" if duration is None else f"{duration:.2f}s"
+        generated_files.append((model, file_path, file_size, timing))
+        logger.info("✅ Generated (%s): %s (%s bytes)", timing, file_path, file_size)
     
     # Summary
     if generated_files:
-        logger.info(f"\n📊 Model Comparison:")
-        for model, file_path, file_size, duration in generated_files:
-            logger.info(f"   {model}: {file_size} bytes, {duration:.2f}s")
+        logger.info("\n📊 Model Comparison:")
+        for model, file_path, file_size, timing in generated_files:
+            logger.info("   %s: %s bytes, %s", model, file_size, timing)
         
         if len(generated_files) == 2:
             tts1_size = generated_files[0][2]
@@ -202,18 +242,11 @@ async def test_tts_models():
 async def test_complete_pipeline():
     """Test the complete email to TTS pipeline."""
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.warning("⚠️  OpenAI API key not found, testing fallback pipeline")
     
     logger.info("\n=== Testing Complete Email to TTS Pipeline ===")
     
-    # Import the app modules
-    sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
-    
-    from app.email_parser import parse_email
-    from app.script_generator import generate_script_with_retry
-    from app.video_assembly import generate_audio
-    
     # Sample email
     test_email = {
         'id': 'tts_pipeline_test',
@@ -235,32 +268,33 @@ async def test_complete_pipeline():
     try:
         logger.info("Step 1: Parsing email...")
         parsed_email = parse_email(test_email)
-        logger.info(f"✅ Parsed: {parsed_email['subject']}")
+        logger.info("✅ Parsed: %s", parsed_email['subject'])
         
         logger.info("Step 2: Generating script...")
-        if os.getenv('OPENAI_API_KEY'):
+        if OPENAI_API_KEY:
             script = await generate_script_with_retry(parsed_email)
         else:
             script = f"New email from {parsed_email.get('from', 'someone')}: {parsed_email.get('subject', '')}"
             script = script[:150]
-        logger.info(f"✅ Generated script: '{script}'")
+        logger.info("✅ Generated script: '%s'", script)
         
         logger.info("Step 3: Generating TTS audio...")
         audio_url = await generate_audio(script)
-        logger.info(f"✅ Generated audio: {audio_url}")
+        logger.info("✅ Generated audio: %s", audio_url)
         
-        # Display final result
-        logger.info("\n" + "="*60)
-        logger.info("🎉 COMPLETE PIPELINE SUCCESSFUL!")
-        logger.info(f"📧 Email: {test_email['subject']}")
-        logger.info(f"📝 Script: '{script}'")
-        logger.info(f"🎙️ Audio: {audio_url}")
-        logger.info("="*60)
+        # Display final result (skipped entirely when INFO is filtered)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _SEP)
+            logger.info("🎉 COMPLETE PIPELINE SUCCESSFUL!")
+            logger.info("📧 Email: %s", test_email['subject'])
+            logger.info("📝 Script: '%s'", script)
+            logger.info("🎙️ Audio: %s", audio_url)
+            logger.info(_SEP)
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ Pipeline test failed: {e}")
+        logger.error("❌ Pipeline test failed: %s", e)
         return False
 
 
@@ -275,6 +309,7 @@ def print_instructions():
     logger.info("   python test_tts_simple.py")
     logger.info("")
     logger.info("3. The test will generate audio files that you can play")
+    logger.info("   (add --play to hear the basic test stream as it is generated)")
     logger.info("")
     logger.info("Available OpenAI TTS Voices:")
     logger.info("   nova: Female voice, warm and engaging")
@@ -289,61 +324,76 @@ def print_instructions():
     logger.info("   tts-1-hd: High definition, slower")
 
 
-async def main():
-    """Main test function."""
+async def main(play: bool = False):
+    """
+    Main test function.
+    
+    Args:
+        play: Also stream the basic test's audio to ffplay as it arrives
+    """
     print_instructions()
     
     logger.info("\n🚀 Starting TTS Tests...")
     
+    # One client (and connection pool) for the whole run
+    client = create_openai_client()
+    
     try:
-        # Run tests
-        test_results = []
-        
-        # Basic TTS test
-        logger.info("\n" + "="*60)
-        basic_success = await test_tts_with_openai()
-        test_results.append(("Basic TTS", basic_success))
-        
-        # Multiple voices test
-        voices_success = await test_multiple_voices()
-        test_results.append(("Multiple Voices", voices_success))
+        # Run the independent tests concurrently; the shared semaphore in
+        # tts_with_retry keeps them within the OpenAI rate limit together
+        logger.info("\n%s", _SEP)
+        tests = [
+            ("Basic TTS", test_tts_with_openai(client, play=play)),
+            ("Multiple Voices", test_multiple_voices(client)),
+            ("Model Comparison", test_tts_models(client)),
+            ("Complete Pipeline", test_complete_pipeline()),
+        ]
+        outcomes = await asyncio.gather(*[coro for _, coro in tests], return_exceptions=True)
         
-        # Model comparison test
-        models_success = await test_tts_models()
-        test_results.append(("Model Comparison", models_success))
-        
-        # Complete pipeline test
-        pipeline_success = await test_complete_pipeline()
-        test_results.append(("Complete Pipeline", pipeline_success))
+        test_results = []
+        for (test_name, _), outcome in zip(tests, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error("❌ %s raised: %s", test_name, outcome)
+                outcome = False
+            test_results.append((test_name, outcome))
         
         # Summary
-        logger.info("\n" + "="*60)
+        logger.info("\n%s", _SEP)
         logger.info("🎯 TEST RESULTS SUMMARY")
-        logger.info("="*60)
+        logger.info(_SEP)
         
         passed = sum(1 for _, success in test_results if success)
         total = len(test_results)
         
         for test_name, success in test_results:
             status = "✅ PASSED" if success else "❌ FAILED"
-            logger.info(f"{test_name}: {status}")
+            logger.info("%s: %s", test_name, status)
         
-        logger.info(f"\nOverall: {passed}/{total} tests passed")
+        logger.info("\nOverall: %s/%s tests passed", passed, total)
         
         if passed == total:
             logger.info("🎉 All TTS tests passed successfully!")
         else:
-            logger.warning(f"⚠️  {total - passed} tests failed")
+            logger.warning("⚠️  %s tests failed", total - passed)
         
-        logger.info("\n💡 Generated audio files are saved in temporary directory")
+        logger.info("\n💡 Generated audio files are kept in %s", TTS_CACHE_DIR)
         logger.info("   You can play them to hear the TTS output")
         
     except Exception as e:
-        logger.error(f"\n💥 Test suite failed with error: {e}")
+        logger.error("\n💥 Test suite failed with error: %s", e)
         sys.exit(1)
+    finally:
+        await cleanup_temp_files()
+        if client:
+            await client.close()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simple OpenAI TTS tests")
+    parser.add_argument("--play", action="store_true",
+                        help="stream the basic test's audio to ffplay and report first-chunk latency")
+    args = parser.parse_args()
+    
     # Run the test suite
-    asyncio.run(main())
+    asyncio.run(main(play=args.play))
 
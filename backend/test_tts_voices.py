@@ -8,11 +8,18 @@ import asyncio
 import os
 import sys
 import logging
-import tempfile
+import time
+
 from openai import AsyncOpenAI
 
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+from tts_test_utils import (
+    TTS_CACHE_DIR,
+    cleanup_temp_files,
+    create_openai_client,
+    fast_script,
+    synthesize,
+    tts_cache_get,
+)
 
 # Set up logging
 logging.basicConfig(
@@ -21,11 +28,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Banner separator, built once
+_SEP = "=" * 60
+
+# Read once; every test checks it
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-async def test_openai_tts_directly():
+
+async def test_openai_tts_directly(client: AsyncOpenAI):
     """Test OpenAI TTS API directly with different voices."""
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.error("❌ OPENAI_API_KEY not found!")
         logger.info("Please set your OpenAI API key:")
         logger.info("export OPENAI_API_KEY='your-api-key-here'")
@@ -33,140 +46,126 @@ async def test_openai_tts_directly():
     
     logger.info("✅ OpenAI API key found")
     
-    # Initialize OpenAI client
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Test script
-    test_script = "Hello! This is a test of OpenAI's text-to-speech functionality. How does this voice sound to you?"
+    test_script = fast_script("Hello! This is a test of OpenAI's text-to-speech functionality. How does this voice sound to you?")
     
     # Available OpenAI TTS voices
     voices = ["nova", "alloy", "echo", "fable", "onyx", "shimmer"]
     
-    logger.info(f"Testing {len(voices)} different OpenAI TTS voices...")
-    logger.info(f"Test script: '{test_script}'")
+    logger.info("Testing %s different OpenAI TTS voices...", len(voices))
+    logger.info("Test script: '%s'", test_script)
     
-    results = {}
+    async def synth(voice):
+        logger.info("🎙️ Requesting voice: %s", voice)
+        
+        # Call OpenAI TTS API directly (try "tts-1-hd" for higher quality)
+        return await synthesize(client, "tts-1", voice, test_script)
     
-    for voice in voices:
-        try:
-            logger.info(f"\n🎙️ Testing voice: {voice}")
-            
-            # Call OpenAI TTS API directly
-            response = await client.audio.speech.create(
-                model="tts-1",  # You can also try "tts-1-hd" for higher quality
-                voice=voice,
-                input=test_script
-            )
-            
-            # Save audio to temporary file
-            temp_file = tempfile.NamedTemporaryFile(suffix=f"_{voice}.mp3", delete=False)
-            temp_file.write(response.content)
-            temp_file.close()
-            
-            # Get file size
-            file_size = os.path.getsize(temp_file.name)
-            
-            results[voice] = {
-                'success': True,
-                'file_path': temp_file.name,
-                'file_size': file_size
-            }
-            
-            logger.info(f"✅ Voice '{voice}' generated audio file: {temp_file.name}")
-            logger.info(f"   File size: {file_size} bytes")
-            
-        except Exception as e:
-            logger.error(f"❌ Voice '{voice}' failed: {e}")
+    # Request all voices concurrently
+    outcomes = await asyncio.gather(*[synth(voice) for voice in voices], return_exceptions=True)
+    
+    results = {}
+    for voice, outcome in zip(voices, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("❌ Voice '%s' failed: %s", voice, outcome)
             results[voice] = {
                 'success': False,
-                'error': str(e)
+                'error': str(outcome)
             }
+            continue
+        
+        file_path, file_size = outcome
+        results[voice] = {
+            'success': True,
+            'file_path': file_path,
+            'file_size': file_size
+        }
+        
+        logger.info("✅ Voice '%s' generated audio file: %s", voice, file_path)
+        logger.info("   File size: %s bytes", file_size)
     
     # Summary
     successful_voices = [voice for voice, result in results.items() if result['success']]
-    logger.info(f"\n📊 Voice Test Results: {len(successful_voices)}/{len(voices)} voices successful")
+    logger.info("\n📊 Voice Test Results: %s/%s voices successful", len(successful_voices), len(voices))
     
     # List successful voices with file info
     if successful_voices:
         logger.info("\n🎵 Generated Audio Files:")
         for voice in successful_voices:
             result = results[voice]
-            logger.info(f"   {voice}: {result['file_path']} ({result['file_size']} bytes)")
+            logger.info("   %s: %s (%s bytes)", voice, result['file_path'], result['file_size'])
         
         logger.info("\n💡 You can play these files to hear the different voices:")
         for voice in successful_voices:
             result = results[voice]
-            logger.info(f"   open {result['file_path']}")
+            logger.info("   open %s", result['file_path'])
     
     return len(successful_voices) > 0
 
 
-async def test_tts_models():
+async def test_tts_models(client: AsyncOpenAI):
     """Test different OpenAI TTS models (tts-1 vs tts-1-hd)."""
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.warning("⚠️  OpenAI API key not found, skipping model tests")
         return False
     
     logger.info("\n=== Testing Different TTS Models ===")
     
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Test script
-    test_script = "This is a comparison test between OpenAI's standard and high-definition text-to-speech models."
+    test_script = fast_script("This is a comparison test between OpenAI's standard and high-definition text-to-speech models.")
     
     # Test models
     models = ["tts-1", "tts-1-hd"]
     
-    logger.info(f"Testing {len(models)} different TTS models...")
+    logger.info("Testing %s different TTS models...", len(models))
     
-    results = {}
+    async def synth(model):
+        logger.info("🎛️ Requesting model: %s", model)
+        
+        # Cache hits take no request time, so they get no duration
+        cached = tts_cache_get(model, "nova", test_script) is not None
+        
+        # Time the request
+        start_time = time.perf_counter()
+        
+        # Use same voice for fair comparison
+        file_path, file_size = await synthesize(client, model, "nova", test_script)
+        
+        duration = None if cached else time.perf_counter() - start_time
+        return file_path, file_size, duration
     
-    for model in models:
-        try:
-            logger.info(f"\n🎛️ Testing model: {model}")
-            
-            # Time the request
-            import time
-            start_time = time.time()
-            
-            response = await client.audio.speech.create(
-                model=model,
-                voice="nova",  # Use same voice for fair comparison
-                input=test_script
-            )
-            
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            # Save audio file
-            temp_file = tempfile.NamedTemporaryFile(suffix=f"_{model}.mp3", delete=False)
-            temp_file.write(response.content)
-            temp_file.close()
-            
-            file_size = os.path.getsize(temp_file.name)
-            
-            results[model] = {
-                'success': True,
-                'file_path': temp_file.name,
-                'file_size': file_size,
-                'duration': duration
-            }
-            
-            logger.info(f"✅ Model '{model}' generated audio in {duration:.2f} seconds")
-            logger.info(f"   File: {temp_file.name}")
-            logger.info(f"   Size: {file_size} bytes")
-            
-        except Exception as e:
-            logger.error(f"❌ Model '{model}' failed: {e}")
+    # Request both models concurrently
+    outcomes = await asyncio.gather(*[synth(model) for model in models], return_exceptions=True)
+    
+    results = {}
+    for model, outcome in zip(models, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("❌ Model '%s' failed: %s", model, outcome)
             results[model] = {
                 'success': False,
-                'error': str(e)
+                'error': str(outcome)
             }
+            continue
+        
+        file_path, file_size, duration = outcome
+        results[model] = {
+            'success': True,
+            'file_path': file_path,
+            'file_size': file_size,
+            'duration': duration
+        }
+        
+        if duration is None:
+            logger.info("✅ Model '%s' audio served from cache", model)
+        else:
+            logger.info("✅ Model '%s' generated audio in %.2f seconds", model, duration)
+        logger.info("   File: %s", file_path)
+        logger.info("   Size: %s bytes", file_size)
     
     # Summary
     successful_models = [model for model, result in results.items() if result['success']]
-    logger.info(f"\n📊 Model Test Results: {len(successful_models)}/{len(models)} models successful")
+    logger.info("\n📊 Model Test Results: %s/%s models successful", len(successful_models), len(models))
     
     if len(successful_models) == 2:
         # Compare models
@@ -174,8 +173,13 @@ async def test_tts_models():
         tts1hd_result = results['tts-1-hd']
         
         logger.info("\n🔍 Model Comparison:")
-        logger.info(f"   tts-1: {tts1_result['file_size']} bytes, {tts1_result['duration']:.2f}s")
-        logger.info(f"   tts-1-hd: {tts1hd_result['file_size']} bytes, {tts1hd_result['duration']:.2f}s")
+        if tts1_result['duration'] is None or tts1hd_result['duration'] is None:
+            # Durations are only comparable when both models hit the API
+            logger.info("   tts-1: %s bytes", tts1_result['file_size'])
+            logger.info("   tts-1-hd: %s bytes", tts1hd_result['file_size'])
+        else:
+            logger.info("   tts-1: %s bytes, %.2fs", tts1_result['file_size'], tts1_result['duration'])
+            logger.info("   tts-1-hd: %s bytes, %.2fs", tts1hd_result['file_size'], tts1hd_result['duration'])
         
         if tts1hd_result['file_size'] > tts1_result['file_size']:
             logger.info("   ✅ HD model produces larger files (higher quality)")
@@ -185,17 +189,15 @@ async def test_tts_models():
     return len(successful_models) > 0
 
 
-async def test_voice_characteristics():
+async def test_voice_characteristics(client: AsyncOpenAI):
     """Test voice characteristics and suitability for different content types."""
     
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         logger.warning("⚠️  OpenAI API key not found, skipping voice characteristics tests")
         return False
     
     logger.info("\n=== Testing Voice Characteristics ===")
     
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Different types of content to test
     content_types = {
         'professional': "Good morning team. We have an important meeting scheduled for tomorrow at 2 PM to discuss our quarterly objectives and strategic initiatives.",
@@ -204,36 +206,40 @@ async def test_voice_characteristics():
         'dramatic': "The moment of truth has arrived. Your quarterly review is tomorrow, and everything depends on your performance today.",
         'friendly': "Hi there! I hope you're having a wonderful day. I just wanted to share some exciting news with you."
     }
+    # The dramatic script stays full length to keep multi-sentence prosody signal
+    content_types = {
+        content_type: script if content_type == 'dramatic' else fast_script(script)
+        for content_type, script in content_types.items()
+    }
     
     # Select a few key voices to test
     test_voices = ["nova", "onyx", "alloy"]
     
-    logger.info(f"Testing {len(test_voices)} voices with {len(content_types)} content types...")
+    logger.info("Testing %s voices with %s content types...", len(test_voices), len(content_types))
+    
+    async def synth(voice, content_type, script):
+        return await synthesize(client, "tts-1", voice, script)
+    
+    # Every voice/content combination in a single concurrent batch
+    combinations = [
+        (voice, content_type, script)
+        for voice in test_voices
+        for content_type, script in content_types.items()
+    ]
+    outcomes = await asyncio.gather(*[synth(*combo) for combo in combinations], return_exceptions=True)
     
-    for voice in test_voices:
-        logger.info(f"\n🎭 Testing voice '{voice}' characteristics:")
+    current_voice = None
+    for (voice, content_type, script), outcome in zip(combinations, outcomes):
+        if voice != current_voice:
+            current_voice = voice
+            logger.info("\n🎭 Voice '%s' characteristics:", voice)
         
-        for content_type, script in content_types.items():
-            try:
-                logger.info(f"   {content_type}: '{script[:50]}...'")
-                
-                response = await client.audio.speech.create(
-                    model="tts-1",
-                    voice=voice,
-                    input=script
-                )
-                
-                # Save with descriptive filename
-                filename = f"voice_test_{voice}_{content_type}.mp3"
-                temp_file = tempfile.NamedTemporaryFile(suffix=f"_{voice}_{content_type}.mp3", delete=False)
-                temp_file.write(response.content)
-                temp_file.close()
-                
-                file_size = os.path.getsize(temp_file.name)
-                logger.info(f"   ✅ Generated: {temp_file.name} ({file_size} bytes)")
-                
-            except Exception as e:
-                logger.error(f"   ❌ Failed: {e}")
+        logger.info("   %s: '%s...'", content_type, script[:50])
+        if isinstance(outcome, Exception):
+            logger.error("   ❌ Failed: %s", outcome)
+        else:
+            file_path, file_size = outcome
+            logger.info("   ✅ Generated: %s (%s bytes)", file_path, file_size)
     
     logger.info("\n💡 Voice Characteristics Summary:")
     logger.info("   nova: Female voice, warm and engaging - good for content creation")
@@ -241,35 +247,6 @@ async def test_voice_characteristics():
     logger.info("   alloy: Neutral voice, clear and versatile - good for general use")
 
 
-async def cleanup_temp_files():
-    """Clean up temporary audio files created during testing."""
-    logger.info("\n=== Cleaning Up Temporary Files ===")
-    
-    import glob
-    
-    # Find all temporary audio files
-    temp_patterns = [
-        "/tmp/tmp*_*.mp3",
-        tempfile.gettempdir() + "/tmp*_*.mp3"
-    ]
-    
-    cleaned_count = 0
-    for pattern in temp_patterns:
-        files = glob.glob(pattern)
-        for file_path in files:
-            try:
-                os.unlink(file_path)
-                cleaned_count += 1
-                logger.info(f"🗑️  Deleted: {file_path}")
-            except Exception as e:
-                logger.warning(f"⚠️  Could not delete {file_path}: {e}")
-    
-    if cleaned_count > 0:
-        logger.info(f"✅ Cleaned up {cleaned_count} temporary files")
-    else:
-        logger.info("ℹ️  No temporary files to clean up")
-
-
 def print_tts_info():
     """Print information about OpenAI TTS capabilities."""
     logger.info("=== OpenAI TTS Information ===")
@@ -296,18 +273,21 @@ async def main():
     
     print_tts_info()
     
+    # One client (and connection pool) for the whole run
+    client = create_openai_client()
+    
     try:
         # Run tests
-        logger.info("\n" + "="*60)
+        logger.info("\n%s", _SEP)
         
-        voice_test_success = await test_openai_tts_directly()
-        model_test_success = await test_tts_models()
-        characteristics_test_success = await test_voice_characteristics()
+        voice_test_success = await test_openai_tts_directly(client)
+        model_test_success = await test_tts_models(client)
+        characteristics_test_success = await test_voice_characteristics(client)
         
         # Summary
-        logger.info("\n" + "="*60)
+        logger.info("\n%s", _SEP)
         logger.info("🎯 TTS Voice Testing Results")
-        logger.info("="*60)
+        logger.info(_SEP)
         
         tests = [
             ("Voice Options", voice_test_success),
@@ -320,26 +300,26 @@ async def main():
         
         for test_name, success in tests:
             status = "✅ PASSED" if success else "❌ FAILED"
-            logger.info(f"{test_name}: {status}")
+            logger.info("%s: %s", test_name, status)
         
-        logger.info(f"\nOverall: {passed}/{total} tests passed")
+        logger.info("\nOverall: %s/%s tests passed", passed, total)
         
         if passed == total:
             logger.info("🎉 All TTS voice tests passed successfully!")
         else:
-            logger.warning(f"⚠️  {total - passed} tests failed")
+            logger.warning("⚠️  %s tests failed", total - passed)
         
-        # Ask user if they want to clean up
-        logger.info("\n💡 Generated audio files are saved in temporary directory")
+        logger.info("\n💡 Generated audio files are kept in %s", TTS_CACHE_DIR)
         logger.info("   You can play them to hear the different voices")
-        logger.info("   Run cleanup to remove temporary files")
-        
-        # Cleanup
-        await cleanup_temp_files()
+        logger.info("   Re-runs reuse them; delete the directory to free the space")
         
     except Exception as e:
-        logger.error(f"\n💥 Test suite failed with error: {e}")
+        logger.error("\n💥 Test suite failed with error: %s", e)
         sys.exit(1)
+    finally:
+        await cleanup_temp_files()
+        if client:
+            await client.close()
 
 
 if __name__ == "__main__":
@@ -1,18 +1,20 @@
 #!/usr/bin/env python3
 """
 Test script for OpenAI TTS that loads API key from .env file and generates audio clips.
+
+Audio comes from the shared cache in tts_test_utils ($TMPDIR/buzz_tts_cache,
+keyed by model, voice and script) and is copied into tts_output/; set
+TTS_CACHE_BUST=1 to regenerate it.
 """
 
 import asyncio
 import os
 import sys
 import logging
-import tempfile
+import time
 from pathlib import Path
-from openai import AsyncOpenAI
 
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+from tts_test_utils import create_openai_client, synthesize_to_file
 
 # Set up logging
 logging.basicConfig(
@@ -21,6 +23,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Generated audio files land here
+OUTPUT_DIR = Path(__file__).parent / "tts_output"
+OUTPUT_DIR.mkdir(exist_ok=True)
+
 
 def load_env_file():
     """Load environment variables from .env file in parent directory."""
@@ -29,36 +35,23 @@ def load_env_file():
     
     if env_path.exists():
         logger.info(f"Loading .env file from: {env_path}")
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key] = value
-                    logger.info(f"Loaded {key}")
+        lines = (line.strip() for line in env_path.read_text().splitlines())
+        pairs = dict(
+            line.split('=', 1)
+            for line in lines
+            if line and not line.startswith('#') and '=' in line
+        )
+        os.environ.update(pairs)
+        logger.info("Loaded %d env vars: %s", len(pairs), ", ".join(pairs))
         return True
     else:
         logger.error(f".env file not found at: {env_path}")
         return False
 
 
-async def test_tts_with_different_voices():
+async def test_tts_with_different_voices(client):
     """Test TTS with different voices and generate audio files."""
     
-    # Load environment variables
-    if not load_env_file():
-        return False
-    
-    # Check if API key is loaded
-    if not os.getenv('OPENAI_API_KEY'):
-        logger.error("❌ OPENAI_API_KEY not found after loading .env file!")
-        return False
-    
-    logger.info("✅ OpenAI API key loaded successfully")
-    
-    # Initialize OpenAI client
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Test script
     test_script = "Hello! This is a test of OpenAI's text-to-speech functionality. Your email has been converted into engaging audio content for TikTok-style videos!"
     
@@ -67,117 +60,98 @@ async def test_tts_with_different_voices():
     # Test different voices
     voices = ["nova", "alloy", "echo", "onyx"]
     
-    generated_files = []
+    async def _synthesize(voice):
+        logger.info(f"\n🎙️ Generating audio with voice: {voice}")
+        
+        # Write audio to a file named after the voice
+        output_file = OUTPUT_DIR / f"test_audio_{voice}.mp3"
+        
+        if await synthesize_to_file(client, "tts-1", voice, test_script, output_file):
+            logger.info(f"♻️ Reused cached audio for voice: {voice}")
+        
+        file_size = output_file.stat().st_size
+        logger.info(f"✅ Generated: {output_file}")
+        logger.info(f"   File size: {file_size:,} bytes")
+        return voice, str(output_file), file_size
     
-    for voice in voices:
-        try:
-            logger.info(f"\n🎙️ Generating audio with voice: {voice}")
-            
-            # Call TTS API
-            response = await client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=test_script
-            )
-            
-            # Save audio to file with voice name
-            output_dir = Path(__file__).parent / "tts_output"
-            output_dir.mkdir(exist_ok=True)
-            
-            output_file = output_dir / f"test_audio_{voice}.mp3"
-            
-            with open(output_file, "wb") as f:
-                f.write(response.content)
-            
-            file_size = output_file.stat().st_size
-            generated_files.append((voice, str(output_file), file_size))
-            
-            logger.info(f"✅ Generated: {output_file}")
-            logger.info(f"   File size: {file_size:,} bytes")
-            
-        except Exception as e:
-            logger.error(f"❌ Voice '{voice}' failed: {e}")
+    results = await asyncio.gather(*[_synthesize(v) for v in voices], return_exceptions=True)
+    
+    generated_files = []
+    for voice, result in zip(voices, results):
+        if isinstance(result, Exception):
+            logger.error(f"❌ Voice '{voice}' failed: {result}")
+        else:
+            generated_files.append(result)
     
     # Summary
     if generated_files:
-        logger.info(f"\n🎵 Successfully generated {len(generated_files)} audio files:")
+        logger.info("\n🎵 Successfully generated %d audio files:", len(generated_files))
         logger.info("=" * 60)
         
-        for voice, file_path, file_size in generated_files:
-            logger.info(f"🎙️ {voice}: {file_path} ({file_size:,} bytes)")
+        logger.info("%s", "\n".join(
+            f"🎙️ {voice}: {file_path} ({file_size:,} bytes)"
+            for voice, file_path, file_size in generated_files
+        ))
         
-        logger.info("\n💡 You can play these audio files to hear the different voices:")
-        for voice, file_path, file_size in generated_files:
-            logger.info(f"   open '{file_path}'  # {voice} voice")
+        logger.info("\n💡 You can play these audio files to hear the different voices:\n%s", "\n".join(
+            f"   open '{file_path}'  # {voice} voice"
+            for voice, file_path, _ in generated_files
+        ))
         
-        logger.info(f"\n📁 Audio files saved in: {output_dir}")
+        logger.info("\n📁 Audio files saved in: %s", OUTPUT_DIR)
         return True
     else:
         logger.error("❌ No audio files were generated")
         return False
 
 
-async def test_tts_models():
+async def test_tts_models(client):
     """Test different TTS models."""
     
-    if not os.getenv('OPENAI_API_KEY'):
-        logger.error("❌ OPENAI_API_KEY not found")
-        return False
-    
     logger.info("\n=== Testing Different TTS Models ===")
     
-    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # Test script
     test_script = "This is a comparison between OpenAI's standard and high-definition text-to-speech models. Notice the difference in quality!"
     
     # Test models
     models = ["tts-1", "tts-1-hd"]
     
-    output_dir = Path(__file__).parent / "tts_output"
-    output_dir.mkdir(exist_ok=True)
+    async def _synthesize(model):
+        logger.info(f"\n🎛️ Testing model: {model}")
+        
+        # Save with model name
+        output_file = OUTPUT_DIR / f"test_audio_{model}.mp3"
+        
+        # Time the request (near zero on a cache hit)
+        start_time = time.perf_counter()
+        
+        if await synthesize_to_file(client, model, "nova", test_script, output_file):
+            logger.info(f"♻️ Reused cached audio for model: {model}")
+        
+        duration = time.perf_counter() - start_time
+        
+        file_size = output_file.stat().st_size
+        logger.info(f"✅ Generated in {duration:.2f}s: {output_file}")
+        logger.info(f"   File size: {file_size:,} bytes")
+        return model, str(output_file), file_size, duration
     
-    generated_files = []
+    results = await asyncio.gather(*[_synthesize(m) for m in models], return_exceptions=True)
     
-    for model in models:
-        try:
-            logger.info(f"\n🎛️ Testing model: {model}")
-            
-            # Time the request
-            import time
-            start_time = time.time()
-            
-            response = await client.audio.speech.create(
-                model=model,
-                voice="nova",
-                input=test_script
-            )
-            
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            # Save with model name
-            output_file = output_dir / f"test_audio_{model}.mp3"
-            
-            with open(output_file, "wb") as f:
-                f.write(response.content)
-            
-            file_size = output_file.stat().st_size
-            generated_files.append((model, str(output_file), file_size, duration))
-            
-            logger.info(f"✅ Generated in {duration:.2f}s: {output_file}")
-            logger.info(f"   File size: {file_size:,} bytes")
-            
-        except Exception as e:
-            logger.error(f"❌ Model '{model}' failed: {e}")
+    generated_files = []
+    for model, result in zip(models, results):
+        if isinstance(result, Exception):
+            logger.error(f"❌ Model '{model}' failed: {result}")
+        else:
+            generated_files.append(result)
     
     # Summary
     if generated_files:
-        logger.info(f"\n📊 Model Comparison Results:")
+        logger.info("\n📊 Model Comparison Results:")
         logger.info("=" * 50)
-        for model, file_path, file_size, duration in generated_files:
-            logger.info(f"🎛️ {model}: {file_size:,} bytes, {duration:.2f}s")
-            logger.info(f"   File: {file_path}")
+        logger.info("%s", "\n".join(
+            f"🎛️ {model}: {file_size:,} bytes, {duration:.2f}s\n   File: {file_path}"
+            for model, file_path, file_size, duration in generated_files
+        ))
         
         if len(generated_files) == 2:
             tts1_size = generated_files[0][2]
@@ -188,18 +162,9 @@ async def test_tts_models():
     return len(generated_files) > 0
 
 
-async def test_complete_pipeline():
-    """Test the complete email to TTS pipeline."""
-    
-    logger.info("\n=== Testing Complete Email to TTS Pipeline ===")
-    
-    # Import the app modules
-    from app.email_parser import parse_email
-    from app.script_generator import generate_script_with_retry
-    from app.video_assembly import generate_audio
-    
-    # Sample email
-    test_email = {
+# Sample emails pushed through the complete pipeline
+SAMPLE_EMAILS = [
+    {
         'id': 'pipeline_test',
         'from': 'boss@company.com',
         'subject': 'URGENT: Team Meeting Tomorrow at 2 PM',
@@ -214,34 +179,108 @@ async def test_complete_pipeline():
         Best regards,
         Sarah
         '''
+    },
+    {
+        'id': 'pipeline_test_personal',
+        'from': 'friend@gmail.com',
+        'subject': 'Dinner Tonight?',
+        'body': 'Hey! Want to grab dinner at that new Italian place tonight? I heard great things about it!'
+    },
+    {
+        'id': 'pipeline_test_newsletter',
+        'from': 'news@techcrunch.com',
+        'subject': 'AI Breakthrough: New Model Released',
+        'body': 'A new AI model has just been released with big gains in reasoning and creativity.'
     }
+]
+
+# Max items each pipeline stage processes concurrently
+PIPELINE_BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', '4'))
+
+# Queued after the last email to shut each stage down in turn
+_STAGE_DONE = object()
+
+
+async def _stage_worker(inbox, outbox, step, batch_size):
+    """
+    Run one pipeline stage: apply step to up to batch_size records at once and
+    pass each record on as soon as its step finishes, so the next stage starts
+    on it while this one keeps working.
+    
+    Records that already failed are forwarded without running step.
+    """
+    semaphore = asyncio.Semaphore(batch_size)
+    
+    async def run(record):
+        if 'error' not in record:
+            try:
+                async with semaphore:
+                    await step(record)
+            except Exception as e:
+                record['error'] = e
+        outbox.put_nowait(record)
+    
+    tasks = []
+    while (record := await inbox.get()) is not _STAGE_DONE:
+        tasks.append(asyncio.create_task(run(record)))
+    await asyncio.gather(*tasks)
+    outbox.put_nowait(_STAGE_DONE)
+
+
+async def test_complete_pipeline(emails=SAMPLE_EMAILS, batch_size=PIPELINE_BATCH_SIZE):
+    """Test the complete email to TTS pipeline on several emails at once."""
+    
+    logger.info("\n=== Testing Complete Email to TTS Pipeline ===")
+    
+    # Import the app modules
+    from app.email_parser import parse_email
+    from app.script_generator import generate_script_with_retry
+    from app.video_assembly import generate_audio
+    
+    async def write_script(record):
+        record['script'] = await generate_script_with_retry(record['parsed'])
+    
+    async def write_audio(record):
+        record['audio_url'] = await generate_audio(record['script'])
+    
+    script_queue, tts_queue, done_queue = asyncio.Queue(), asyncio.Queue(), asyncio.Queue()
     
     try:
-        logger.info("Step 1: Parsing email...")
-        parsed_email = parse_email(test_email)
-        logger.info(f"✅ Parsed: {parsed_email['subject']}")
-        
-        logger.info("Step 2: Generating script...")
-        script = await generate_script_with_retry(parsed_email)
-        logger.info(f"✅ Generated script: '{script}'")
+        start_time = time.perf_counter()
         
-        logger.info("Step 3: Generating TTS audio...")
-        audio_url = await generate_audio(script)
-        logger.info(f"✅ Generated audio: {audio_url}")
+        # Step 1: parsing is cheap and synchronous, so it just feeds the script stage
+        records = [{'email': email, 'parsed': parse_email(email)} for email in emails]
+        for record in records:
+            script_queue.put_nowait(record)
+        script_queue.put_nowait(_STAGE_DONE)
+        logger.info(f"✅ Parsed {len(records)} emails")
         
-        # Display final result
-        logger.info("\n" + "="*60)
-        logger.info("🎉 COMPLETE PIPELINE SUCCESSFUL!")
-        logger.info(f"📧 Email: {test_email['subject']}")
-        logger.info(f"📝 Script: '{script}'")
-        logger.info(f"🎙️ Audio: {audio_url}")
-        logger.info("="*60)
-        
-        return True
+        # Steps 2 and 3: script generation and TTS overlap across emails
+        await asyncio.gather(
+            _stage_worker(script_queue, tts_queue, write_script, batch_size),
+            _stage_worker(tts_queue, done_queue, write_audio, batch_size)
+        )
         
+        duration = time.perf_counter() - start_time
     except Exception as e:
         logger.error(f"❌ Pipeline test failed: {e}")
         return False
+    
+    # Display final result
+    failed = [r for r in records if 'error' in r]
+    logger.info("\n".join(
+        f"❌ {r['email']['subject']}: {r['error']}" if 'error' in r else
+        f"📧 Email: {r['email']['subject']}\n📝 Script: '{r['script']}'\n🎙️ Audio: {r['audio_url']}"
+        for r in records
+    ))
+    logger.info("\n" + "="*60)
+    if failed:
+        logger.error(f"❌ Pipeline failed for {len(failed)}/{len(records)} emails")
+    else:
+        logger.info(f"🎉 COMPLETE PIPELINE SUCCESSFUL! {len(records)} emails in {duration:.2f}s")
+    logger.info("="*60)
+    
+    return not failed
 
 
 async def main():
@@ -249,56 +288,62 @@ async def main():
     logger.info("🚀 Starting TTS Test with .env file loading")
     logger.info("=" * 60)
     
-    try:
-        # Run tests
-        test_results = []
-        
-        # Test different voices
-        logger.info("\n" + "="*60)
-        voices_success = await test_tts_with_different_voices()
-        test_results.append(("Voice Testing", voices_success))
-        
-        # Test different models
-        models_success = await test_tts_models()
-        test_results.append(("Model Testing", models_success))
-        
-        # Test complete pipeline
-        pipeline_success = await test_complete_pipeline()
-        test_results.append(("Complete Pipeline", pipeline_success))
-        
-        # Summary
-        logger.info("\n" + "="*60)
-        logger.info("🎯 TEST RESULTS SUMMARY")
-        logger.info("="*60)
-        
-        passed = sum(1 for _, success in test_results if success)
-        total = len(test_results)
-        
-        for test_name, success in test_results:
-            status = "✅ PASSED" if success else "❌ FAILED"
-            logger.info(f"{test_name}: {status}")
-        
-        logger.info(f"\nOverall: {passed}/{total} tests passed")
-        
-        if passed == total:
-            logger.info("🎉 All TTS tests passed successfully!")
-        else:
-            logger.warning(f"⚠️  {total - passed} tests failed")
-        
-        # Show output directory
-        output_dir = Path(__file__).parent / "tts_output"
-        if output_dir.exists():
-            audio_files = list(output_dir.glob("*.mp3"))
-            if audio_files:
-                logger.info(f"\n🎵 Generated {len(audio_files)} audio files in:")
-                logger.info(f"   {output_dir}")
-                logger.info("\n💡 You can play these files to hear the TTS output:")
-                for audio_file in audio_files:
-                    logger.info(f"   open '{audio_file}'")
-        
-    except Exception as e:
-        logger.error(f"\n💥 Test suite failed with error: {e}")
+    # Load environment variables
+    if not load_env_file() or not os.getenv('OPENAI_API_KEY'):
+        logger.error("❌ OPENAI_API_KEY not found after loading .env file!")
         sys.exit(1)
+    
+    logger.info("✅ OpenAI API key loaded successfully")
+    
+    async with create_openai_client() as client:
+        try:
+            # Run the independent suites concurrently; they share the client
+            # and the TTS semaphore bounds total in-flight requests
+            logger.info("\n" + "="*60)
+            results = await asyncio.gather(
+                test_tts_with_different_voices(client),
+                test_tts_models(client),
+                test_complete_pipeline(),
+                return_exceptions=True
+            )
+            test_results = [
+                (name, bool(result) and not isinstance(result, Exception))
+                for name, result in zip(["Voice Testing", "Model Testing", "Complete Pipeline"], results)
+            ]
+            
+            # Summary
+            logger.info("\n" + "="*60)
+            logger.info("🎯 TEST RESULTS SUMMARY")
+            logger.info("="*60)
+            
+            passed = sum(1 for _, success in test_results if success)
+            total = len(test_results)
+            
+            logger.info("%s", "\n".join(
+                f"{test_name}: {'✅ PASSED' if success else '❌ FAILED'}"
+                for test_name, success in test_results
+            ))
+            
+            logger.info("\nOverall: %d/%d tests passed", passed, total)
+            
+            if passed == total:
+                logger.info("🎉 All TTS tests passed successfully!")
+            else:
+                logger.warning("⚠️  %d tests failed", total - passed)
+            
+            # Show output directory
+            audio_files = list(OUTPUT_DIR.glob("*.mp3"))
+            if audio_files:
+                logger.info(
+                    "\n🎵 Generated %d audio files in:\n   %s\n"
+                    "\n💡 You can play these files to hear the TTS output:\n%s",
+                    len(audio_files), OUTPUT_DIR,
+                    "\n".join(f"   open '{audio_file}'" for audio_file in audio_files)
+                )
+            
+        except Exception as e:
+            logger.error(f"\n💥 Test suite failed with error: {e}")
+            sys.exit(1)
 
 
 if __name__ == "__main__":
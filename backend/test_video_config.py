@@ -4,11 +4,6 @@ Test script to show video configuration options.
 """
 
 import os
-import sys
-from pathlib import Path
-
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.video_config import (
     video_config, 
@@ -62,9 +57,9 @@ def main():
     ]
     
     for title, content in sample_emails:
+        matched = video_config.match_content_categories(content)
         selected = video_config.select_video(email_content=content)
-        video_name = Path(selected).name
-        print(f"📧 {title}: {video_name}")
+        print(f"📧 {title}: {os.path.basename(selected)} (keywords: {', '.join(matched) or 'none'})")
     
     print()
     print("⚙️  Configuration Options:")
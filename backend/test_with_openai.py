@@ -6,12 +6,8 @@ Set your OPENAI_API_KEY environment variable to test with real API calls.
 
 import asyncio
 import os
-import sys
 import logging
 
-# Add the app directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
-
 from app.email_parser import parse_email
 from app.script_generator import generate_script
 
@@ -115,20 +111,23 @@ async def test_multiple_emails():
     
     logger.info("🧪 Testing multiple email types...")
     
-    for i, email in enumerate(test_emails, 1):
+    async def _process(email):
+        parsed = parse_email(email)
+        return await generate_script(parsed)
+    
+    # Generate all transcripts concurrently; gather keeps input order for logging
+    results = await asyncio.gather(*[_process(e) for e in test_emails], return_exceptions=True)
+    
+    for i, (email, transcript) in enumerate(zip(test_emails, results), 1):
         logger.info(f"\n--- Test {i}: {email['id']} ---")
         
-        try:
-            parsed = parse_email(email)
-            transcript = await generate_script(parsed)
-            
-            logger.info(f"Original: {email['subject']}")
-            logger.info(f"Transcript: '{transcript}'")
-            logger.info(f"Length: {len(transcript)} chars")
-            
-        except Exception as e:
-            logger.error(f"❌ Failed for {email['id']}: {e}")
-
+        if isinstance(transcript, Exception):
+            logger.error(f"❌ Failed for {email['id']}: {transcript}")
+            continue
+        
+        logger.info(f"Original: {email['subject']}")
+        logger.info(f"Transcript: '{transcript}'")
+        logger.info(f"Length: {len(transcript)} chars")
 
 if __name__ == "__main__":
     print("🚀 Email to Transcript Test")
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import pytest
+
+# Run async tests on the same event loop as production when it is installed
+# (pytest-asyncio creates each test's loop from the current policy)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+STUB_SCRIPT = "Stub script from the test OpenAI client"
+
+
+def _fake_openai_client() -> MagicMock:
+    """OpenAI client stand-in whose chat and speech calls return canned responses"""
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(
+        return_value=Mock(choices=[Mock(message=Mock(content=STUB_SCRIPT))])
+    )
+    client.audio.speech.create = AsyncMock(return_value=Mock(content=b"stub_audio_data"))
+    return client
+
+
+@pytest.fixture(autouse=True)
+def openai_stub(monkeypatch):
+    """Keep unit tests off the network: the shared OpenAI clients are stubs"""
+    client = _fake_openai_client()
+    monkeypatch.setattr('app.script_generator.openai_client', client)
+    monkeypatch.setattr('app.video_assembly.openai_client', client)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def software_encoder(monkeypatch):
+    """Use libx264 so building ffmpeg commands never spawns encoder probes"""
+    monkeypatch.setenv('FFMPEG_VCODEC', 'libx264')
+
+
+@pytest.fixture
+def mock_pipeline(monkeypatch):
+    """Patch the process_email pipeline steps and return their mocks"""
+    mocks = SimpleNamespace(
+        parse=Mock(),
+        script=AsyncMock(),
+        audio=AsyncMock(),
+        video=AsyncMock(),
+        fallback=AsyncMock()
+    )
+    monkeypatch.setattr('app.video_generator.parse_email', mocks.parse)
+    monkeypatch.setattr('app.video_generator.generate_script_with_retry', mocks.script)
+    monkeypatch.setattr('app.video_generator.generate_audio', mocks.audio)
+    monkeypatch.setattr('app.video_generator.assemble_video', mocks.video)
+    monkeypatch.setattr('app.video_generator.get_fallback_video', mocks.fallback)
+    return mocks
+
+
+@pytest.fixture
+def mock_assembly_io(monkeypatch):
+    """Patch storage, ffmpeg and thumbnail I/O used by assemble_video and return their mocks"""
+    mocks = SimpleNamespace(
+        download=AsyncMock(return_value="/tmp/audio.mp3"),
+        ffmpeg_run=Mock(),
+        upload=AsyncMock(),
+        thumbnail=AsyncMock(return_value="gs://bucket/thumbnails/thumb.jpg")
+    )
+    monkeypatch.setattr('app.video_assembly.download_from_storage', mocks.download)
+    monkeypatch.setattr('app.video_assembly.ffmpeg.run', mocks.ffmpeg_run)
+    monkeypatch.setattr('app.video_assembly.upload_to_storage', mocks.upload)
+    monkeypatch.setattr('app.video_assembly.generate_thumbnail', mocks.thumbnail)
+    return mocks
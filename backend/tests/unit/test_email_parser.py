@@ -3,59 +3,53 @@ from unittest.mock import Mock, patch
 from app.email_parser import parse_email, EmailParseError
 
 
-def test_parse_email_basic():
-    """Test basic email parsing with all fields present"""
-    email_data = {
-        'from': 'boss@work.com',
-        'subject': 'Important Meeting',
-        'body': 'We need to discuss the quarterly reports tomorrow at 2 PM.',
-        'id': 'msg_123'
-    }
-    
+FALLBACK_FIELDS = {'from': 'Unknown', 'subject': 'No subject', 'body': ''}
+
+
+@pytest.mark.parametrize("email_data,expected", [
+    pytest.param(
+        {
+            'from': 'boss@work.com',
+            'subject': 'Important Meeting',
+            'body': 'We need to discuss the quarterly reports tomorrow at 2 PM.',
+            'id': 'msg_123'
+        },
+        {
+            'from': 'boss@work.com',
+            'subject': 'Important Meeting',
+            'body': 'We need to discuss the quarterly reports tomorrow at 2 PM.',
+            'id': 'msg_123'
+        },
+        id="basic"
+    ),
+    pytest.param({}, FALLBACK_FIELDS, id="empty"),
+    pytest.param(None, FALLBACK_FIELDS, id="none_input"),
+    pytest.param(
+        {'from': 'test@example.com'},
+        {'from': 'test@example.com', 'subject': 'No subject', 'body': ''},
+        id="missing_fields"
+    ),
+    pytest.param(
+        {'from': 'test@example.com', 'body': 'A' * 1000},
+        {'from': 'test@example.com', 'body': 'A' * 500, 'body_len': 500},
+        id="long_body"
+    ),
+])
+def test_parse_email_cases(email_data, expected):
+    """Test field extraction, fallbacks and body truncation"""
     result = parse_email(email_data)
     
-    assert result['from'] == 'boss@work.com'
-    assert result['subject'] == 'Important Meeting'
-    assert result['body'] == 'We need to discuss the quarterly reports tomorrow at 2 PM.'
-    assert result['id'] == 'msg_123'
-    assert len(result['body']) <= 500  # Body should be truncated
-
-
-def test_parse_email_empty():
-    """Test parsing empty email returns fallback values"""
-    result = parse_email({})
+    for field, value in expected.items():
+        if field != 'body_len':
+            assert result[field] == value
     
-    assert result['from'] == 'Unknown'
-    assert result['subject'] == 'No subject'
-    assert result['body'] == ''
+    body_len = expected.get('body_len')
+    if body_len is not None:
+        assert len(result['body']) == body_len
+    assert len(result['body']) <= 500  # Body should be truncated
     assert result['id'] is not None
 
 
-def test_parse_email_missing_fields():
-    """Test parsing email with missing fields"""
-    email_data = {'from': 'test@example.com'}
-    
-    result = parse_email(email_data)
-    
-    assert result['from'] == 'test@example.com'
-    assert result['subject'] == 'No subject'
-    assert result['body'] == ''
-
-
-def test_parse_email_long_body():
-    """Test body truncation for long emails"""
-    long_body = 'A' * 1000  # 1000 character body
-    email_data = {
-        'from': 'test@example.com',
-        'body': long_body
-    }
-    
-    result = parse_email(email_data)
-    
-    assert len(result['body']) == 500
-    assert result['body'] == 'A' * 500
-
-
 def test_parse_email_html_body():
     """Test parsing HTML email body"""
     html_body = '<p>This is a <strong>test</strong> email with <a href="#">links</a></p>'
@@ -86,15 +80,6 @@ def test_parse_email_special_characters():
     assert '•' in result['body']
 
 
-def test_parse_email_none_input():
-    """Test parsing None input"""
-    result = parse_email(None)
-    
-    assert result['from'] == 'Unknown'
-    assert result['subject'] == 'No subject'
-    assert result['body'] == ''
-
-
 def test_parse_email_invalid_type():
     """Test parsing invalid input type"""
     with pytest.raises(EmailParseError):
@@ -127,4 +112,19 @@ def test_clean_email_body():
     quoted_text = 'New message\n\nOn Mon, Jan 1, 2024 at 10:00 AM, someone wrote:\n> Old message'
     cleaned = clean_email_body(quoted_text)
     assert 'New message' in cleaned
-    assert 'Old message' not in cleaned
\ No newline at end of file
+    assert 'Old message' not in cleaned
+
+def test_is_signature_line():
+    """Test signature detection with the precompiled pattern"""
+    import re
+    from app.email_parser import _is_signature_line, _SIGNATURE_RE
+    
+    # Keep the compiled-constant form so lines don't re-resolve patterns
+    assert isinstance(_SIGNATURE_RE, re.Pattern)
+    
+    assert _is_signature_line('Sent from my iPhone')
+    assert _is_signature_line('On Mon, Jan 1, 2024 at 10:00 AM, someone wrote:')
+    assert _is_signature_line('--')
+    assert _is_signature_line('')
+    assert not _is_signature_line('-- not a separator')
+    assert not _is_signature_line('The deploy is done')
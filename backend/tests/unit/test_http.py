@@ -0,0 +1,29 @@
+import asyncio
+
+from app.http import close_shared_client, get_shared_client
+
+
+def test_shared_client_per_event_loop():
+    """Test each asyncio.run gets its own pool instead of one bound to a closed loop"""
+    async def _get_client():
+        client = get_shared_client()
+        assert get_shared_client() is client
+        return client
+    
+    first = asyncio.run(_get_client())
+    second = asyncio.run(_get_client())
+    
+    assert second is not first
+    assert not second.is_closed
+
+
+def test_close_shared_client():
+    """Test shutdown closes the running loop's pool and a later call opens a new one"""
+    async def _close_and_reopen():
+        client = get_shared_client()
+        await close_shared_client()
+        assert client.is_closed
+        assert get_shared_client() is not client
+        await close_shared_client()
+    
+    asyncio.run(_close_and_reopen())
@@ -0,0 +1,63 @@
+import datetime
+import json
+
+import pytest
+
+from app import monitoring
+from app.monitoring import json_dumps
+
+LOG_RECORD = {
+    'message': 'email_received',
+    'timestamp': datetime.datetime(2024, 1, 1, 12, 30),
+    'subject': 'Meeting 📅',
+    1: 'non-string key'
+}
+
+
+def test_email_data_serialization_roundtrip():
+    """Test email payloads serialize to the same JSON with or without orjson"""
+    email_data = {
+        'id': 'msg_123',
+        'from': 'boss@work.com',
+        'subject': 'Meeting 📅',
+        'body': 'Important meeting about project updates',
+        'labels': ['INBOX', 'IMPORTANT']
+    }
+    
+    serialized = json_dumps(email_data)
+    
+    assert isinstance(serialized, str)
+    assert json.loads(serialized) == email_data
+    # Values the stdlib encoder rejects still serialize
+    assert json.loads(json_dumps({1: datetime.datetime(2024, 1, 1)}))
+
+
+@pytest.mark.skipif(monitoring.orjson is None, reason="orjson not installed")
+def test_json_dumps_orjson_matches_stdlib(monkeypatch):
+    """Test orjson and the stdlib fallback encode log records the same way"""
+    fast = json_dumps(LOG_RECORD, ensure_ascii=False)
+    monkeypatch.setattr('app.monitoring.orjson', None)
+    fallback = json_dumps(LOG_RECORD, ensure_ascii=False)
+    
+    assert json.loads(fast) == json.loads(fallback)
+    # Naive timestamps stay naive (no +00:00 suffix) and text stays UTF-8
+    assert '"2024-01-01T12:30:00"' in fast
+    assert 'Meeting 📅' in fast and 'Meeting 📅' in fallback
+
+
+def test_json_dumps_fallback_honors_encoder_options(monkeypatch):
+    """Test the stdlib fallback uses the caller's encoder class and ensure_ascii"""
+    class Marker:
+        def __str__(self):
+            return 'marker'
+    
+    class UpperEncoder(json.JSONEncoder):
+        def default(self, obj):
+            return str(obj).upper()
+    
+    monkeypatch.setattr('app.monitoring.orjson', None)
+    
+    serialized = json_dumps({'subject': 'Café', 'tag': Marker()}, cls=UpperEncoder, ensure_ascii=True)
+    
+    assert '\\u00e9' in serialized
+    assert json.loads(serialized) == {'subject': 'Café', 'tag': 'MARKER'}
@@ -1,6 +1,14 @@
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
-from app.script_generator import generate_script, ScriptGenerationError, generate_script_with_retry
+from app.script_generator import generate_script, ScriptGenerationError, generate_script_with_retry, _script_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_script_cache():
+    """Keep cached scripts from leaking between tests"""
+    _script_cache.clear()
+    yield
+    _script_cache.clear()
 
 
 @pytest.mark.asyncio
@@ -17,7 +25,7 @@ async def test_generate_script_basic():
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "Boss wants a meeting tomorrow about quarterly reports"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         script = await generate_script(email_data)
         
@@ -26,6 +34,23 @@ async def test_generate_script_basic():
         assert len(script) > 0
 
 
+@pytest.mark.asyncio
+async def test_generate_script_cache_hit(openai_stub):
+    """Test identical emails reuse the cached script instead of calling OpenAI"""
+    email_data = {
+        'from': 'news@weekly.com',
+        'subject': 'Weekly Digest',
+        'body': 'Your weekly roundup of top stories.',
+        'id': 'msg_123'
+    }
+    
+    first = await generate_script(email_data)
+    second = await generate_script({**email_data, 'id': 'msg_456'})
+    
+    assert first == second == openai_stub.chat.completions.create.return_value.choices[0].message.content
+    assert openai_stub.chat.completions.create.call_count == 1
+
+
 @pytest.mark.asyncio
 async def test_generate_script_length_constraint():
     """Test script respects length constraints"""
@@ -42,7 +67,7 @@ async def test_generate_script_length_constraint():
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = long_script
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         script = await generate_script(email_data)
         
@@ -76,7 +101,7 @@ async def test_generate_script_openai_failure():
     }
     
     with patch('app.script_generator.openai_client') as mock_client:
-        mock_client.chat.completions.create.side_effect = Exception("API Error")
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
         
         script = await generate_script(email_data)
         
@@ -148,6 +173,58 @@ async def test_generate_script_with_retry_all_failures():
         assert mock_generate.call_count == 3
 
 
+@pytest.mark.asyncio
+async def test_generate_script_with_retry_honors_retry_after(openai_stub):
+    """Test rate limits are retried after the server's Retry-After delay"""
+    import httpx
+    from openai import RateLimitError
+    
+    email_data = {
+        'from': 'test@example.com',
+        'subject': 'Test',
+        'body': 'Test body',
+        'id': 'msg_123'
+    }
+    response = httpx.Response(429, headers={'retry-after': '0.5'},
+                              request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+    openai_stub.chat.completions.create.side_effect = [
+        RateLimitError("Rate limit exceeded", response=response, body=None),
+        openai_stub.chat.completions.create.return_value
+    ]
+    
+    with patch('app.script_generator.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+        result = await generate_script_with_retry(email_data, max_retries=3)
+    
+    assert result == openai_stub.chat.completions.create.return_value.choices[0].message.content
+    mock_sleep.assert_awaited_once_with(0.5)
+
+
+@pytest.mark.asyncio
+async def test_generate_script_with_retry_caps_retry_after(openai_stub):
+    """Test a large Retry-After is capped instead of stalling the pipeline"""
+    import httpx
+    from openai import RateLimitError
+    from app.script_generator import RETRY_AFTER_MAX_DELAY
+    
+    email_data = {
+        'from': 'test@example.com',
+        'subject': 'Test',
+        'body': 'Test body',
+        'id': 'msg_123'
+    }
+    response = httpx.Response(429, headers={'retry-after': '3600'},
+                              request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+    openai_stub.chat.completions.create.side_effect = [
+        RateLimitError("Rate limit exceeded", response=response, body=None),
+        openai_stub.chat.completions.create.return_value
+    ]
+    
+    with patch('app.script_generator.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+        await generate_script_with_retry(email_data, max_retries=3)
+    
+    mock_sleep.assert_awaited_once_with(RETRY_AFTER_MAX_DELAY)
+
+
 def test_create_script_prompt():
     """Test script prompt creation"""
     from app.script_generator import create_script_prompt
@@ -231,7 +308,7 @@ async def test_generate_script_different_email_types():
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "Generated script"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         # All should generate valid scripts
         work_script = await generate_script(work_email)
@@ -1,8 +1,9 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import MagicMock, Mock, patch, AsyncMock
 import tempfile
 import os
-from app.video_assembly import assemble_video, VideoAssemblyError, generate_audio, get_background_video
+from app.video_assembly import assemble_video, VideoAssemblyError, generate_audio, get_background_video, _tts_batcher, TTSBatcher
 
 
 @pytest.mark.asyncio
@@ -16,18 +17,32 @@ async def test_generate_audio_success():
         mock_response.content = b"fake_audio_data"
         mock_client.audio.speech.create = AsyncMock(return_value=mock_response)
         
-        with patch('app.video_assembly.upload_to_storage') as mock_upload:
-            with patch('tempfile.NamedTemporaryFile') as mock_temp:
-                with patch('os.unlink') as mock_unlink:
-                    mock_temp_file = Mock()
-                    mock_temp_file.name = "/tmp/test_audio.mp3"
-                    mock_temp.return_value = mock_temp_file
-                    mock_upload.return_value = "gs://bucket/audio/test.mp3"
-                    
-                    audio_url = await generate_audio(script)
-                    
-                    assert audio_url == "gs://bucket/audio/test.mp3"
-                    mock_client.audio.speech.create.assert_called_once()
+        with patch('app.video_assembly.upload_bytes_to_storage') as mock_upload:
+            with patch('app.video_assembly._save_audio') as mock_save:
+                mock_upload.return_value = "gs://bucket/audio/test.mp3"
+                
+                audio_url = await generate_audio(script)
+                
+                assert audio_url == "gs://bucket/audio/test.mp3"
+                mock_client.audio.speech.create.assert_called_once()
+                mock_upload.assert_called_once()
+                assert mock_upload.call_args.args[0] == b"fake_audio_data"
+                mock_save.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_generate_audio_without_upload(openai_stub):
+    """Test audio kept local for assembly skips the storage upload"""
+    with patch('app.video_assembly.upload_bytes_to_storage') as mock_upload:
+        audio_path = await generate_audio("This is a test script for audio generation", upload=False)
+    
+    try:
+        assert os.path.exists(audio_path)
+        with open(audio_path, 'rb') as f:
+            assert f.read() == b"stub_audio_data"
+        mock_upload.assert_not_called()
+    finally:
+        os.unlink(audio_path)
 
 
 @pytest.mark.asyncio
@@ -36,7 +51,7 @@ async def test_generate_audio_openai_failure():
     script = "Test script"
     
     with patch('app.video_assembly.openai_client') as mock_client:
-        mock_client.audio.speech.create.side_effect = Exception("API Error")
+        mock_client.audio.speech.create = AsyncMock(side_effect=Exception("API Error"))
         
         audio_url = await generate_audio(script)
         
@@ -44,6 +59,36 @@ async def test_generate_audio_openai_failure():
         assert audio_url == "assets/default_audio.mp3"
 
 
+@pytest.mark.asyncio
+async def test_generate_audio_batches_concurrent_calls(openai_stub):
+    """Test concurrent audio requests are flushed together"""
+    scripts = [f"Concurrent test script number {i}" for i in range(3)]
+    
+    with patch('app.video_assembly.upload_bytes_to_storage', new=AsyncMock(side_effect=lambda data, dest: dest)):
+        with patch.object(_tts_batcher, '_flush', wraps=_tts_batcher._flush) as mock_flush:
+            audio_urls = await asyncio.gather(*[generate_audio(s, voice="nova") for s in scripts])
+    
+    assert len(set(audio_urls)) == 3
+    assert all(url.startswith("audio/") for url in audio_urls)
+    assert openai_stub.audio.speech.create.call_count == 3
+    mock_flush.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_tts_batcher_logs_failed_flush(caplog):
+    """Test a failing flush is logged and its task released"""
+    batcher = TTSBatcher(window_ms=0)
+    
+    with patch.object(batcher, '_flush', new=AsyncMock(side_effect=RuntimeError("boom"))):
+        submit = asyncio.create_task(batcher.submit("Test script", "nova"))
+        await asyncio.sleep(0.01)
+    
+    assert "TTS batch flush failed" in caplog.text
+    assert "boom" in caplog.text
+    assert not batcher._flush_tasks
+    submit.cancel()
+
+
 @pytest.mark.asyncio
 async def test_generate_audio_empty_script():
     """Test audio generation with empty script"""
@@ -78,7 +123,7 @@ def test_get_background_video_categories():
 
 
 @pytest.mark.asyncio
-async def test_assemble_video_success():
+async def test_assemble_video_success(mock_assembly_io):
     """Test successful video assembly"""
     audio_url = "gs://bucket/audio/test.mp3"
     email_data = {
@@ -88,16 +133,12 @@ async def test_assemble_video_success():
         'id': 'msg_123'
     }
     
-    with patch('app.video_assembly.download_from_storage') as mock_download:
-        with patch('app.video_assembly.ffmpeg.run') as mock_ffmpeg:
-            with patch('app.video_assembly.upload_to_storage') as mock_upload:
-                mock_download.return_value = "/tmp/audio.mp3"
-                mock_upload.return_value = "gs://bucket/videos/video_123.mp4"
-                
-                video_url = await assemble_video(audio_url, email_data)
-                
-                assert video_url == "gs://bucket/videos/video_123.mp4"
-                mock_ffmpeg.assert_called_once()
+    mock_assembly_io.upload.return_value = "gs://bucket/videos/video_123.mp4"
+    
+    video_url = await assemble_video(audio_url, email_data)
+    
+    assert video_url == "gs://bucket/videos/video_123.mp4"
+    mock_assembly_io.ffmpeg_run.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -137,6 +178,57 @@ async def test_assemble_video_invalid_audio():
             await assemble_video(audio_url, email_data)
 
 
+@pytest.mark.asyncio
+async def test_assemble_video_cleans_local_audio_on_failure():
+    """Test local audio is removed when assembly fails before using it"""
+    email_data = {'from': 'test@example.com', 'subject': 'Test', 'body': 'Body', 'id': 'msg_123'}
+    fd, audio_path = tempfile.mkstemp(suffix=".mp3")
+    os.close(fd)
+    
+    with patch('app.video_assembly.select_background_video', side_effect=Exception("No backgrounds")):
+        with pytest.raises(VideoAssemblyError):
+            await assemble_video(audio_path, email_data)
+    
+    assert not os.path.exists(audio_path)
+
+
+@pytest.mark.asyncio
+async def test_assemble_video_parallel_stages():
+    """Test independent assembly stages overlap instead of running back to back"""
+    import time
+    email_data = {'from': 'test@example.com', 'subject': 'Test', 'body': 'Body', 'id': 'msg_123'}
+    
+    async def slow_download(url):
+        await asyncio.sleep(0.2)
+        return "/tmp/audio.mp3"
+    
+    def slow_background(email_content):
+        time.sleep(0.2)
+        return "bg.mp4", "/tmp/bg.mp4"
+    
+    async def slow_upload(path, destination):
+        await asyncio.sleep(0.2)
+        return f"gs://bucket/{destination}"
+    
+    async def slow_thumbnail(path, video_id):
+        await asyncio.sleep(0.2)
+        return "gs://bucket/thumbnails/thumb.jpg"
+    
+    with patch('app.video_assembly.download_from_storage', side_effect=slow_download), \
+         patch('app.video_assembly.select_background_video', side_effect=slow_background), \
+         patch('app.video_assembly.upload_to_storage', side_effect=slow_upload), \
+         patch('app.video_assembly.generate_thumbnail', side_effect=slow_thumbnail), \
+         patch('app.video_assembly.calculate_video_duration_from_audio', return_value=10), \
+         patch('app.video_assembly.ffmpeg.run'):
+        start = time.perf_counter()
+        video_url = await assemble_video("gs://bucket/audio/test.mp3", email_data)
+        elapsed = time.perf_counter() - start
+    
+    assert video_url.startswith("gs://bucket/videos/video_msg_123_")
+    # Four 0.2s stages, overlapped in two pairs
+    assert elapsed < 0.6
+
+
 def test_create_ffmpeg_command():
     """Test FFmpeg command generation"""
     from app.video_assembly import create_ffmpeg_command
@@ -160,6 +252,44 @@ def test_create_ffmpeg_command():
     assert "vcodec" in str(command)  # Should have video codec
 
 
+def test_ffmpeg_hw_accel_selected(monkeypatch):
+    """Test the detected hardware encoder and its options are used"""
+    from app.video_assembly import create_ffmpeg_command, get_video_encoder
+    
+    monkeypatch.delenv('FFMPEG_VCODEC', raising=False)
+    mock_detect = Mock(return_value='h264_nvenc')
+    monkeypatch.setattr('app.video_assembly._detect_encoder', mock_detect)
+    get_video_encoder.cache_clear()
+    
+    try:
+        commands = [
+            create_ffmpeg_command("/tmp/audio.mp3", "/tmp/background.mp4", "/tmp/output.mp4",
+                                  {'id': 'msg_123'}, 30.0)
+            for _ in range(2)
+        ]
+    finally:
+        get_video_encoder.cache_clear()
+    
+    args = commands[-1].get_args()
+    assert args[args.index('-vcodec') + 1] == 'h264_nvenc'
+    assert args[args.index('-preset') + 1] == 'p4'
+    mock_detect.assert_called_once()
+
+
+def test_detect_encoder_probes_with_encode_options(monkeypatch):
+    """Test each encoder is probed with the options the real encode uses"""
+    from app.video_assembly import _detect_encoder
+    
+    mock_run = Mock(side_effect=[Mock(returncode=1), Mock(returncode=0)])
+    monkeypatch.setattr('app.video_assembly.subprocess.run', mock_run)
+    
+    assert _detect_encoder() == 'h264_qsv'
+    
+    nvenc_args, qsv_args = (call.args[0] for call in mock_run.call_args_list)
+    assert nvenc_args[nvenc_args.index('-c:v') + 1:nvenc_args.index('-c:v') + 4] == ['h264_nvenc', '-preset', 'p4']
+    assert qsv_args[qsv_args.index('-c:v') + 1:qsv_args.index('-c:v') + 4] == ['h264_qsv', '-preset', 'faster']
+
+
 def test_validate_video_inputs():
     """Test video input validation"""
     from app.video_assembly import validate_video_inputs
@@ -187,11 +317,28 @@ def test_calculate_video_duration():
     assert isinstance(duration, (int, float))
 
 
+def test_calculate_video_duration_irregular_whitespace():
+    """Test words are counted the same however they are separated"""
+    from app.video_assembly import calculate_video_duration, SECONDS_PER_WORD
+    
+    words = ["word"] * 20
+    expected = 20 * SECONDS_PER_WORD
+    
+    assert calculate_video_duration(" ".join(words)) == expected
+    assert calculate_video_duration("  ".join(words)) == expected
+    assert calculate_video_duration("\n".join(words)) == expected
+    assert calculate_video_duration(" \t " + " \n ".join(words) + "  ") == expected
+    # Blank scripts have no words and get the minimum duration
+    assert calculate_video_duration("   ") == 5
+    assert calculate_video_duration("") == 5
+
+
 @pytest.mark.asyncio
-async def test_generate_thumbnail():
+async def test_generate_thumbnail(monkeypatch):
     """Test thumbnail generation"""
     from app.video_assembly import generate_thumbnail
     
+    monkeypatch.setattr('app.video_assembly.av', None)
     video_path = "/tmp/video.mp4"
     
     with patch('app.video_assembly.ffmpeg') as mock_ffmpeg_module:
@@ -214,6 +361,52 @@ async def test_generate_thumbnail():
                 mock_run.assert_called_once()
 
 
+def test_create_color_background_reused(monkeypatch, tmp_path):
+    """Test the color background is encoded once and then reused"""
+    from app.video_assembly import create_color_background
+    
+    background_path = str(tmp_path / "color_background.mp4")
+    monkeypatch.setattr('app.video_assembly.COLOR_BACKGROUND_PATH', background_path)
+    
+    def fake_output(path, **kwargs):
+        with open(path, 'wb') as f:
+            f.write(b"fake_video_data")
+        return Mock()
+    
+    with patch('app.video_assembly.ffmpeg') as mock_ffmpeg_module:
+        mock_ffmpeg_module.input.return_value.output.side_effect = fake_output
+        
+        first = create_color_background()
+        second = create_color_background()
+    
+    assert first == second == background_path
+    assert mock_ffmpeg_module.input.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_thumbnail_in_process(monkeypatch):
+    """Test PyAV thumbnails grab the frame at 2s and upload the JPEG bytes"""
+    from app.video_assembly import generate_thumbnail
+    
+    frames = [Mock(time=t) for t in (0.0, 1.0, 2.0, 3.0)]
+    for frame in frames:
+        frame.to_image.return_value.save.side_effect = lambda buffer, *args, **kwargs: buffer.write(b"jpeg_data")
+    container = MagicMock()
+    container.__enter__.return_value = container
+    container.decode.return_value = iter(frames)
+    mock_av = Mock(time_base=1000000)
+    mock_av.open.return_value = container
+    monkeypatch.setattr('app.video_assembly.av', mock_av)
+    
+    with patch('app.video_assembly.upload_bytes_to_storage', new=AsyncMock(return_value="gs://bucket/thumbnails/thumb.jpg")) as mock_upload:
+        thumbnail_url = await generate_thumbnail("/tmp/video.mp4", "msg_123")
+    
+    assert thumbnail_url == "gs://bucket/thumbnails/thumb.jpg"
+    container.seek.assert_called_once_with(2000000)
+    frames[2].to_image.assert_called_once()
+    mock_upload.assert_awaited_once_with(b"jpeg_data", "thumbnails/msg_123.jpg")
+
+
 def test_cleanup_temp_files():
     """Test temporary file cleanup"""
     from app.video_assembly import cleanup_temp_files
@@ -237,8 +430,24 @@ def test_cleanup_temp_files():
         assert not os.path.exists(file_path)
 
 
+def test_cleanup_temp_files_parallel(tmp_path):
+    """Test large cleanups delete every file, including already-missing ones"""
+    from app.video_assembly import cleanup_temp_files
+    
+    temp_files = []
+    for i in range(200):
+        file_path = tmp_path / f"temp_{i}.mp4"
+        file_path.write_bytes(b"x")
+        temp_files.append(str(file_path))
+    temp_files.append(str(tmp_path / "already_deleted.mp4"))
+    
+    cleanup_temp_files(temp_files)
+    
+    assert list(tmp_path.iterdir()) == []
+
+
 @pytest.mark.asyncio
-async def test_video_assembly_with_metrics():
+async def test_video_assembly_with_metrics(mock_assembly_io):
     """Test video assembly completes successfully"""
     audio_url = "gs://bucket/audio/test.mp3"
     email_data = {
@@ -248,17 +457,12 @@ async def test_video_assembly_with_metrics():
         'id': 'msg_123'
     }
     
-    with patch('app.video_assembly.download_from_storage'):
-        with patch('app.video_assembly.ffmpeg.run'):
-            with patch('app.video_assembly.upload_to_storage') as mock_upload:
-                with patch('app.video_assembly.generate_thumbnail') as mock_thumbnail:
-                    mock_upload.return_value = "gs://bucket/videos/video_123.mp4"
-                    mock_thumbnail.return_value = "gs://bucket/thumbnails/thumb.jpg"
-                    
-                    result = await assemble_video(audio_url, email_data)
-                    
-                    # Should return video URL
-                    assert result == "gs://bucket/videos/video_123.mp4"
+    mock_assembly_io.upload.return_value = "gs://bucket/videos/video_123.mp4"
+    
+    result = await assemble_video(audio_url, email_data)
+    
+    # Should return video URL
+    assert result == "gs://bucket/videos/video_123.mp4"
 
 
 def test_get_video_specs():
@@ -275,7 +479,7 @@ def test_get_video_specs():
 
 
 @pytest.mark.asyncio
-async def test_assemble_video_with_text_overlay():
+async def test_assemble_video_with_text_overlay(mock_assembly_io):
     """Test video assembly includes text overlay"""
     audio_url = "gs://bucket/audio/test.mp3"
     email_data = {
@@ -285,17 +489,12 @@ async def test_assemble_video_with_text_overlay():
         'id': 'msg_123'
     }
     
-    with patch('app.video_assembly.download_from_storage'):
-        with patch('app.video_assembly.ffmpeg.run') as mock_ffmpeg:
-            with patch('app.video_assembly.upload_to_storage') as mock_upload:
-                with patch('app.video_assembly.generate_thumbnail') as mock_thumbnail:
-                    mock_upload.return_value = "gs://bucket/videos/video_123.mp4"
-                    mock_thumbnail.return_value = "gs://bucket/thumbnails/thumb.jpg"
-                    
-                    await assemble_video(audio_url, email_data)
-                    
-                    # Check that FFmpeg was called
-                    assert mock_ffmpeg.called
-                    
-                    # Verify video was uploaded
-                    mock_upload.assert_called()
\ No newline at end of file
+    mock_assembly_io.upload.return_value = "gs://bucket/videos/video_123.mp4"
+    
+    await assemble_video(audio_url, email_data)
+    
+    # Check that FFmpeg was called
+    assert mock_assembly_io.ffmpeg_run.called
+    
+    # Verify video was uploaded
+    mock_assembly_io.upload.assert_called()
\ No newline at end of file
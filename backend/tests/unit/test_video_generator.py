@@ -1,10 +1,19 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
-from app.video_generator import process_email, get_fallback_video, process_email_batch, health_check_pipeline
+from unittest.mock import patch
+from app.video_generator import process_email, get_fallback_video, process_email_batch, health_check_pipeline, _video_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_video_cache():
+    """Keep cached videos from leaking between tests"""
+    _video_cache.clear()
+    yield
+    _video_cache.clear()
 
 
 @pytest.mark.asyncio
-async def test_process_email_success():
+async def test_process_email_success(mock_pipeline):
     """Test successful email processing through full pipeline"""
     email_data = {
         'id': 'test_123',
@@ -13,56 +22,67 @@ async def test_process_email_success():
         'body': 'This is a test email body'
     }
     
-    with patch('app.video_generator.parse_email') as mock_parse:
-        with patch('app.video_generator.generate_script_with_retry') as mock_script:
-            with patch('app.video_generator.generate_audio') as mock_audio:
-                with patch('app.video_generator.assemble_video') as mock_video:
-                    
-                    # Setup mocks
-                    mock_parse.return_value = email_data
-                    mock_script.return_value = "Test script"
-                    mock_audio.return_value = "gs://bucket/audio/test.mp3"
-                    mock_video.return_value = "gs://bucket/videos/test.mp4"
-                    
-                    # Process email
-                    result = await process_email(email_data)
-                    
-                    # Verify result
-                    assert result == "gs://bucket/videos/test.mp4"
-                    
-                    # Verify all steps were called
-                    mock_parse.assert_called_once_with(email_data)
-                    mock_script.assert_called_once()
-                    mock_audio.assert_called_once_with("Test script")
-                    mock_video.assert_called_once()
+    mock_pipeline.parse.return_value = email_data
+    mock_pipeline.script.return_value = "Test script"
+    mock_pipeline.audio.return_value = "gs://bucket/audio/test.mp3"
+    mock_pipeline.video.return_value = "gs://bucket/videos/test.mp4"
+    
+    result = await process_email(email_data)
+    
+    # Verify result
+    assert result == "gs://bucket/videos/test.mp4"
+    
+    # Verify all steps were called
+    mock_pipeline.parse.assert_called_once_with(email_data)
+    mock_pipeline.script.assert_called_once()
+    mock_pipeline.audio.assert_called_once_with("Test script", upload=False)
+    mock_pipeline.video.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_process_email_parse_failure():
+async def test_process_email_cache_hit(mock_pipeline):
+    """Test a repeated email returns the cached video without rerunning the pipeline"""
+    email_data = {
+        'id': 'test_123',
+        'from': 'test@example.com',
+        'subject': 'Test Email',
+        'body': 'This is a test email body'
+    }
+    
+    mock_pipeline.parse.return_value = email_data
+    mock_pipeline.script.return_value = "Test script"
+    mock_pipeline.audio.return_value = "/tmp/test_audio.mp3"
+    mock_pipeline.video.return_value = "gs://bucket/videos/test.mp4"
+    
+    first = await process_email(email_data)
+    second = await process_email(dict(email_data))
+    
+    assert first == second == "gs://bucket/videos/test.mp4"
+    assert mock_pipeline.parse.call_count == 1
+    assert mock_pipeline.video.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_process_email_parse_failure(mock_pipeline):
     """Test email processing when parsing fails"""
     email_data = {
         'id': 'test_123',
         'from': 'test@example.com'
     }
     
-    with patch('app.video_generator.parse_email') as mock_parse:
-        with patch('app.video_generator.get_fallback_video') as mock_fallback:
-            
-            # Setup mocks
-            from app.email_parser import EmailParseError
-            mock_parse.side_effect = EmailParseError("Parse failed")
-            mock_fallback.return_value = "gs://bucket/fallback.mp4"
-            
-            # Process email
-            result = await process_email(email_data)
-            
-            # Should return fallback video
-            assert result == "gs://bucket/fallback.mp4"
-            mock_fallback.assert_called_once_with(email_data)
+    from app.email_parser import EmailParseError
+    mock_pipeline.parse.side_effect = EmailParseError("Parse failed")
+    mock_pipeline.fallback.return_value = "gs://bucket/fallback.mp4"
+    
+    result = await process_email(email_data)
+    
+    # Should return fallback video
+    assert result == "gs://bucket/fallback.mp4"
+    mock_pipeline.fallback.assert_called_once_with(email_data)
 
 
 @pytest.mark.asyncio
-async def test_process_email_script_failure():
+async def test_process_email_script_failure(mock_pipeline):
     """Test email processing when script generation fails"""
     email_data = {
         'id': 'test_123',
@@ -71,27 +91,44 @@ async def test_process_email_script_failure():
         'body': 'Test body'
     }
     
-    with patch('app.video_generator.parse_email') as mock_parse:
-        with patch('app.video_generator.generate_script_with_retry') as mock_script:
-            with patch('app.video_generator.generate_audio') as mock_audio:
-                with patch('app.video_generator.assemble_video') as mock_video:
-                    
-                    # Setup mocks
-                    mock_parse.return_value = email_data
-                    mock_script.side_effect = Exception("Script failed")
-                    mock_audio.return_value = "gs://bucket/audio/test.mp3"
-                    mock_video.return_value = "gs://bucket/videos/test.mp4"
-                    
-                    # Process email
-                    result = await process_email(email_data)
-                    
-                    # Should still succeed with fallback script
-                    assert result == "gs://bucket/videos/test.mp4"
-                    mock_audio.assert_called_once()  # Should be called with fallback script
+    mock_pipeline.parse.return_value = email_data
+    mock_pipeline.script.side_effect = Exception("Script failed")
+    mock_pipeline.audio.return_value = "gs://bucket/audio/test.mp3"
+    mock_pipeline.video.return_value = "gs://bucket/videos/test.mp4"
+    
+    result = await process_email(email_data)
+    
+    # Should still succeed with fallback script
+    assert result == "gs://bucket/videos/test.mp4"
+    mock_pipeline.audio.assert_called_once()  # Should be called with fallback script
+
+
+@pytest.mark.asyncio
+async def test_process_email_fallback_not_cached(mock_pipeline):
+    """Test videos built from fallback content are regenerated on the next call"""
+    email_data = {
+        'id': 'test_123',
+        'from': 'test@example.com',
+        'subject': 'Test',
+        'body': 'Test body'
+    }
+    
+    mock_pipeline.parse.return_value = email_data
+    mock_pipeline.script.side_effect = [Exception("Script failed"), "Test script"]
+    mock_pipeline.audio.return_value = "/tmp/test_audio.mp3"
+    mock_pipeline.video.side_effect = ["gs://bucket/videos/fallback.mp4", "gs://bucket/videos/test.mp4"]
+    
+    first = await process_email(email_data)
+    second = await process_email(email_data)
+    
+    assert first == "gs://bucket/videos/fallback.mp4"
+    assert second == "gs://bucket/videos/test.mp4"
+    assert mock_pipeline.parse.call_count == 2
+    assert mock_pipeline.video.call_count == 2
 
 
 @pytest.mark.asyncio
-async def test_process_email_audio_failure():
+async def test_process_email_audio_failure(mock_pipeline):
     """Test email processing when audio generation fails"""
     email_data = {
         'id': 'test_123',
@@ -100,27 +137,20 @@ async def test_process_email_audio_failure():
         'body': 'Test body'
     }
     
-    with patch('app.video_generator.parse_email') as mock_parse:
-        with patch('app.video_generator.generate_script_with_retry') as mock_script:
-            with patch('app.video_generator.generate_audio') as mock_audio:
-                with patch('app.video_generator.assemble_video') as mock_video:
-                    
-                    # Setup mocks
-                    mock_parse.return_value = email_data
-                    mock_script.return_value = "Test script"
-                    mock_audio.side_effect = Exception("Audio failed")
-                    mock_video.return_value = "gs://bucket/videos/test.mp4"
-                    
-                    # Process email
-                    result = await process_email(email_data)
-                    
-                    # Should still succeed with fallback audio
-                    assert result == "gs://bucket/videos/test.mp4"
-                    mock_video.assert_called_once()
+    mock_pipeline.parse.return_value = email_data
+    mock_pipeline.script.return_value = "Test script"
+    mock_pipeline.audio.side_effect = Exception("Audio failed")
+    mock_pipeline.video.return_value = "gs://bucket/videos/test.mp4"
+    
+    result = await process_email(email_data)
+    
+    # Should still succeed with fallback audio
+    assert result == "gs://bucket/videos/test.mp4"
+    mock_pipeline.video.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_process_email_video_assembly_failure():
+async def test_process_email_video_assembly_failure(mock_pipeline):
     """Test email processing when video assembly fails"""
     email_data = {
         'id': 'test_123',
@@ -129,26 +159,18 @@ async def test_process_email_video_assembly_failure():
         'body': 'Test body'
     }
     
-    with patch('app.video_generator.parse_email') as mock_parse:
-        with patch('app.video_generator.generate_script_with_retry') as mock_script:
-            with patch('app.video_generator.generate_audio') as mock_audio:
-                with patch('app.video_generator.assemble_video') as mock_video:
-                    with patch('app.video_generator.get_fallback_video') as mock_fallback:
-                        
-                        # Setup mocks
-                        mock_parse.return_value = email_data
-                        mock_script.return_value = "Test script"
-                        mock_audio.return_value = "gs://bucket/audio/test.mp3"
-                        from app.video_assembly import VideoAssemblyError
-                        mock_video.side_effect = VideoAssemblyError("Assembly failed")
-                        mock_fallback.return_value = "gs://bucket/fallback.mp4"
-                        
-                        # Process email
-                        result = await process_email(email_data)
-                        
-                        # Should return fallback video
-                        assert result == "gs://bucket/fallback.mp4"
-                        mock_fallback.assert_called_once()
+    from app.video_assembly import VideoAssemblyError
+    mock_pipeline.parse.return_value = email_data
+    mock_pipeline.script.return_value = "Test script"
+    mock_pipeline.audio.return_value = "gs://bucket/audio/test.mp3"
+    mock_pipeline.video.side_effect = VideoAssemblyError("Assembly failed")
+    mock_pipeline.fallback.return_value = "gs://bucket/fallback.mp4"
+    
+    result = await process_email(email_data)
+    
+    # Should return fallback video
+    assert result == "gs://bucket/fallback.mp4"
+    mock_pipeline.fallback.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -234,6 +256,51 @@ async def test_process_email_batch_with_exceptions():
         assert result['success_rate'] == 0.5
 
 
+@pytest.mark.asyncio
+async def test_process_email_batch_logs_cancelled(caplog):
+    """Test cancelled emails are counted and logged as failures"""
+    emails = [
+        {'id': 'email_1', 'from': 'test1@example.com'},
+        {'id': 'email_2', 'from': 'test2@example.com'}
+    ]
+    
+    with patch('app.video_generator.process_email') as mock_process:
+        mock_process.side_effect = [
+            "gs://bucket/video1.mp4",
+            asyncio.CancelledError()
+        ]
+        
+        with caplog.at_level('INFO', logger='app.video_generator'):
+            result = await process_email_batch(emails)
+    
+    assert result['successful'] == 1
+    assert result['failed'] == 1
+    assert "batch_email_success: email_1: gs://bucket/video1.mp4" in caplog.text
+    assert "batch_email_failed: email_2: CancelledError" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_process_email_batch_limits_concurrency():
+    """Test batch processing never runs more than max_concurrency emails at once"""
+    emails = [{'id': f'email_{i}', 'from': f'test{i}@example.com'} for i in range(6)]
+    in_flight = 0
+    peak = 0
+    
+    async def fake_process(email_data):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f"gs://bucket/{email_data['id']}.mp4"
+    
+    with patch('app.video_generator.process_email', side_effect=fake_process):
+        result = await process_email_batch(emails, max_concurrency=2)
+    
+    assert result['successful'] == 6
+    assert peak == 2
+
+
 @pytest.mark.asyncio
 async def test_health_check_pipeline():
     """Test pipeline health check"""
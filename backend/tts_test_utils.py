@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the standalone TTS test scripts.
+
+test_tts_simple.py, test_tts_voices.py, test_tts_with_env.py and
+test_tts_functionality.py all generate audio through this module: one OpenAI
+client setup, one bounded and retrying request path, and one on-disk audio
+cache keyed by (model, voice, script).
+
+Environment:
+    TTS_CACHE_BUST=1        regenerate instead of reusing cached audio
+    TTS_MAX_CONCURRENCY=N   TTS requests in flight at once (default 8)
+    TTS_FAST=1              trim test scripts to their first 40 characters
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import httpx
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# Generated audio is cached (and played back) from one directory across runs;
+# set TTS_CACHE_BUST=1 to regenerate it
+TTS_CACHE_DIR = Path(tempfile.gettempdir(), 'buzz_tts_cache')
+TTS_CACHE_BUST = os.getenv('TTS_CACHE_BUST') == '1'
+
+# Upper bound on in-flight TTS requests (OpenAI rate limits)
+TTS_MAX_CONCURRENCY = int(os.getenv('TTS_MAX_CONCURRENCY', '8'))
+_tts_semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENCY)
+TTS_MAX_ATTEMPTS = 4
+
+# TTS_FAST=1 trims test scripts (TTS latency and billing scale with length)
+TTS_FAST = os.getenv('TTS_FAST') == '1'
+FAST_SCRIPT_CHARS = 40
+
+# Chunk size for streaming audio into the cache and out to callers' files
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+# Partial downloads still on disk; whatever is left after a failed request
+# is removed by cleanup_temp_files()
+_created_paths: List[str] = []
+
+# In-flight requests keyed by (model, voice, script), shared by concurrent callers
+_inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+
+
+def create_openai_client() -> Optional[AsyncOpenAI]:
+    """Create the OpenAI client shared by all tests (one pooled connection set)."""
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    return AsyncOpenAI(
+        api_key=api_key,
+        max_retries=0,  # retries are handled by tts_with_retry
+        http_client=httpx.AsyncClient(
+            timeout=60,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    )
+
+
+def fast_script(script: str) -> str:
+    """Clamp a test script when TTS_FAST=1; endpoint checks don't need full text."""
+    return script[:FAST_SCRIPT_CHARS] if TTS_FAST else script
+
+
+def _cache_key(*parts: Optional[str]) -> str:
+    """Cache key for a combination of request parameters."""
+    return hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+
+
+def tts_cache_path(model: str, voice: str, script: str) -> Path:
+    """Cache file for a (model, voice, script) combination."""
+    return TTS_CACHE_DIR / f"{_cache_key(model, voice, script)}.mp3"
+
+
+def tts_cache_get(model: str, voice: str, script: str) -> Optional[Path]:
+    """Return the cached audio file, or None on a miss (or when TTS_CACHE_BUST=1)."""
+    cache_path = tts_cache_path(model, voice, script)
+    if TTS_CACHE_BUST or not cache_path.exists():
+        return None
+    return cache_path
+
+
+# Transient failures worth retrying; anything else (e.g. a 400 for a bad
+# request) fails immediately
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failed speech request is worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+async def _stream_speech(client: AsyncOpenAI, model: str, voice: str, script: str, path: str) -> int:
+    """
+    Stream speech audio into path as it arrives, returning its size.
+    
+    openai==1.3.5 has no with_streaming_response and speech.create reads the
+    whole body into memory, so this posts to the speech endpoint with a
+    streaming request on the client's own connection pool instead.
+    """
+    size = 0
+    async with client._client.stream(
+        "POST",
+        client.base_url.join("audio/speech"),
+        headers=client.auth_headers,
+        json={"model": model, "voice": voice, "input": script}
+    ) as response:
+        response.raise_for_status()
+        async with aiofiles.open(path, 'wb') as f:
+            async for chunk in response.aiter_bytes(AUDIO_CHUNK_SIZE):
+                await f.write(chunk)
+                size += len(chunk)
+    return size
+
+
+async def tts_with_retry(client: AsyncOpenAI, model: str, voice: str, script: str, path: str,
+                         max_attempts: int = TTS_MAX_ATTEMPTS) -> int:
+    """
+    Stream speech audio into path with exponential backoff and jitter.
+    
+    The concurrency semaphore is only held while a request is in flight, not
+    while backing off. A retry rewrites the file from the start.
+    
+    Returns:
+        Size of the audio in bytes
+    """
+    for attempt in range(max_attempts):
+        try:
+            async with _tts_semaphore:
+                return await _stream_speech(client, model, voice, script, path)
+        except (httpx.HTTPStatusError, httpx.TransportError) as e:
+            if attempt == max_attempts - 1 or not _is_retryable(e):
+                raise
+            delay = min(30, 2 ** attempt) + random.uniform(0, 0.5)
+            logger.warning("⚠️  TTS request failed (%s), retrying in %.1fs (attempt %s/%s)",
+                           type(e).__name__, delay, attempt + 1, max_attempts)
+            await asyncio.sleep(delay)
+
+
+async def _generate_into_cache(client: AsyncOpenAI, model: str, voice: str, script: str) -> tuple:
+    """Stream TTS audio into its cache file, returning (path, size)."""
+    TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, part_path = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".part")
+    os.close(fd)
+    _created_paths.append(part_path)
+    size = await tts_with_retry(client, model, voice, script, part_path)
+    
+    # Publish atomically so concurrent runs never see a partial file
+    cache_path = tts_cache_path(model, voice, script)
+    os.replace(part_path, cache_path)
+    _created_paths.remove(part_path)
+    return str(cache_path), size
+
+
+async def synthesize(client: AsyncOpenAI, model: str, voice: str, script: str) -> tuple:
+    """
+    Generate TTS audio into the on-disk cache, reusing cached audio when available.
+    
+    The cache file doubles as the playable output, so runs don't leave new
+    temporary files behind. Identical requests made while one is already in
+    flight wait for it instead of calling the API again. Requests go through
+    tts_with_retry, so callers can gather any number of these.
+    
+    Returns:
+        (path, size) of the audio file
+    """
+    cached_path = tts_cache_get(model, voice, script)
+    if cached_path is not None:
+        logger.info("💾 TTS cache hit: %s/%s", model, voice)
+        return str(cached_path), cached_path.stat().st_size
+    
+    key = (model, voice, script)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_into_cache(client, model, voice, script))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        logger.info("🔗 Joining in-flight TTS request: %s/%s", model, voice)
+    
+    # Shielded so one cancelled caller doesn't cancel the request for the others
+    return await asyncio.shield(task)
+
+
+async def synthesize_to_file(client: AsyncOpenAI, model: str, voice: str, script: str, out_path: Path) -> bool:
+    """
+    Write TTS audio for a script to out_path, going through the shared cache.
+    
+    Returns:
+        True on a cache hit, False when the audio was generated
+    """
+    cached = tts_cache_get(model, voice, script) is not None
+    cache_path, _ = await synthesize(client, model, voice, script)
+    async with aiofiles.open(cache_path, 'rb') as src, aiofiles.open(out_path, 'wb') as dst:
+        while chunk := await src.read(AUDIO_CHUNK_SIZE):
+            await dst.write(chunk)
+    return cached
+
+
+def memoize_audio_urls(func, fallback: str):
+    """
+    Memoize an async generate_audio(text, voice=None) on disk across runs.
+    
+    Results are recorded in an index file in TTS_CACHE_DIR, keyed by voice
+    and text; set TTS_CACHE_BUST=1 to discard it. The fallback audio is never
+    cached.
+    """
+    TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    index_path = TTS_CACHE_DIR / f"{func.__name__}_index.json"
+    
+    if TTS_CACHE_BUST and index_path.exists():
+        index_path.unlink()
+    
+    index = json.loads(index_path.read_text()) if index_path.exists() else {}
+    
+    @functools.wraps(func)
+    async def wrapper(text: str, voice: Optional[str] = None) -> str:
+        key = _cache_key(func.__name__, voice, text)
+        
+        cached = index.get(key)
+        if cached and (cached.startswith('http') or os.path.exists(cached)):
+            logger.info("💾 TTS cache hit: %s -> %s", key[:12], cached)
+            return cached
+        
+        audio_url = await func(text, voice=voice)
+        
+        if audio_url and audio_url != fallback:
+            index[key] = audio_url
+            index_path.write_text(json.dumps(index))
+        
+        return audio_url
+    return wrapper
+
+
+async def gather_bounded(coros, limit: int = TTS_MAX_CONCURRENCY) -> list:
+    """Run coroutines concurrently, at most `limit` at a time, keeping input order."""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=True)
+
+
+async def cleanup_temp_files():
+    """Remove partial audio files left behind by failed requests."""
+    if not _created_paths:
+        return
+    
+    paths, _created_paths[:] = list(_created_paths), []
+    results = await asyncio.gather(
+        *[asyncio.to_thread(os.unlink, path) for path in paths],
+        return_exceptions=True
+    )
+    for path, result in zip(paths, results):
+        if isinstance(result, Exception):
+            logger.warning("⚠️  Could not delete %s: %s", path, result)
+    logger.info("🗑️  Removed %s partial audio files", len(paths))